@@ -0,0 +1,140 @@
+""" Asyncio Implementation of Chain Of Responsibility """
+
+from __future__ import annotations
+import asyncio
+import functools
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from chain_of_responsibility import (
+    AuthenticationHeader,
+    BodyPayloadHandler,
+    ContentTypeHeader,
+    HandlerChain,
+)
+
+
+@dataclass(frozen=True)
+class TerminalResult:
+    """ Returned by a handler to stop the chain early """
+    message: str
+
+
+class AsyncHandlerChain(ABC):
+    """ Abstract AsyncHandlerChain, handlers may await while building fragments """
+    def __init__(self, next_header: AsyncHandlerChain = None):
+        self.next_header = next_header
+
+    @abstractmethod
+    async def fragment(self, input_header: str):
+        """ text to append, or a TerminalResult to stop the chain """
+
+    async def add_header(self, input_header: str):
+        """ append this handler's fragment and pass the message on """
+        fragment = await self.fragment(input_header)
+        if isinstance(fragment, TerminalResult):
+            return fragment
+        return await self.do_next(f"{input_header}{fragment}")
+
+    async def do_next(self, input_header: str):
+        if self.next_header:
+            return await self.next_header.add_header(input_header)
+        return input_header
+
+
+class AsyncAuthenticationHeader(AsyncHandlerChain):
+    """ Looks up the token asynchronously and rejects unknown users """
+    def __init__(self, user: str, token_lookup, next_header: AsyncHandlerChain = None):
+        super().__init__(next_header)
+        self.user = user
+        self.token_lookup = token_lookup
+
+    async def fragment(self, input_header):
+        """ authorization fragment, or a rejection """
+        token = await self.token_lookup(self.user)
+        if token is None:
+            return TerminalResult(f"401 Unauthorized: {self.user}")
+        return f"\nAuthorization: {token}"
+
+
+class ConcurrentHandlers(AsyncHandlerChain):
+    """
+    Runs independent handlers concurrently and appends their fragments
+    in declaration order; the first TerminalResult (in that order) wins
+    """
+    def __init__(self, handlers: list, next_header: AsyncHandlerChain = None):
+        super().__init__(next_header)
+        self.handlers = list(handlers)
+
+    async def fragment(self, input_header):
+        """ gather the fragments of every member handler """
+        fragments = await asyncio.gather(
+            *(handler.fragment(input_header) for handler in self.handlers)
+        )
+        for fragment in fragments:
+            if isinstance(fragment, TerminalResult):
+                return fragment
+        return "".join(fragments)
+
+
+class SyncHandlerBridge(AsyncHandlerChain):
+    """
+    Adapts an existing HandlerChain handler to the async chain.
+    Use offload=True for handlers that block, so they run in a thread
+    instead of stalling the event loop.
+    """
+    def __init__(self, handler: HandlerChain, next_header: AsyncHandlerChain = None,
+                 offload: bool = False):
+        super().__init__(next_header)
+        self.handler = handler
+        self.offload = offload
+
+    async def fragment(self, input_header):
+        """ fragment of the wrapped sync handler """
+        fragment = self.handler.fragment
+        if type(self.handler).fragment is HandlerChain.fragment:
+            # add_header-only handler: run it detached on the real input
+            fragment = functools.partial(fragment, input_header)
+        if self.offload:
+            return await asyncio.to_thread(fragment)
+        return fragment()
+
+    @classmethod
+    def from_chain(cls, head: HandlerChain, offload: bool = False) -> AsyncHandlerChain:
+        """ bridge every handler of a sync chain, keeping their order """
+        async_head = None
+        for handler in reversed(list(head.handlers())):
+            async_head = cls(handler, async_head, offload=offload)
+        return async_head
+
+
+# Usage
+if __name__ == "__main__":
+    TOKENS = {"john": "123456"}
+
+    async def lookup_token(user: str):
+        """ pretend to hit a token store """
+        await asyncio.sleep(0.01)
+        return TOKENS.get(user)
+
+    async def main():
+        """ run a few requests concurrently on one loop """
+        body = SyncHandlerBridge(BodyPayloadHandler("Body: {\"Username\":\"John\"}"))
+        content_type = SyncHandlerBridge(ContentTypeHeader("json"), body)
+
+        john = AsyncAuthenticationHeader("john", lookup_token, content_type)
+        mallory = AsyncAuthenticationHeader("mallory", lookup_token, content_type)
+        results = await asyncio.gather(
+            john.add_header("Header with authentication"),
+            mallory.add_header("Header with authentication"),
+        )
+        for result in results:
+            print(result)
+            print()
+
+        bridged = SyncHandlerBridge.from_chain(
+            AuthenticationHeader("123456", ContentTypeHeader("json"))
+        )
+        print(await bridged.add_header("Bridged sync chain"))
+
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+""" Benchmarks for Chain Of Responsibility """
+
+import asyncio
+import socket
+import time
+import timeit
+import tracemalloc
+
+from async_chain_of_responsibility import (
+    AsyncAuthenticationHeader,
+    ConcurrentHandlers,
+    SyncHandlerBridge,
+)
+
+from chain_of_responsibility import (
+    AuthenticationHeader,
+    BodyPayloadHandler,
+    ContentTypeHeader,
+    send_fragments,
+)
+
+
+def build_chain(length: int):
+    """ build a chain of `length` handlers cycling through the concrete types """
+    kinds = (
+        lambda i: AuthenticationHeader(f"token-{i}"),
+        lambda i: ContentTypeHeader("json"),
+        lambda i: BodyPayloadHandler(f"Body: {{\"n\":{i}}}"),
+    )
+    head = None
+    for i in reversed(range(length)):
+        handler = kinds[i % len(kinds)](i)
+        handler.next_header = head
+        head = handler
+    return head
+
+
+def bench_compiled_chain(lengths=(3, 10, 50, 200, 400), number=2000):
+    """
+    recursive add_header vs CompiledChain as the chain grows
+    (the recursive path needs two frames per handler, so keep lengths
+    well below the recursion limit)
+    """
+    print("compiled chain: recursive vs compiled (us per message)")
+    for length in lengths:
+        head = build_chain(length)
+        compiled = head.compile()
+        assert compiled.add_header("GET /") == head.add_header("GET /")
+        recursive = timeit.timeit(lambda: head.add_header("GET /"), number=number)
+        flat = timeit.timeit(lambda: compiled.add_header("GET /"), number=number)
+        inputs = [f"GET /{i}" for i in range(number)]
+        batch = timeit.timeit(lambda: compiled.add_header_many(inputs), number=1)
+        print(f"  n={length:<5} recursive={recursive / number * 1e6:9.2f}"
+              f"  compiled={flat / number * 1e6:7.2f}"
+              f"  add_header_many={batch / number * 1e6:7.2f}")
+
+
+def _recv_exact(sock, size: int) -> bytes:
+    chunks = bytearray()
+    while len(chunks) < size:
+        chunks += sock.recv(size - len(chunks))
+    return bytes(chunks)
+
+
+def _peak_bytes(send) -> int:
+    """ peak traced memory of a single call, warm caches first """
+    send()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    send()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def bench_wire_format(length: int = 30, number: int = 2000):
+    """ str + encode + sendall vs encoded fragments + sendmsg over a socketpair """
+    head = build_chain(length)
+    compiled = head.compile()
+    expected = head.add_header("GET /").encode()
+    left, right = socket.socketpair()
+    try:
+        paths = {
+            "str+encode": lambda: left.sendall(head.add_header("GET /").encode()),
+            "compiled str+encode": lambda: left.sendall(compiled.add_header("GET /").encode()),
+            "fragments+sendmsg": lambda: send_fragments(left, head.encode_fragments(b"GET /")),
+            "compiled sendmsg": lambda: send_fragments(left, compiled.encode_fragments(b"GET /")),
+        }
+        print(f"wire format, chain of {length} handlers, {len(expected)} bytes per message")
+        for name, send in paths.items():
+            send()
+            assert _recv_exact(right, len(expected)) == expected, name
+
+            def roundtrip(send=send):
+                send()
+                _recv_exact(right, len(expected))
+            elapsed = timeit.timeit(roundtrip, number=number)
+            peak = _peak_bytes(roundtrip)
+            print(f"  {name:<20} {elapsed / number * 1e6:7.2f} us"
+                  f"  peak alloc {peak:6d} B/message")
+    finally:
+        left.close()
+        right.close()
+
+
+def bench_async_chain(requests: int = 2000, io_delay: float = 0.001):
+    """ throughput of the async chain with many concurrent requests on one loop """
+    async def lookup(user: str):
+        await asyncio.sleep(io_delay)
+        return None if user.endswith("7") else f"token-{user}"
+
+    def build(user: str, concurrent: bool):
+        tail = SyncHandlerBridge.from_chain(
+            ContentTypeHeader("json", BodyPayloadHandler("Body: {}"))
+        )
+        lookups = [AsyncAuthenticationHeader(f"{user}-{i}", lookup) for i in range(3)]
+        if concurrent:
+            middle = ConcurrentHandlers(lookups, tail)
+        else:
+            for handler, nxt in zip(lookups, lookups[1:] + [tail]):
+                handler.next_header = nxt
+            middle = lookups[0]
+        return AsyncAuthenticationHeader(user, lookup, middle)
+
+    async def run(concurrent_requests: bool, concurrent_handlers: bool):
+        chains = [build(str(i), concurrent_handlers) for i in range(requests)]
+        start = time.perf_counter()
+        if concurrent_requests:
+            await asyncio.gather(*(chain.add_header("GET /") for chain in chains))
+        else:
+            for chain in chains[:requests // 20]:
+                await chain.add_header("GET /")
+            return requests // 20 / (time.perf_counter() - start)
+        return requests / (time.perf_counter() - start)
+
+    print(f"async chain, {io_delay * 1e3:.0f} ms per token lookup (requests/s)")
+    for label, concurrent_requests, concurrent_handlers in (
+        ("one request at a time", False, False),
+        ("gathered, serial handlers", True, False),
+        ("gathered, ConcurrentHandlers", True, True),
+    ):
+        rate = asyncio.run(run(concurrent_requests, concurrent_handlers))
+        print(f"  {label:<30} {rate:10.0f}")
+
+
+if __name__ == "__main__":
+    bench_compiled_chain()
+    bench_wire_format()
+    bench_async_chain()
@@ -1,8 +1,18 @@
 """ Implementation of Chain Of Responsibility """
 
 from __future__ import annotations
+import copy
+import os
 from abc import ABC, abstractmethod
 
+ENCODING = "utf-8"
+# handlers walked before the uncompiled paths check the chain for a cycle
+CYCLE_CHECK = 1024
+try:
+    IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 1024
+
 
 class HandlerChain(ABC):
     """ Abstract HandlerChain """
@@ -18,6 +28,63 @@ class HandlerChain(ABC):
             return self.next_header.add_header(input_header)
         return input_header
 
+    def fragment(self, input_header: str = "") -> str:
+        """
+        text this handler appends to the message. Handlers that only
+        implement add_header are run on a copy detached from the chain
+        and the text they appended to input_header is returned.
+        """
+        detached = copy.copy(self)
+        detached.next_header = None
+        message = detached.add_header(input_header)
+        if not isinstance(message, str) or not message.startswith(input_header):
+            raise NotImplementedError(
+                f"{type(self).__name__} does not append to its input and cannot be"
+                " compiled or bridged; define fragment()"
+            )
+        return message[len(input_header):]
+
+    def fragment_bytes(self) -> bytes:
+        """ encoded fragment, static handlers may cache it """
+        return self.fragment().encode(ENCODING)
+
+    def encode_into(self, buffer: bytearray, input_header: bytes) -> bytearray:
+        """ append the wire-format message to a shared bytearray """
+        buffer += input_header
+        for fragment in self.encode_fragments(b"")[1:]:
+            buffer += fragment
+        return buffer
+
+    def encode_fragments(self, input_header: bytes) -> list:
+        """
+        encoded fragments ready for socket.sendmsg, nothing is joined.
+        Walks next_header directly; the chain is only checked for a cycle
+        once it grows past CYCLE_CHECK handlers.
+        """
+        fragments = [input_header]
+        handler = self
+        while handler is not None:
+            fragments.append(handler.fragment_bytes())
+            handler = handler.next_header
+            if len(fragments) == CYCLE_CHECK:
+                for _ in self.handlers():
+                    pass
+        return fragments
+
+    def handlers(self):
+        """ yield this handler and every handler after it """
+        handler, seen = self, set()
+        while handler is not None:
+            if id(handler) in seen:
+                raise ValueError("HandlerChain contains a cycle")
+            seen.add(id(handler))
+            yield handler
+            handler = handler.next_header
+
+    def compile(self) -> CompiledChain:
+        """ flatten the chain starting here into a CompiledChain """
+        return CompiledChain(self)
+
 
 class AuthenticationHeader(HandlerChain):
     """ Authentication HandlerChain to handle authorization tokens """
@@ -25,9 +92,27 @@ class AuthenticationHeader(HandlerChain):
         super().__init__(next_header)
         self.token = token
 
+    @property
+    def token(self) -> str:
+        """ token, re-encoded only when it changes """
+        return self._token
+
+    @token.setter
+    def token(self, value: str):
+        self._token = value
+        self._fragment_bytes = self.fragment().encode(ENCODING)
+
+    def fragment(self, input_header: str = ""):  # pylint: disable=unused-argument
+        """ authorization fragment """
+        return f"\nAuthorization: {self.token}"
+
+    def fragment_bytes(self):
+        """ fragment encoded once per token """
+        return self._fragment_bytes
+
     def add_header(self, input_header):
         """ add authorization token """
-        h = f"{input_header}\nAuthorization: {self.token}"
+        h = f"{input_header}{self.fragment()}"
         return self.do_next(h)
 
 
@@ -37,9 +122,27 @@ class ContentTypeHeader(HandlerChain):
         super().__init__(next_header)
         self.content_type = content_type
 
+    @property
+    def content_type(self) -> str:
+        """ content type, re-encoded only when it changes """
+        return self._content_type
+
+    @content_type.setter
+    def content_type(self, value: str):
+        self._content_type = value
+        self._fragment_bytes = self.fragment().encode(ENCODING)
+
+    def fragment(self, input_header: str = ""):  # pylint: disable=unused-argument
+        """ content type fragment """
+        return f"\nContentType: {self.content_type}"
+
+    def fragment_bytes(self):
+        """ fragment encoded once per content type """
+        return self._fragment_bytes
+
     def add_header(self, input_header):
         """ add content type header """
-        h = f"{input_header}\nContentType: {self.content_type}"
+        h = f"{input_header}{self.fragment()}"
         return self.do_next(h)
 
 
@@ -49,12 +152,84 @@ class BodyPayloadHandler(HandlerChain):
         super().__init__(next_header)
         self.body = body
 
+    @property
+    def body(self) -> str:
+        """ body, re-encoded only when it changes """
+        return self._body
+
+    @body.setter
+    def body(self, value: str):
+        self._body = value
+        self._fragment_bytes = self.fragment().encode(ENCODING)
+
+    def fragment(self, input_header: str = ""):  # pylint: disable=unused-argument
+        """ body fragment """
+        return f"\n{self.body}"
+
+    def fragment_bytes(self):
+        """ fragment encoded once per body """
+        return self._fragment_bytes
+
     def add_header(self, input_header: str):
         """ add body header """
-        h = f"{input_header}\n{self.body}"
+        h = f"{input_header}{self.fragment()}"
         return self.do_next(h)
 
 
+class CompiledChain:
+    """
+    Flat plan of a HandlerChain: fragments are collected once and the
+    message is built with a single join instead of one copy per handler.
+    Recompile after changing any handler in the chain. Handlers without
+    a fragment() are compiled from what they append to an empty input.
+    """
+    def __init__(self, head: HandlerChain):
+        self.fragments = tuple(handler.fragment() for handler in head.handlers())
+        self._suffix = "".join(self.fragments)
+        self._suffix_bytes = b"".join(
+            handler.fragment_bytes() for handler in head.handlers()
+        )
+
+    def add_header(self, input_header: str) -> str:
+        """ build the message in one pass """
+        return f"{input_header}{self._suffix}"
+
+    def add_header_many(self, inputs) -> list:
+        """ build a message for every input, reusing the same plan """
+        suffix = self._suffix
+        return [f"{input_header}{suffix}" for input_header in inputs]
+
+    def encode_into(self, buffer: bytearray, input_header: bytes) -> bytearray:
+        """ append the wire-format message to a shared bytearray """
+        buffer += input_header
+        buffer += self._suffix_bytes
+        return buffer
+
+    def encode_fragments(self, input_header: bytes) -> list:
+        """ two buffers for socket.sendmsg: the input and the shared suffix """
+        return [input_header, self._suffix_bytes]
+
+
+def send_fragments(sock, fragments) -> int:
+    """
+    Write fragments with socket.sendmsg (writev), retrying partial writes
+    through memoryview slices instead of joining the buffers. At most
+    IOV_MAX buffers go into one call, more would fail with EMSGSIZE.
+    Returns: number of bytes sent
+    """
+    views = [memoryview(fragment) for fragment in fragments]
+    first, total = 0, 0
+    while first < len(views):
+        sent = sock.sendmsg(views[first:first + IOV_MAX])
+        total += sent
+        while first < len(views) and sent >= views[first].nbytes:
+            sent -= views[first].nbytes
+            first += 1
+        if sent:
+            views[first] = views[first][sent:]
+    return total
+
+
 # Usage
 if __name__ == "__main__":
     autorization_header = AuthenticationHeader("123456")
@@ -71,3 +246,6 @@ if __name__ == "__main__":
     print(message_with_authentication)
     print()
     print(message_without_authentication)
+
+    compiled = autorization_header.compile()
+    assert compiled.add_header("Header with authentication") == message_with_authentication
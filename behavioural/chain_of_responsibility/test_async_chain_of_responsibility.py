@@ -0,0 +1,94 @@
+""" Concurrency and early-exit tests for the async Chain Of Responsibility """
+
+import asyncio
+import threading
+import unittest
+
+from async_chain_of_responsibility import (
+    AsyncAuthenticationHeader,
+    AsyncHandlerChain,
+    ConcurrentHandlers,
+    SyncHandlerBridge,
+    TerminalResult,
+)
+from chain_of_responsibility import AuthenticationHeader, BodyPayloadHandler, ContentTypeHeader
+
+
+class Rendezvous(AsyncHandlerChain):
+    """ finishes only once every handler of its group has started """
+    def __init__(self, text: str, started: list, group: int):
+        super().__init__()
+        self.text, self.started, self.group = text, started, group
+
+    async def fragment(self, input_header):
+        self.started.append(self.text)
+        while len(self.started) < self.group:
+            await asyncio.sleep(0)
+        return self.text
+
+
+class Recorder(AsyncHandlerChain):
+    """ records whether the chain reached it """
+    reached = False
+
+    async def fragment(self, input_header):
+        self.reached = True
+        return "!"
+
+
+class AsyncChainTest(unittest.IsolatedAsyncioTestCase):
+    """ async handlers must overlap, keep their order and stop on a TerminalResult """
+
+    async def test_bridge_matches_the_sync_chain(self):
+        head = AuthenticationHeader("123", ContentTypeHeader("json", BodyPayloadHandler("{}")))
+        for offload in (False, True):
+            bridged = SyncHandlerBridge.from_chain(head, offload=offload)
+            self.assertEqual(await bridged.add_header("GET"), head.add_header("GET"))
+
+    async def test_unknown_user_stops_the_chain(self):
+        async def lookup(user):
+            return {"john": "t"}.get(user)
+        tail = Recorder()
+        rejected = await AsyncAuthenticationHeader("mallory", lookup, tail).add_header("GET")
+        self.assertEqual(rejected, TerminalResult("401 Unauthorized: mallory"))
+        self.assertFalse(tail.reached)
+        self.assertEqual(await AsyncAuthenticationHeader("john", lookup, tail).add_header(""),
+                         "\nAuthorization: t!")
+        self.assertTrue(tail.reached)
+
+    async def test_concurrent_handlers_overlap_and_keep_order(self):
+        started = []
+        group = ConcurrentHandlers([Rendezvous(text, started, 3) for text in "abc"])
+        self.assertEqual(await asyncio.wait_for(group.add_header(">"), 1), ">abc")
+
+    async def test_first_terminal_result_in_declaration_order_wins(self):
+        class Reject(AsyncHandlerChain):
+            def __init__(self, reason):
+                super().__init__()
+                self.reason = reason
+
+            async def fragment(self, input_header):
+                return TerminalResult(self.reason)
+        tail = Recorder()
+        group = ConcurrentHandlers([Recorder(), Reject("first"), Reject("second")], tail)
+        self.assertEqual(await group.add_header(""), TerminalResult("first"))
+        self.assertFalse(tail.reached)
+
+    async def test_offload_runs_off_the_loop(self):
+        threads = []
+
+        class Blocking(ContentTypeHeader):
+            def fragment(self, input_header=""):
+                threads.append(threading.current_thread())
+                return super().fragment(input_header)
+        offloaded = SyncHandlerBridge(Blocking("json"), offload=True)
+        inline = SyncHandlerBridge(Blocking("json"))
+        threads.clear()  # the setters render the fragment once on construction
+        await offloaded.add_header("")
+        await inline.add_header("")
+        self.assertIsNot(threads[0], threading.main_thread())
+        self.assertIs(threads[1], threading.main_thread())
+
+
+if __name__ == "__main__":
+    unittest.main()
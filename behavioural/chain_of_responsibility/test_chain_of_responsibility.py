@@ -0,0 +1,105 @@
+""" Wire-format tests for the Chain Of Responsibility """
+
+import socket
+import threading
+import unittest
+from unittest import mock
+
+import chain_of_responsibility
+from chain_of_responsibility import (
+    AuthenticationHeader,
+    BodyPayloadHandler,
+    ContentTypeHeader,
+    send_fragments,
+)
+
+
+def build_chain(length: int):
+    """ alternating handlers, length of them """
+    head = None
+    for i in reversed(range(length)):
+        handler_type = (AuthenticationHeader, ContentTypeHeader, BodyPayloadHandler)[i % 3]
+        head = handler_type(f"value-{i}", head)
+    return head
+
+
+class SendFragmentsTest(unittest.TestCase):
+    """ send_fragments must write every byte, in order, over a real socket """
+
+    def setUp(self):
+        self.left, self.right = socket.socketpair()
+
+    def tearDown(self):
+        self.left.close()
+        self.right.close()
+
+    def roundtrip(self, fragments: list) -> bytes:
+        expected = sum(len(fragment) for fragment in fragments)
+        received = bytearray()
+
+        def read():
+            while len(received) < expected:
+                received.extend(self.right.recv(65536))
+        reader = threading.Thread(target=read)
+        reader.start()
+        sent = send_fragments(self.left, fragments)
+        reader.join()
+        self.assertEqual(sent, expected)
+        return bytes(received)
+
+    def test_chain_matches_add_header(self):
+        head = build_chain(30)
+        expected = head.add_header("GET /").encode()
+        self.assertEqual(self.roundtrip(head.encode_fragments(b"GET /")), expected)
+        self.assertEqual(self.roundtrip(head.compile().encode_fragments(b"GET /")), expected)
+        self.assertEqual(bytes(head.encode_into(bytearray(), b"GET /")), expected)
+
+    def test_more_buffers_than_iov_max(self):
+        fragments = [b"%d;" % i for i in range(5000)]
+        self.assertEqual(self.roundtrip(fragments), b"".join(fragments))
+
+    def test_calls_are_capped_at_iov_max(self):
+        fragments = [b"x"] * 10
+        with mock.patch.object(chain_of_responsibility, "IOV_MAX", 3):
+            sock = mock.Mock()
+            sock.sendmsg.side_effect = lambda views: sum(view.nbytes for view in views)
+            self.assertEqual(send_fragments(sock, fragments), 10)
+        self.assertEqual([len(call.args[0]) for call in sock.sendmsg.call_args_list],
+                         [3, 3, 3, 1])
+
+    def test_partial_writes_resume_mid_buffer(self):
+        written, limits = [], iter([2, 3, 100])
+
+        def sendmsg(views):
+            count = min(next(limits), sum(view.nbytes for view in views))
+            written.append(b"".join(bytes(view) for view in views)[:count])
+            return count
+        sock = mock.Mock()
+        sock.sendmsg.side_effect = sendmsg
+        self.assertEqual(send_fragments(sock, [b"abc", b"defg", b"h"]), 8)
+        self.assertEqual(written, [b"ab", b"cde", b"fgh"])
+
+
+class CachedFragmentTest(unittest.TestCase):
+    """ cached fragments must follow the attribute they are built from """
+
+    def test_changes_are_re_encoded(self):
+        head = AuthenticationHeader("old", ContentTypeHeader("xml", BodyPayloadHandler("a")))
+        head.token = "new"
+        head.next_header.content_type = "json"
+        head.next_header.next_header.body = "b"
+        self.assertEqual(b"".join(head.encode_fragments(b"GET")),
+                         head.add_header("GET").encode())
+
+    def test_cycle_is_detected(self):
+        head = build_chain(chain_of_responsibility.CYCLE_CHECK)
+        tail = head
+        while tail.next_header is not None:
+            tail = tail.next_header
+        tail.next_header = head
+        with self.assertRaises(ValueError):
+            head.encode_fragments(b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+""" Benchmarks for Command """
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+from command import Command, CommandProcessor
+from durable_command import DurableCommandProcessor
+from scheduled_command import ScheduledCommandProcessor
+
+
+class IOBoundCommand(Command):
+    """ Command that waits on I/O, e.g. a payment gateway call """
+    def execute(self):
+        time.sleep(0.0005)
+        return self.command_id
+
+
+class CPUBoundCommand(Command):
+    """ Command that burns CPU, e.g. pricing an order """
+    def execute(self):
+        return sum(i * i for i in range(2000))
+
+
+def bench_parallel_processor(commands: int = 4000, ids: int = 1000,
+                             workers=(1, 2, 4, 8)):
+    """ serial process_commands vs process_commands_parallel across worker counts """
+    for kind, use_processes in ((IOBoundCommand, False), (CPUBoundCommand, True)):
+        processor = CommandProcessor()
+        print(f"{kind.__name__}: {commands} commands over {ids} ids (commands/s)")
+        for command_id in range(commands):
+            processor.add_to_queue(kind(command_id % ids))
+        start = time.perf_counter()
+        processor.process_commands()
+        print(f"  {'serial':<16} {commands / (time.perf_counter() - start):10.0f}")
+        for pool in ("threads", "processes") if use_processes else ("threads",):
+            for count in workers:
+                for command_id in range(commands):
+                    processor.add_to_queue(kind(command_id % ids))
+                start = time.perf_counter()
+                results = processor.process_commands_parallel(
+                    max_workers=count, use_processes=pool == "processes"
+                )
+                elapsed = time.perf_counter() - start
+                assert all(result.ok for result in results)
+                print(f"  {f'{pool} x{count}':<16} {commands / elapsed:10.0f}")
+
+
+def bench_durable_log(appends: int = 20000, group_sizes=(1, 16, 256),
+                      replay_entries: int = 2_000_000):
+    """ appends/s per group-commit size and mmap replay time of a large log """
+    print(f"durable log: {appends} add_to_queue calls (appends/s)")
+    with tempfile.TemporaryDirectory() as directory:
+        for group_size in group_sizes:
+            path = os.path.join(directory, f"group-{group_size}.log")
+            processor = DurableCommandProcessor(path, group_size=group_size)
+            count = appends if group_size > 1 else appends // 20
+            start = time.perf_counter()
+            for command_id in range(count):
+                processor.add_to_queue(IOBoundCommand(command_id))
+            processor.commit()
+            elapsed = time.perf_counter() - start
+            processor.close()
+            print(f"  group_size={group_size:<5} {count / elapsed:10.0f}")
+
+        path = os.path.join(directory, "replay.log")
+        processor = DurableCommandProcessor(path, group_size=4096)
+        for command_id in range(replay_entries):
+            processor.add_to_queue(IOBoundCommand(command_id))
+        processor.close()
+        start = time.perf_counter()
+        replayed = DurableCommandProcessor(path)
+        elapsed = time.perf_counter() - start
+        assert len(replayed.queue) == replay_entries
+        replayed.close()
+        size = os.path.getsize(path) / 2 ** 20
+        print(f"  replay of {replay_entries} entries ({size:.0f} MiB): {elapsed:.2f} s"
+              f" ({replay_entries / elapsed:.0f} entries/s)")
+
+
+class TimedCommand(Command):
+    """ Command that records how long after the drain started it ran """
+    waits = {}
+    started = 0.0
+
+    def __init__(self, command_id: int, kind: str):
+        super().__init__(command_id)
+        self.kind = kind
+
+    def execute(self):
+        waited = time.perf_counter() - TimedCommand.started
+        self.waits.setdefault(self.kind, []).append(waited)
+        return sum(range(200))
+
+
+def bench_scheduling(bulk: int = 50000, urgent: int = 2000):
+    """ latency of urgent commands queued behind a bulk backlog, FIFO vs heap """
+    def percentile(values, fraction):
+        values = sorted(values)
+        return values[min(len(values) - 1, int(len(values) * fraction))] * 1e3
+
+    print(f"scheduling: {urgent} urgent among {bulk} bulk commands (ms after drain start)")
+    for label, processor in (
+        ("fifo", CommandProcessor()),
+        ("heap", ScheduledCommandProcessor()),
+    ):
+        TimedCommand.waits = {}
+        for command_id in range(bulk + urgent):
+            if command_id % (bulk // urgent + 1) == 0:
+                if label == "heap":
+                    processor.add_to_queue(TimedCommand(command_id, "urgent"), priority=0)
+                else:
+                    processor.add_to_queue(TimedCommand(command_id, "urgent"))
+            else:
+                processor.add_to_queue(TimedCommand(command_id, "bulk"))
+        TimedCommand.started = start = time.perf_counter()
+        processor.process_commands()
+        elapsed = time.perf_counter() - start
+        for kind, waits in sorted(TimedCommand.waits.items()):
+            print(f"  {label} {kind:<7} p50={percentile(waits, 0.5):8.2f}"
+                  f"  p99={percentile(waits, 0.99):8.2f}")
+        print(f"  {label} drain {elapsed:.2f} s")
+
+    processor = ScheduledCommandProcessor()
+    tickets = [processor.add_to_queue(IOBoundCommand(i)) for i in range(bulk)]
+    start = time.perf_counter()
+    for ticket in tickets[::2]:
+        processor.cancel(ticket)
+    print(f"  cancel {bulk // 2} tickets: {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+
+def bench_streaming_drain(cycles: int = 200, produced_per_cycle: int = 500,
+                          batch: int = 500):
+    """ bounded drain cycles while a producer keeps adding commands """
+    processor = CommandProcessor()
+    latencies, peak_depth = [], 0
+    tracemalloc.start()
+    for cycle in range(cycles):
+        for command_id in range(produced_per_cycle):
+            processor.add_to_queue(TimedCommand(cycle * produced_per_cycle + command_id, "bulk"))
+        peak_depth = max(peak_depth, len(processor.queue))
+        start = time.perf_counter()
+        for _ in processor.iter_drain(batch):
+            pass
+        latencies.append(time.perf_counter() - start)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    latencies.sort()
+    print(f"streaming drain: {cycles} cycles of {produced_per_cycle} produced / {batch} drained")
+    print(f"  peak queue depth {peak_depth}, peak traced memory {peak_memory / 1024:.0f} KiB")
+    print(f"  cycle latency p50={latencies[len(latencies) // 2] * 1e3:.2f} ms"
+          f"  max={latencies[-1] * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    bench_parallel_processor()
+    bench_durable_log()
+    bench_scheduling()
+    bench_streaming_drain()
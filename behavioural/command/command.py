@@ -1,6 +1,9 @@
 """ Command Design Pattern Implementation """
 
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
 
 
 class Command(ABC):
@@ -24,21 +27,170 @@ class OrderPayCommand(Command):
         print(f"Paying for order with id : {self.command_id}")
 
 
+class CommandSkipped(Exception):
+    """ Raised in place of a command whose earlier same-id command failed """
+
+
+@dataclass
+class CommandResult:
+    """ Outcome of one command; executed is False when it never ran """
+    command: Command
+    result: object = None
+    exception: BaseException = None
+    executed: bool = True
+
+    @property
+    def ok(self) -> bool:
+        """ True when the command ran without raising """
+        return self.exception is None
+
+
+def _run_groups(groups: list, stop_on_error: bool) -> list:
+    """
+    Execute groups of same-id commands, each group in submission order
+    Returns: list of (result, exception) lists, one per group
+    """
+    outcomes = []
+    for commands in groups:
+        group_outcomes, failed = [], None
+        for command in commands:
+            if failed is not None and stop_on_error:
+                group_outcomes.append((None, CommandSkipped(
+                    f"skipped after command {failed!r} failed"
+                )))
+                continue
+            try:
+                group_outcomes.append((command.execute(), None))
+            except Exception as exc:  # pylint: disable=broad-except
+                group_outcomes.append((None, exc))
+                failed = type(command).__name__
+        outcomes.append(group_outcomes)
+    return outcomes
+
+
 class CommandProcessor:
-    """ Command Processor to Process commands in queue """ 
+    """
+    Command Processor to Process commands in queue.
+    Sequential processing (process_commands, iter_drain, drain) stops at a
+    command that raises: the exception propagates and the command stays
+    at the head of the queue, so the next call retries it.
+    """
 
     def __init__(self):
-        self.queue = []
+        self.queue = deque()
 
     def add_to_queue(self, command: Command):
         """ add a new command to queue """
         self.queue.append(command)
 
     def process_commands(self):
-        """ Process all commands in queue """
-        for item in self.queue:
-            item.execute()
-        self.queue.clear()
+        """
+        Process all commands in queue, including ones enqueued while it runs.
+        A command that raises stays at the head of the queue.
+        """
+        while self.queue:
+            self.queue[0].execute()
+            self.queue.popleft()
+
+    def _next_command(self):
+        """ next command to run, or None when nothing is runnable """
+        return self.queue.popleft() if self.queue else None
+
+    def _requeue(self, command: Command):
+        """ put a command that raised back at the head of the queue """
+        self.queue.appendleft(command)
+
+    def iter_drain(self, max_commands: int = None):
+        """
+        Pop and execute commands one at a time, yielding a CommandResult as
+        each completes. Commands enqueued meanwhile join the tail and are
+        drained too, within the max_commands budget. A command that raises
+        is put back at the head and the exception ends the drain.
+        """
+        executed = 0
+        while max_commands is None or executed < max_commands:
+            command = self._next_command()
+            if command is None:
+                return
+            executed += 1
+            try:
+                result = command.execute()
+            except BaseException:
+                self._requeue(command)
+                raise
+            yield CommandResult(command, result)
+
+    def drain(self, max_commands: int) -> list:
+        """
+        Execute at most max_commands commands from the head of the queue,
+        raising like iter_drain when one of them fails
+        Returns: list[CommandResult]
+        """
+        return list(self.iter_drain(max_commands))
+
+    def process_commands_parallel(self, executor: Executor = None, max_workers: int = 4,
+                                  use_processes: bool = False,
+                                  stop_on_error: bool = True) -> list:
+        """
+        Process all commands in queue on a thread or process pool.
+        Commands sharing a command_id run in submission order on one worker,
+        different ids run in parallel. With stop_on_error the commands after
+        a failed one of the same id are skipped (CommandSkipped).
+        With processes, commands must be picklable and run on copies.
+        When a whole task fails (e.g. a command cannot be pickled or the
+        pool breaks) each of its commands gets that exception with
+        executed=False, so no queued command is dropped silently.
+        Args: executor: Executor (owned by caller), max_workers (also sizes
+              the batches sent to an external executor), use_processes
+        Returns: list[CommandResult] in submission order
+        """
+        queue, self.queue = list(self.queue), deque()
+        groups = {}
+        for position, command in enumerate(queue):
+            groups.setdefault(command.command_id, []).append(position)
+
+        keys = list(groups.values())
+        chunk = max(1, len(keys) // (max_workers * 4))
+        tasks = [keys[i:i + chunk] for i in range(0, len(keys), chunk)]
+
+        owned = executor is None
+        if owned:
+            pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            executor = pool(max_workers=max_workers)
+        try:
+            futures = []
+            for task in tasks:
+                try:
+                    futures.append(executor.submit(
+                        _run_groups,
+                        [[queue[position] for position in group] for group in task],
+                        stop_on_error,
+                    ))
+                except Exception as exc:  # pylint: disable=broad-except
+                    futures.append(exc)
+            results = [None] * len(queue)
+            for task, future in zip(tasks, futures):
+                try:
+                    if isinstance(future, Exception):
+                        raise future
+                    task_outcomes = future.result()
+                except Exception as exc:  # pylint: disable=broad-except
+                    for group in task:
+                        for position in group:
+                            results[position] = CommandResult(
+                                queue[position], exception=exc, executed=False
+                            )
+                    continue
+                for group, outcomes in zip(task, task_outcomes):
+                    for position, (result, exception) in zip(group, outcomes):
+                        results[position] = CommandResult(
+                            queue[position], result, exception,
+                            executed=not isinstance(exception, CommandSkipped),
+                        )
+        finally:
+            if owned:
+                executor.shutdown()
+        return results
 
 
 # Usage
@@ -49,3 +201,8 @@ if __name__ == "__main__":
     processor.add_to_queue(OrderPayCommand(1))
     processor.add_to_queue(OrderPayCommand(2))
     processor.process_commands()
+
+    processor.add_to_queue(OrderAddCommand(3))
+    processor.add_to_queue(OrderPayCommand(3))
+    for outcome in processor.process_commands_parallel(max_workers=2):
+        print(f"{type(outcome.command).__name__}({outcome.command.command_id}) ok={outcome.ok}")
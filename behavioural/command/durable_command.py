@@ -0,0 +1,215 @@
+""" Durable Command Processor backed by a write-ahead log """
+
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import zlib
+from collections import deque
+
+from command import Command, CommandProcessor, OrderAddCommand, OrderPayCommand
+
+# length and crc32 of the pickled command that follows
+RECORD_HEADER = struct.Struct("<II")
+CHECKPOINT = struct.Struct("<Q")
+
+
+class CommandLog:
+    """
+    Append-only, length-prefixed log of pickled commands.
+    Appends are buffered and made durable by commit(): one write and one
+    fsync cover the whole group. A checkpoint file records the offset up
+    to which commands were processed.
+    """
+    def __init__(self, path: str, group_size: int = 64):
+        self.path = path
+        self.checkpoint_path = f"{path}.checkpoint"
+        self.group_size = group_size
+        self._pending = bytearray()
+        self._pending_count = 0
+        self._file = open(path, "ab")  # pylint: disable=consider-using-with
+        self.end = self._file.seek(0, os.SEEK_END)
+
+    def append(self, command: Command) -> int:
+        """
+        Buffer a command, committing when the group is full
+        Returns: offset just past the record
+        """
+        payload = pickle.dumps(command, protocol=pickle.HIGHEST_PROTOCOL)
+        self._pending += RECORD_HEADER.pack(len(payload), zlib.crc32(payload))
+        self._pending += payload
+        self._pending_count += 1
+        offset = self.end + len(self._pending)
+        if self._pending_count >= self.group_size:
+            self.commit()
+        return offset
+
+    def commit(self):
+        """ write and fsync every pending record at once """
+        if not self._pending:
+            return
+        self._file.write(self._pending)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.end += len(self._pending)
+        self._pending.clear()
+        self._pending_count = 0
+
+    def read_checkpoint(self) -> int:
+        """ offset of the first unprocessed record """
+        try:
+            with open(self.checkpoint_path, "rb") as file:
+                return CHECKPOINT.unpack(file.read(CHECKPOINT.size))[0]
+        except (FileNotFoundError, struct.error):
+            return 0
+
+    def checkpoint(self, offset: int):
+        """ atomically record that everything before offset was processed """
+        self._write_checkpoint(offset)
+        if offset == self.end and offset and not self._pending:
+            self._truncate()
+
+    def _write_checkpoint(self, offset: int):
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(CHECKPOINT.pack(offset))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _truncate(self):
+        """ drop a fully processed log; a stale checkpoint past the end reads as 0 """
+        self._file.truncate(0)
+        os.fsync(self._file.fileno())
+        self.end = 0
+        self._write_checkpoint(0)
+
+    def replay(self):
+        """
+        Yield (command, end_offset) for every record after the checkpoint,
+        reading the log through mmap. A torn or corrupt tail is cut off.
+        """
+        start = self.read_checkpoint()
+        if start >= self.end:
+            if start:
+                self.checkpoint(self.end)
+            return
+        with open(self.path, "rb") as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            offset, size = start, len(view)
+            while offset + RECORD_HEADER.size <= size:
+                length, crc = RECORD_HEADER.unpack_from(view, offset)
+                begin = offset + RECORD_HEADER.size
+                payload = view[begin:begin + length]
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                offset = begin + length
+                yield pickle.loads(payload), offset
+        if offset < self.end:
+            self._file.truncate(offset)
+            self.end = offset
+
+    def close(self):
+        """ commit pending records and close the log """
+        self.commit()
+        self._file.close()
+
+
+class DurableCommandProcessor(CommandProcessor):
+    """
+    CommandProcessor whose queue survives a crash.
+    Unprocessed commands from the log are replayed into the queue at startup.
+    A command is durable once its group is committed; process_commands
+    commits before executing anything and checkpoints what it executed.
+    """
+    def __init__(self, path: str, group_size: int = 64):
+        super().__init__()
+        self.log = CommandLog(path, group_size)
+        self._offsets = deque()
+        for command, offset in self.log.replay():
+            self.queue.append(command)
+            self._offsets.append(offset)
+
+    def add_to_queue(self, command: Command):
+        """ log the command, then add it to the queue """
+        self._offsets.append(self.log.append(command))
+        self.queue.append(command)
+
+    def commit(self):
+        """ make every queued command durable """
+        self.log.commit()
+
+    def process_commands(self):
+        """ Process all commands in queue, checkpointing the executed ones """
+        self.log.commit()
+        last = None
+        try:
+            while self.queue:
+                self.queue[0].execute()
+                self.queue.popleft()
+                last = self._offsets.popleft()
+        finally:
+            if last is not None:
+                self.log.checkpoint(last)
+
+    def iter_drain(self, max_commands: int = None):
+        """ drain like CommandProcessor, checkpointing when the drain ends """
+        self.log.commit()
+        last = None
+        try:
+            for result in super().iter_drain(max_commands):
+                last = self._offsets.popleft()
+                yield result
+        finally:
+            if last is not None:
+                self.log.checkpoint(last)
+
+    def process_commands_parallel(self, executor=None, max_workers: int = 4,
+                                  use_processes: bool = False,
+                                  stop_on_error: bool = True) -> list:
+        """
+        Process the queue like CommandProcessor.process_commands_parallel.
+        Commands that never ran (skipped or failed task) go back to the head
+        of the queue, and the checkpoint covers the executed prefix. Commands
+        executed after the first one that did not run can run again after a
+        restart, the log only records a prefix.
+        """
+        self.log.commit()
+        offsets, self._offsets = list(self._offsets), deque()
+        results = super().process_commands_parallel(executor, max_workers,
+                                                    use_processes, stop_on_error)
+        pending = [position for position, outcome in enumerate(results)
+                   if not outcome.executed]
+        for position in reversed(pending):
+            self.queue.appendleft(results[position].command)
+            self._offsets.appendleft(offsets[position])
+        executed = pending[0] if pending else len(results)
+        if executed:
+            self.log.checkpoint(offsets[executed - 1])
+        return results
+
+    def close(self):
+        """ commit and close the log """
+        self.log.close()
+
+
+# Usage
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        LOG_PATH = os.path.join(directory, "orders.log")
+
+        processor = DurableCommandProcessor(LOG_PATH)
+        processor.add_to_queue(OrderAddCommand(1))
+        processor.add_to_queue(OrderPayCommand(1))
+        processor.commit()
+        processor.close()  # simulated crash before processing
+
+        recovered = DurableCommandProcessor(LOG_PATH)
+        print(f"Replayed {len(recovered.queue)} commands")
+        recovered.process_commands()
+        recovered.close()
+
+        restarted = DurableCommandProcessor(LOG_PATH)
+        print(f"Left after restart: {len(restarted.queue)}")
+        restarted.close()
@@ -0,0 +1,263 @@
+""" Priority and deadline scheduling for the Command Processor """
+
+import heapq
+import itertools
+import time
+from collections import defaultdict, deque
+
+from command import Command, CommandProcessor, OrderAddCommand, OrderPayCommand
+
+
+class RateLimit:
+    """ Token bucket: `rate` commands per second with bursts up to `burst` """
+    def __init__(self, rate: float, burst: int = 1, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """ take a token if one is available """
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """ seconds until the next token """
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+
+class ScheduledCommandProcessor(CommandProcessor):
+    """
+    CommandProcessor backed by a heap instead of a FIFO list.
+    Commands run by priority (lower runs first), then earliest deadline,
+    then submission order. Cancelled entries are dropped lazily when they
+    reach the top of the heap, so cancel is O(1) per command.
+    A rate-limited type without tokens is parked in its own heap, and only
+    its best entry is released back into the main heap when a token is
+    due, so throttled commands are not rescanned on every pop.
+    Expired commands are counted in expired_count, the latest EXPIRED_KEPT
+    are kept in `expired` and each is passed to on_expired if given.
+    Args: priorities: {command type: priority}, rate_limits: {command type: RateLimit},
+          on_expired: callable(command)
+    """
+    DEFAULT_PRIORITY = 10
+    WAIT_SAMPLES = 10000
+    EXPIRED_KEPT = 1000
+
+    def __init__(self, priorities: dict = None, rate_limits: dict = None,
+                 clock=time.monotonic, on_expired=None):
+        super().__init__()
+        self.priorities = dict(priorities or {})
+        self.rate_limits = dict(rate_limits or {})
+        self.clock = clock
+        self.queue = []
+        self._entries = {}
+        self._by_id = defaultdict(set)
+        self._counter = itertools.count()
+        self._depth = defaultdict(int)
+        self._waits = defaultdict(lambda: deque(maxlen=self.WAIT_SAMPLES))
+        self.expired = deque(maxlen=self.EXPIRED_KEPT)
+        self.expired_count = 0
+        self.on_expired = on_expired
+        self._parked = {}
+        self._wakeups = []
+        self._waking = set()
+        self._popped = None
+
+    def add_to_queue(self, command: Command, priority: int = None,
+                     deadline: float = None) -> int:
+        """
+        add a command to the heap
+        Args: priority (defaults to the type's priority), deadline: clock() time
+        Returns: ticket to cancel this command
+        """
+        if priority is None:
+            priority = self.priorities.get(type(command), self.DEFAULT_PRIORITY)
+        ticket = next(self._counter)
+        sort_deadline = float("inf") if deadline is None else deadline
+        entry = [priority, sort_deadline, ticket, command, self.clock(), deadline,
+                 type(command)]
+        self._entries[ticket] = entry
+        self._by_id[command.command_id].add(ticket)
+        self._depth[priority] += 1
+        heapq.heappush(self._parked.get(type(command), self.queue), entry)
+        return ticket
+
+    def cancel(self, ticket: int) -> bool:
+        """ cancel one queued command by ticket """
+        entry = self._entries.pop(ticket, None)
+        if entry is None:
+            return False
+        self._forget(entry)
+        entry[3] = None
+        return True
+
+    def cancel_id(self, command_id: int) -> int:
+        """ cancel every queued command with this command_id """
+        tickets = list(self._by_id.get(command_id, ()))
+        return sum(self.cancel(ticket) for ticket in tickets)
+
+    def _forget(self, entry: list):
+        priority, _, ticket, command = entry[:4]
+        self._depth[priority] -= 1
+        tickets = self._by_id[command.command_id]
+        tickets.discard(ticket)
+        if not tickets:
+            del self._by_id[command.command_id]
+
+    def _schedule(self, kind: type):
+        """ release the best parked entry of kind once its limit has a token """
+        if kind in self._parked and kind not in self._waking:
+            self._waking.add(kind)
+            due = self.clock() + self.rate_limits[kind].wait_time()
+            heapq.heappush(self._wakeups, (due, next(self._counter), kind))
+
+    def _unpark(self):
+        now = self.clock()
+        while self._wakeups and self._wakeups[0][0] <= now:
+            kind = heapq.heappop(self._wakeups)[2]
+            self._waking.discard(kind)
+            parked = self._parked[kind]
+            while parked and parked[0][3] is None:
+                heapq.heappop(parked)
+            if parked:
+                heapq.heappush(self.queue, heapq.heappop(parked))
+            if not parked:
+                del self._parked[kind]
+
+    def pop_command(self):
+        """
+        Pop the most urgent live command that is not rate limited
+        Returns: Command or None
+        """
+        if self._wakeups:
+            self._unpark()
+        while self.queue:
+            entry = heapq.heappop(self.queue)
+            command, kind = entry[3], entry[6]
+            limit = self.rate_limits.get(kind)
+            if command is None:
+                if limit is not None:
+                    self._schedule(kind)
+                    self._unpark()
+                continue
+            now = self.clock()
+            deadline = entry[5]
+            if deadline is not None and now > deadline:
+                # checked before the rate limit, an expired command takes no token
+                del self._entries[entry[2]]
+                self._forget(entry)
+                if limit is not None:
+                    self._schedule(kind)
+                    self._unpark()
+                self._expire(command)
+                continue
+            if limit is not None:
+                if not limit.try_acquire():
+                    heapq.heappush(self._parked.setdefault(kind, []), entry)
+                    self._schedule(kind)
+                    continue
+                self._schedule(kind)
+            del self._entries[entry[2]]
+            self._forget(entry)
+            self._waits[entry[0]].append(now - entry[4])
+            self._popped = entry
+            return command
+        return None
+
+    def _expire(self, command: Command):
+        self.expired_count += 1
+        self.expired.append(command)
+        if self.on_expired is not None:
+            self.on_expired(command)
+
+    def _next_command(self):
+        return self.pop_command()
+
+    def _requeue(self, command: Command):
+        """ push the entry of a command that raised back onto the heap, ticket kept """
+        entry = self._popped
+        if entry is None or entry[3] is not command:
+            raise ValueError("only the last popped command can be requeued")
+        self._popped = None
+        self._entries[entry[2]] = entry
+        self._by_id[command.command_id].add(entry[2])
+        self._depth[entry[0]] += 1
+        self._waits[entry[0]].pop()
+        heapq.heappush(self.queue, entry)
+
+    def process_commands(self, wait: bool = True):
+        """
+        Process queued commands in priority order. Commands past their
+        deadline are skipped into `expired`. With wait, sleep out rate
+        limits until the heap is empty; otherwise return when only
+        rate-limited commands are left. A command that raises goes back on
+        the heap and the exception propagates.
+        """
+        while self._entries:
+            command = self.pop_command()
+            if command is not None:
+                try:
+                    command.execute()
+                except BaseException:
+                    self._requeue(command)
+                    raise
+            elif not wait:
+                return
+            elif self._entries:
+                due = self._wakeups[0][0] - self.clock() if self._wakeups else 0.001
+                time.sleep(max(0.0, due))
+        self.queue.clear()
+        self._parked.clear()
+        self._wakeups.clear()
+        self._waking.clear()
+
+    def process_commands_parallel(self, *args, **kwargs):
+        """ drain runnable commands in priority order, then run them on a pool """
+        ready = []
+        while (command := self.pop_command()) is not None:
+            ready.append(command)
+        pending, self.queue = self.queue, ready
+        try:
+            return super().process_commands_parallel(*args, **kwargs)
+        finally:
+            self.queue = pending
+
+    def metrics(self) -> dict:
+        """
+        Queue depth and wait-time percentiles (seconds) per priority class
+        Returns: {priority: {"depth", "executed", "p50", "p99", "max"}}
+        """
+        report = {}
+        for priority in sorted(set(self._depth) | set(self._waits)):
+            waits = sorted(self._waits.get(priority, ()))
+            stats = {"depth": self._depth.get(priority, 0), "executed": len(waits)}
+            if waits:
+                stats["p50"] = waits[len(waits) // 2]
+                stats["p99"] = waits[min(len(waits) - 1, int(len(waits) * 0.99))]
+                stats["max"] = waits[-1]
+            report[priority] = stats
+        return report
+
+
+# Usage
+if __name__ == "__main__":
+    processor = ScheduledCommandProcessor(priorities={OrderPayCommand: 0})
+    processor.add_to_queue(OrderAddCommand(1))
+    processor.add_to_queue(OrderAddCommand(2))
+    processor.add_to_queue(OrderPayCommand(1))
+    processor.add_to_queue(OrderPayCommand(2))
+    processor.add_to_queue(OrderAddCommand(3))
+    processor.cancel_id(3)
+    processor.process_commands()
+    print(processor.metrics())
@@ -0,0 +1,157 @@
+""" Failure contract and parallel processing tests for the Command Processors """
+
+import os
+import tempfile
+import threading
+import unittest
+
+from command import Command, CommandProcessor, CommandSkipped
+from durable_command import DurableCommandProcessor
+from scheduled_command import ScheduledCommandProcessor
+
+
+class RecordingCommand(Command):
+    """ command appending its id to a shared log, raising while `failures` is left """
+    log = []
+
+    def __init__(self, command_id: int, failures: int = 0):
+        super().__init__(command_id)
+        self.failures = failures
+
+    def execute(self):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError(f"command {self.command_id} failed")
+        RecordingCommand.log.append(self.command_id)
+
+
+class FailureContractTest(unittest.TestCase):
+    """
+    Every sequential path re-raises and keeps the failed command queued,
+    so the next call retries it before the commands behind it
+    """
+
+    def setUp(self):
+        RecordingCommand.log = []
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.directory.name, "orders.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def processors(self):
+        yield CommandProcessor()
+        yield ScheduledCommandProcessor()
+        durable = DurableCommandProcessor(self.path)
+        yield durable
+        durable.close()
+        os.remove(self.path)
+
+    @staticmethod
+    def fill(processor):
+        for command in (RecordingCommand(1), RecordingCommand(2, failures=1),
+                        RecordingCommand(3)):
+            processor.add_to_queue(command)
+
+    def check_retry(self, processor, run):
+        RecordingCommand.log = []
+        self.fill(processor)
+        with self.assertRaises(RuntimeError):
+            run(processor)
+        self.assertEqual(RecordingCommand.log, [1])
+        self.assertEqual(len(processor._entries if isinstance(  # pylint: disable=protected-access
+            processor, ScheduledCommandProcessor) else processor.queue), 2)
+        run(processor)
+        self.assertEqual(RecordingCommand.log, [1, 2, 3])
+
+    def test_process_commands(self):
+        for processor in self.processors():
+            with self.subTest(type(processor).__name__):
+                self.check_retry(processor, lambda processor: processor.process_commands())
+
+    def test_iter_drain(self):
+        for processor in self.processors():
+            with self.subTest(type(processor).__name__):
+                self.check_retry(processor, lambda processor: list(processor.iter_drain()))
+
+    def test_durable_replays_the_failed_command(self):
+        processor = DurableCommandProcessor(self.path)
+        self.fill(processor)
+        with self.assertRaises(RuntimeError):
+            processor.drain(3)
+        processor.close()
+
+        reopened = DurableCommandProcessor(self.path)
+        self.assertEqual([command.command_id for command in reopened.queue], [2, 3])
+        reopened.close()
+
+    def test_scheduled_keeps_ticket_and_metrics(self):
+        processor = ScheduledCommandProcessor()
+        self.fill(processor)
+        ticket = processor.add_to_queue(RecordingCommand(4))
+        with self.assertRaises(RuntimeError):
+            processor.process_commands()
+        self.assertEqual(processor.metrics()[processor.DEFAULT_PRIORITY]["executed"], 1)
+        self.assertTrue(processor.cancel(ticket))
+        processor.process_commands()
+        self.assertEqual(RecordingCommand.log, [1, 2, 3])
+
+
+class BarrierCommand(RecordingCommand):
+    """ waits until `parties` commands are running at the same time """
+    barrier = None
+
+    def execute(self):
+        BarrierCommand.barrier.wait()
+        super().execute()
+
+
+class Unpicklable(RecordingCommand):
+    """ cannot be sent to a process pool """
+    def __init__(self, command_id: int):
+        super().__init__(command_id)
+        self.callback = lambda: None
+
+
+class ParallelProcessingTest(unittest.TestCase):
+    """ ids run in parallel, commands of one id in submission order """
+
+    def setUp(self):
+        RecordingCommand.log = []
+
+    def test_different_ids_overlap(self):
+        BarrierCommand.barrier = threading.Barrier(2, timeout=5)
+        processor = CommandProcessor()
+        processor.add_to_queue(BarrierCommand(1))
+        processor.add_to_queue(BarrierCommand(2))
+        results = processor.process_commands_parallel(max_workers=2)
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(sorted(RecordingCommand.log), [1, 2])
+
+    def test_same_id_keeps_order_and_stops_on_error(self):
+        processor = CommandProcessor()
+        commands = [RecordingCommand(1), RecordingCommand(2), RecordingCommand(1, failures=1),
+                    RecordingCommand(2), RecordingCommand(1)]
+        for command in commands:
+            processor.add_to_queue(command)
+        results = processor.process_commands_parallel(max_workers=2)
+        self.assertEqual([result.command for result in results], commands)
+        self.assertEqual([result.ok for result in results], [True, True, False, True, False])
+        self.assertIsInstance(results[2].exception, RuntimeError)
+        self.assertIsInstance(results[4].exception, CommandSkipped)
+        self.assertFalse(results[4].executed)
+        self.assertEqual([command_id for command_id in RecordingCommand.log if command_id == 2],
+                         [2, 2])
+        self.assertEqual(len(processor.queue), 0)
+
+    def test_unpicklable_commands_are_reported(self):
+        processor = CommandProcessor()
+        processor.add_to_queue(Unpicklable(1))
+        results = processor.process_commands_parallel(max_workers=1, use_processes=True)
+        self.assertEqual(len(results), 1)
+        self.assertFalse(results[0].executed)
+        self.assertIsNotNone(results[0].exception)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+""" Replay tests for the durable Command Processor """
+
+import os
+import tempfile
+import unittest
+
+from command import OrderAddCommand, OrderPayCommand
+from durable_command import DurableCommandProcessor
+
+
+class FailingCommand(OrderAddCommand):
+    """ command whose execution raises """
+    def execute(self):
+        raise RuntimeError(f"order {self.command_id} failed")
+
+
+class DurableParallelTest(unittest.TestCase):
+    """ process_commands_parallel must checkpoint what it executed """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.directory.name, "orders.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_executed_commands_are_not_replayed(self):
+        processor = DurableCommandProcessor(self.path)
+        processor.add_to_queue(OrderAddCommand(1))
+        processor.add_to_queue(OrderPayCommand(1))
+        results = processor.process_commands_parallel(max_workers=2)
+        processor.close()
+        self.assertTrue(all(result.ok for result in results))
+
+        reopened = DurableCommandProcessor(self.path)
+        self.assertEqual(len(reopened.queue), 0)
+        reopened.close()
+
+    def test_commands_that_never_ran_are_replayed(self):
+        processor = DurableCommandProcessor(self.path)
+        processor.add_to_queue(OrderAddCommand(1))
+        processor.add_to_queue(FailingCommand(2))
+        processor.add_to_queue(OrderPayCommand(2))
+        results = processor.process_commands_parallel(max_workers=2)
+        self.assertEqual([result.executed for result in results], [True, True, False])
+        # the failed command counts as processed, the skipped one is kept
+        self.assertEqual([type(command) for command in processor.queue], [OrderPayCommand])
+        self.assertEqual(len(processor._offsets), 1)  # pylint: disable=protected-access
+        processor.close()
+
+        reopened = DurableCommandProcessor(self.path)
+        self.assertEqual([type(command) for command in reopened.queue], [OrderPayCommand])
+        reopened.process_commands()
+        reopened.close()
+
+        restarted = DurableCommandProcessor(self.path)
+        self.assertEqual(len(restarted.queue), 0)
+        restarted.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+""" Scheduling tests for the Command Processor """
+
+import unittest
+
+from command import Command
+from scheduled_command import RateLimit, ScheduledCommandProcessor
+
+
+class NoopCommand(Command):
+    """ command doing nothing """
+    def execute(self):
+        pass
+
+
+class ThrottledCommand(NoopCommand):
+    """ command type under a rate limit """
+
+
+class FakeClock:
+    """ clock advanced by hand """
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ScheduledTest(unittest.TestCase):
+    """ deadlines, rate limits and parking """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limit = RateLimit(1, burst=1, clock=self.clock)
+        self.seen = []
+        self.processor = ScheduledCommandProcessor(
+            priorities={ThrottledCommand: 0}, rate_limits={ThrottledCommand: self.limit},
+            clock=self.clock, on_expired=self.seen.append,
+        )
+
+    def test_expired_commands_take_no_token(self):
+        self.processor.add_to_queue(ThrottledCommand(1), deadline=-1.0)
+        self.processor.add_to_queue(ThrottledCommand(2))
+        self.assertEqual(self.processor.pop_command().command_id, 2)
+        self.assertEqual(self.processor.expired_count, 1)
+        self.assertEqual([command.command_id for command in self.seen], [1])
+
+    def test_expired_history_is_bounded(self):
+        kept = self.processor.EXPIRED_KEPT
+        for i in range(kept + 10):
+            self.processor.add_to_queue(NoopCommand(i), deadline=-1.0)
+        self.processor.process_commands(wait=False)
+        self.assertEqual(self.processor.expired_count, kept + 10)
+        self.assertEqual(len(self.processor.expired), kept)
+        self.assertEqual(self.processor.expired[-1].command_id, kept + 9)
+
+    def test_throttled_commands_are_parked_in_order(self):
+        for i in range(3):
+            self.processor.add_to_queue(ThrottledCommand(i))
+        self.processor.add_to_queue(NoopCommand(10))
+        order = [self.processor.pop_command().command_id,
+                 self.processor.pop_command().command_id]
+        self.assertIsNone(self.processor.pop_command())
+        self.assertEqual(order, [0, 10])
+        for _ in range(2):
+            self.clock.now += 1.0
+            order.append(self.processor.pop_command().command_id)
+        self.assertEqual(order, [0, 10, 1, 2])
+
+    def test_expired_parked_head_releases_the_next(self):
+        self.processor.add_to_queue(ThrottledCommand(0), deadline=0.5)
+        self.processor.add_to_queue(ThrottledCommand(1), deadline=0.6)
+        self.processor.add_to_queue(ThrottledCommand(2))
+        self.assertEqual(self.processor.pop_command().command_id, 0)
+        self.assertIsNone(self.processor.pop_command())
+        self.clock.now = 1.0
+        self.assertEqual(self.processor.pop_command().command_id, 2)
+        self.assertEqual(self.processor.expired_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+""" Benchmarks for Interpreter """
+
+import random
+import sys
+import time
+import timeit
+
+import interpreter
+from expression_factory import ExpressionFactory, count_nodes, evaluate, postorder
+from expression_vm import Program
+from interpreter import Add, Multiply, Number, Variable, parse
+
+
+def random_formula(terms: int, seed: int = 1) -> str:
+    """ random formula with mixed operators and some parentheses """
+    rng = random.Random(seed)
+    parts = [str(rng.randint(1, 99))]
+    for _ in range(terms - 1):
+        operand = str(rng.randint(1, 99))
+        if rng.random() < 0.2:
+            operand = f"({operand} {rng.choice('+-*')} {rng.randint(1, 99)})"
+        parts.append(f"{rng.choice('+-*/')} {operand}")
+    return " ".join(parts)
+
+
+def bench_compiled(term_counts=(5, 50, 300), number=20000):
+    """
+    tree-walking interpret() vs compile()d callable; constant-only
+    formulas are also folded by the CPython compiler
+    """
+    print("interpret vs compile (us per evaluation)")
+    for terms in term_counts:
+        expression = parse(random_formula(terms))
+        evaluate = expression.compile()
+        assert evaluate() == expression.interpret()
+        walk = timeit.timeit(expression.interpret, number=number)
+        flat = timeit.timeit(evaluate, number=number)
+        build = timeit.timeit(expression.compile, number=20)
+        print(f"  terms={terms:<5} tree={walk / number * 1e6:8.2f}"
+              f"  compiled={flat / number * 1e6:6.3f}"
+              f"  (compile once: {build / 20 * 1e3:.2f} ms)")
+
+
+def bench_batch(rows: int = 200_000):
+    """ per-row interpret() vs interpret_batch() over columns """
+    formula = parse("base * (1 + tax) - discount / quantity + fee * 2")
+    rng = random.Random(2)
+    bindings = {
+        "base": [rng.uniform(1, 500) for _ in range(rows)],
+        "tax": 0.2,
+        "discount": [rng.uniform(0, 50) for _ in range(rows)],
+        "quantity": [rng.randint(0, 10) for _ in range(rows)],
+        "fee": [rng.uniform(0, 5) for _ in range(rows)],
+    }
+    print(f"batch evaluation over {rows} rows (s)")
+    start = time.perf_counter()
+    for i in range(rows):
+        row = {name: column if isinstance(column, float) else column[i]
+               for name, column in bindings.items()}
+        if row["quantity"]:
+            formula.interpret(row)
+    print(f"  per-row interpret      {time.perf_counter() - start:8.3f}")
+
+    numpy = interpreter.np
+    try:
+        interpreter.np = None
+        start = time.perf_counter()
+        formula.interpret_batch(bindings)
+        print(f"  interpret_batch python {time.perf_counter() - start:8.3f}")
+    finally:
+        interpreter.np = numpy
+    if numpy is not None:
+        columns = {name: numpy.asarray(column) for name, column in bindings.items()}
+        start = time.perf_counter()
+        formula.interpret_batch(columns)
+        print(f"  interpret_batch numpy  {time.perf_counter() - start:8.3f}")
+    else:
+        print("  interpret_batch numpy  (numpy not installed)")
+
+
+def bench_interning(depth: int = 8, number: int = 2000):
+    """ node count and evaluation time of a formula with repeated subexpressions """
+    formula = "(a * b + c / 2)"
+    for level in range(depth):
+        formula = f"({formula} * {formula} - {level} * (2 + 3))"
+    context = {"a": 1.5, "b": 0.5, "c": 3.0}
+    tree = parse(formula)
+    factory = ExpressionFactory()
+    dag = factory.parse(formula)
+    compiled_dag = factory.compile(formula)
+    tree_compiled = tree.compile()
+    assert evaluate(dag, context) == tree.interpret(context) == compiled_dag(**context)
+
+    print(f"interning: formula of {len(formula)} chars")
+    print(f"  nodes: tree={count_nodes(tree, unique=False)}  dag={count_nodes(dag)}")
+    for label, run in (
+        ("tree interpret", lambda: tree.interpret(context)),
+        ("tree compile()", lambda: tree_compiled(**context)),
+        ("dag evaluate", lambda: evaluate(dag, context)),
+        ("dag compiled", lambda: compiled_dag(**context)),
+    ):
+        elapsed = timeit.timeit(run, number=number)
+        print(f"  {label:<15} {elapsed / number * 1e6:10.2f} us")
+
+    parse_time = timeit.timeit(lambda: ExpressionFactory().compile(formula), number=20) / 20
+    cached_time = timeit.timeit(lambda: factory.compile(formula), number=number) / number
+    print(f"  parse+compile {parse_time * 1e6:10.2f} us, LRU hit {cached_time * 1e6:.2f} us")
+
+
+def _left_fold(terms: int):
+    expression = Number(0)
+    for i in range(1, terms):
+        expression = Add(expression, Multiply(Variable("x"), Number(i % 7)))
+    return expression
+
+
+def _tree_nbytes(expression) -> int:
+    return sum(sys.getsizeof(node) + sys.getsizeof(node.__dict__)
+               for node in postorder(expression, unique=False))
+
+
+def bench_vm(term_counts=(200, 800, 1_000_000)):
+    """ recursive interpret() vs postfix Program on left-folded chains """
+    print("stack VM vs recursive interpret (per node)")
+    context = {"x": 2.0}
+    for terms in term_counts:
+        expression = _left_fold(terms)
+        start = time.perf_counter()
+        program = Program.lower(expression)
+        lower = time.perf_counter() - start
+        nodes = len(program)
+        start = time.perf_counter()
+        result = program.run(context)
+        vm = time.perf_counter() - start
+        line = (f"  nodes={nodes:<8} vm={vm / nodes * 1e9:6.0f} ns"
+                f"  lower={lower / nodes * 1e9:6.0f} ns"
+                f"  program={program.nbytes() / nodes:4.1f} B")
+        if terms + 100 < sys.getrecursionlimit():
+            start = time.perf_counter()
+            assert expression.interpret(context) == result
+            walk = time.perf_counter() - start
+            line += (f"  recursive={walk / nodes * 1e9:6.0f} ns"
+                     f"  tree={_tree_nbytes(expression) / nodes:5.1f} B")
+        else:
+            line += "  recursive: exceeds the recursion limit"
+        print(line)
+
+
+if __name__ == "__main__":
+    bench_compiled()
+    bench_batch()
+    bench_interning()
+    bench_vm()
@@ -0,0 +1,141 @@
+""" Hash-consing Expression Factory for the Interpreter """
+
+import weakref
+from collections import OrderedDict
+from operator import add, mul, sub, truediv
+
+from interpreter import (
+    AbstractExpression,
+    AlgebraExpression,
+    Number,
+    Variable,
+    parse,
+    postorder,
+)
+
+OPERATIONS = {"+": add, "-": sub, "*": mul, "/": truediv}
+
+
+def count_nodes(expression: AbstractExpression, unique: bool = True) -> int:
+    """ number of nodes in the DAG (unique) or in the equivalent tree """
+    return len(postorder(expression, unique))
+
+
+def evaluate(expression: AbstractExpression, context: dict = None) -> float:
+    """ evaluate once, computing every shared subexpression a single time """
+    values = {}
+    for node in postorder(expression):
+        if isinstance(node, AlgebraExpression):
+            operation = OPERATIONS[node.operator]
+            values[id(node)] = operation(values[id(node.left)], values[id(node.right)])
+        else:
+            values[id(node)] = node.interpret(context)
+    return values[id(expression)]
+
+
+class ExpressionFactory:
+    """
+    Flyweight factory interning structurally equal expression nodes into a
+    DAG, folding constant-only subtrees at build time, and caching the
+    compiled form of recently used source texts in a bounded LRU.
+    The intern table holds nodes weakly: a node stays interned while any
+    expression built from it is alive and drops out when the last one is
+    released. Operation keys use the ids of their children, which is safe
+    because a parent keeps its children alive for as long as its own entry
+    exists. Compiled callables do not reference the nodes.
+    """
+    def __init__(self, cache_size: int = 256, fold_constants: bool = True):
+        self.cache_size = cache_size
+        self.fold_constants = fold_constants
+        self._nodes = weakref.WeakValueDictionary()
+        self._compiled = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def number(self, value) -> Number:
+        """ interned Number """
+        value = float(value)
+        return self._interned((Number, repr(value)), Number, value)
+
+    def variable(self, name: str) -> Variable:
+        """ interned Variable """
+        return self._interned((Variable, name), Variable, name)
+
+    def binary(self, node_type: type, left: AbstractExpression,
+               right: AbstractExpression) -> AbstractExpression:
+        """ interned operation on interned children, folded when both are numbers """
+        if self.fold_constants and isinstance(left, Number) and isinstance(right, Number):
+            try:
+                return self.number(node_type(left, right).interpret())
+            except ZeroDivisionError:
+                pass  # keep it, so the error is raised on evaluation as before
+        return self._interned((node_type, id(left), id(right)), node_type, left, right)
+
+    def _interned(self, key: tuple, node_type: type, *args) -> AbstractExpression:
+        # keep a strong reference until the caller has it, the table alone would not
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._nodes[key] = node_type(*args)
+        return node
+
+    def intern(self, expression: AbstractExpression) -> AbstractExpression:
+        """ rebuild any expression tree as an interned DAG """
+        built = {}
+        for node in postorder(expression):
+            if isinstance(node, AlgebraExpression):
+                built[id(node)] = self.binary(
+                    type(node), built[id(node.left)], built[id(node.right)]
+                )
+            elif isinstance(node, Variable):
+                built[id(node)] = self.variable(node.name)
+            else:
+                built[id(node)] = self.number(node.value)
+        return built[id(expression)]
+
+    def parse(self, text: str) -> AbstractExpression:
+        """ parse text into an interned DAG """
+        return self.intern(parse(text))
+
+    def compile(self, text: str):
+        """
+        Compiled callable for source text, served from the LRU cache when the
+        same formula was seen recently
+        Returns: callable taking the variables as keyword arguments
+        """
+        compiled = self._compiled.get(text)
+        if compiled is not None:
+            self.hits += 1
+            self._compiled.move_to_end(text)
+            return compiled
+        self.misses += 1
+        compiled = compile_dag(self.parse(text))
+        self._compiled[text] = compiled
+        if len(self._compiled) > self.cache_size:
+            self._compiled.popitem(last=False)
+        return compiled
+
+    def __len__(self):
+        return len(self._nodes)
+
+
+def compile_dag(expression: AbstractExpression):
+    """
+    Compile a DAG to straight-line code with one local per operation, so
+    each shared subexpression is computed once per call and deep
+    expressions never nest (AbstractExpression.compile does exactly that)
+    Returns: callable taking the variables as keyword arguments
+    """
+    return expression.compile()
+
+
+# Usage
+if __name__ == "__main__":
+    factory = ExpressionFactory()
+    TARGET = "(a * b) + (a * b) - 2 * 3 / (1 + 1)"
+
+    tree = parse(TARGET)
+    dag = factory.parse(TARGET)
+    print(f"tree nodes: {count_nodes(tree, unique=False)}, dag nodes: {count_nodes(dag)}")
+
+    context = {"a": 3, "b": 4}
+    print(tree.interpret(context), evaluate(dag, context), factory.compile(TARGET)(**context))
@@ -0,0 +1,162 @@
+""" Stack-based bytecode VM for the Interpreter """
+
+from array import array
+from functools import lru_cache
+
+from interpreter import (
+    AbstractExpression,
+    Add,
+    AlgebraExpression,
+    Divide,
+    Multiply,
+    Number,
+    Subtract,
+    Variable,
+)
+
+PUSH_CONST, LOAD_VAR, ADD, SUBTRACT, MULTIPLY, DIVIDE, LOAD_SLOT, STORE_SLOT = range(8)
+OPCODES = {Add: ADD, Subtract: SUBTRACT, Multiply: MULTIPLY, Divide: DIVIDE}
+
+
+@lru_cache(maxsize=None)
+def _opcode(node_type: type):
+    """ opcode for an operation type (subclasses included), None for terminals """
+    for base in node_type.__mro__:
+        if base in OPCODES:
+            return OPCODES[base]
+    if issubclass(node_type, AlgebraExpression):
+        raise TypeError(f"cannot lower {node_type.__name__}")
+    return None
+
+
+class Program:
+    """
+    Postfix instructions for an expression: one opcode byte and one operand
+    index per node. Operands index the float64 constant table, the
+    variable names or the slots holding shared subexpressions, so the
+    tree itself is not needed to evaluate.
+    """
+    def __init__(self):
+        self.opcodes = array("B")
+        self.operands = array("I")
+        self.constants = array("d")
+        self.names = []
+        self.slots = 0
+
+    @classmethod
+    def lower(cls, expression: AbstractExpression) -> "Program":
+        """
+        lower an expression into postfix order without recursion; an
+        operation shared by several parents (a hash-consed DAG) is emitted
+        once and stored in a slot, later uses load the slot, so the program
+        grows with the DAG and not with the tree it stands for
+        """
+        program = cls()
+        constant_index, name_index, slot_index = {}, {}, {}
+        # operations reached through more than one parent
+        seen, shared, stack = set(), set(), [expression]
+        while stack:
+            node = stack.pop()
+            if _opcode(type(node)) is None:
+                continue
+            if id(node) in seen:
+                shared.add(id(node))
+                continue
+            seen.add(id(node))
+            stack.append(node.right)
+            stack.append(node.left)
+
+        # postfix order; an operation is pushed back as (opcode, node) once
+        # its children are scheduled, and emitted when that pair is popped
+        opcodes, operands = program.opcodes, program.operands
+        stack = [expression]
+        while stack:
+            node = stack.pop()
+            if type(node) is tuple:  # pylint: disable=unidiomatic-typecheck
+                opcode, node = node
+                opcodes.append(opcode)
+                operands.append(0)
+                if id(node) in shared:
+                    slot_index[id(node)] = program.slots
+                    opcodes.append(STORE_SLOT)
+                    operands.append(program.slots)
+                    program.slots += 1
+                continue
+            opcode = _opcode(type(node))
+            if opcode is not None:
+                if id(node) in slot_index:
+                    opcodes.append(LOAD_SLOT)
+                    operands.append(slot_index[id(node)])
+                else:
+                    stack.append((opcode, node))
+                    stack.append(node.right)
+                    stack.append(node.left)
+            elif isinstance(node, Variable):
+                if node.name not in name_index:
+                    name_index[node.name] = len(program.names)
+                    program.names.append(node.name)
+                opcodes.append(LOAD_VAR)
+                operands.append(name_index[node.name])
+            elif isinstance(node, Number):
+                key = repr(node.value)
+                if key not in constant_index:
+                    constant_index[key] = len(program.constants)
+                    program.constants.append(node.value)
+                opcodes.append(PUSH_CONST)
+                operands.append(constant_index[key])
+            else:
+                raise TypeError(f"cannot lower {type(node).__name__}")
+        return program
+
+    def run(self, context: dict = None) -> float:
+        """ evaluate the program on a value stack, no recursion involved """
+        constants = self.constants
+        if self.names:
+            if context is None:
+                raise KeyError(f"unbound variable {self.names[0]!r}")
+            try:
+                values = [context[name] for name in self.names]
+            except KeyError as exc:
+                raise KeyError(f"unbound variable {exc.args[0]!r}") from None
+        stack, slots = [], [0.0] * self.slots
+        push, pop = stack.append, stack.pop
+        for opcode, operand in zip(self.opcodes, self.operands):
+            if opcode == PUSH_CONST:
+                push(constants[operand])
+            elif opcode == LOAD_VAR:
+                push(values[operand])
+            elif opcode == LOAD_SLOT:
+                push(slots[operand])
+            elif opcode == STORE_SLOT:
+                slots[operand] = stack[-1]
+            else:
+                right = pop()
+                if opcode == ADD:
+                    stack[-1] += right
+                elif opcode == SUBTRACT:
+                    stack[-1] -= right
+                elif opcode == MULTIPLY:
+                    stack[-1] *= right
+                else:
+                    stack[-1] /= right
+        return stack[0]
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def nbytes(self) -> int:
+        """ bytes used by the instruction and constant arrays """
+        return sum(len(table) * table.itemsize
+                   for table in (self.opcodes, self.operands, self.constants))
+
+
+# Usage
+if __name__ == "__main__":
+    TERMS = 200_000
+    expression = Number(0)
+    for i in range(1, TERMS):
+        expression = Add(expression, Multiply(Variable("x"), Number(i % 7)))
+
+    program = Program.lower(expression)
+    print(f"{len(program)} instructions, {program.nbytes()} bytes")
+    print(program.run({"x": 2}))
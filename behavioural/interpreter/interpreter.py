@@ -1,13 +1,167 @@
 """ Interpreter Design Pattern Implementation """
 
+import keyword
+import math
+import re
 from abc import ABC, abstractmethod
+from collections import Counter
+from operator import add, mul, sub
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+def postorder(expression, unique: bool = True) -> list:
+    """
+    Nodes in post-order without recursion, children before parents
+    Args: unique: visit shared nodes once (DAG) instead of once per path (tree)
+    """
+    order, seen = [], set()
+    stack = [(expression, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if unique and id(node) in seen:
+            continue
+        if expanded or not isinstance(node, AlgebraExpression):
+            if unique:
+                seen.add(id(node))
+            order.append(node)
+            continue
+        stack.append((node, True))
+        stack.append((node.right, False))
+        stack.append((node.left, False))
+    return order
 
 
 class AbstractExpression(ABC):
-    """ Abstract class for expressions """
+    """
+    Abstract class for expressions. Only interpret() is required; the
+    tree-wide helpers (to_source, variables, compile, interpret_columns) walk the tree
+    without recursion, so they handle chains of any depth.
+    """
+    precedence = 3
+    # inlining limits, below CPython's compiler recursion and parenthesis limits
+    COMPILE_NESTING = 500
+    COMPILE_PARENTHESES = 100
+
     @abstractmethod
-    def interpret(self):
-        """ abstract method for interpret """
+    def interpret(self, context: dict = None):
+        """ abstract method for interpret, context maps variable names to values """
+
+    def to_source(self) -> str:
+        """ Python source that evaluates to the same value """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not define to_source and cannot be compiled"
+        )
+
+    def interpret_columns(self, columns: dict, length: int) -> list:
+        """ pure-Python column evaluation, one list element per row """
+        return [self.interpret({name: column[row] for name, column in columns.items()})
+                for row in range(length)]
+
+    def variables(self) -> set:
+        """ names of the variables used in the expression """
+        names = set()
+        for node in postorder(self):
+            if node is not self and not isinstance(node, AlgebraExpression):
+                names |= node.variables()
+        return names
+
+    def compile(self, number=None):
+        """
+        Turn the tree into a single flat Python callable, so an expression
+        parsed once is evaluated without walking the tree. Subtrees are
+        inlined up to COMPILE_NESTING levels and COMPILE_PARENTHESES nested
+        groups (so CPython still folds their constants); deeper chains and
+        shared subexpressions (DAGs) go through one local each, so nothing
+        nests too deeply or runs twice.
+        Args: number: type every literal is converted to, e.g. numpy.float64,
+            so constant-only subexpressions follow its arithmetic too
+        Returns: callable taking the variables as keyword arguments
+        """
+        order = postorder(self)
+        uses = Counter(id(child) for node in order if isinstance(node, AlgebraExpression)
+                       for child in (node.left, node.right))
+        namespace = {"__builtins__": {}}
+        lines, compiled = [], {}  # id -> (source, precedence, nesting, parentheses)
+        for node in order:
+            if isinstance(node, AlgebraExpression):
+                left, left_precedence, left_nesting, left_groups = compiled[id(node.left)]
+                right, right_precedence, right_nesting, right_groups = compiled[id(node.right)]
+                for child in (node.left, node.right):
+                    if uses[id(child)] == 1:
+                        del compiled[id(child)]
+                if left_precedence < node.precedence:
+                    left, left_groups = f"({left})", left_groups + 1
+                if right_precedence <= node.precedence:
+                    right, right_groups = f"({right})", right_groups + 1
+                source = f"{left} {node.operator} {right}"
+                nesting = max(left_nesting, right_nesting) + 1
+                groups = max(left_groups, right_groups)
+                if nesting < self.COMPILE_NESTING and groups < self.COMPILE_PARENTHESES \
+                        and uses[id(node)] < 2:
+                    compiled[id(node)] = (source, node.precedence, nesting, groups)
+                    continue
+                local = f"_{len(lines)}"
+                lines.append(f"    {local} = {source}\n")
+                compiled[id(node)] = (local, AbstractExpression.precedence, 0, 0)
+            elif number is not None and isinstance(node, Number):
+                constant = f"_c{len(namespace)}"
+                namespace[constant] = number(node.value)
+                compiled[id(node)] = (constant, AbstractExpression.precedence, 0, 0)
+            else:
+                compiled[id(node)] = (node.to_source(), node.precedence, 0, 0)
+        parameters = ", ".join(sorted(self.variables()) + ["**_"])
+        source = f"def _expression({parameters}):\n" + "".join(lines) + \
+            f"    return {compiled[id(self)][0]}\n"
+        exec(compile(source, "<expression>", "exec"), namespace)  # pylint: disable=exec-used
+        return namespace["_expression"]
+
+    def interpret_batch(self, bindings: dict):
+        """
+        Evaluate the expression once over whole columns. With NumPy this is
+        a single vectorized pass over float64 arrays, otherwise a pure-Python
+        loop. Division follows IEEE 754 on both paths: x/0 is +-inf and
+        0/0 is nan, no ZeroDivisionError is raised.
+        Args: bindings: {variable name: column or scalar}
+        Returns: numpy.ndarray with NumPy, else list of float
+        """
+        missing = self.variables() - bindings.keys()
+        if missing:
+            raise KeyError(f"unbound variables: {', '.join(sorted(missing))}")
+        lengths = {len(column) for column in bindings.values() if not _is_scalar(column)}
+        if len(lengths) > 1:
+            raise ValueError(f"columns have different lengths: {sorted(lengths)}")
+        length = lengths.pop() if lengths else 1
+
+        if np is not None:
+            columns = {name: np.asarray(column, dtype=np.float64)
+                       for name, column in bindings.items()}
+            with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+                result = self.compile(np.float64)(**columns)
+            return np.broadcast_to(np.asarray(result, dtype=np.float64), (length,)).copy()
+
+        columns = {
+            name: [float(column)] * length if _is_scalar(column) else [float(v) for v in column]
+            for name, column in bindings.items()
+        }
+        return self.interpret_columns(columns, length)
+
+
+def _is_scalar(value) -> bool:
+    return isinstance(value, (int, float)) or getattr(value, "ndim", None) == 0
+
+
+def ieee_divide(left: float, right: float) -> float:
+    """ float division with NumPy's IEEE 754 results instead of ZeroDivisionError """
+    try:
+        return left / right
+    except ZeroDivisionError:
+        if left == 0 or math.isnan(left):
+            return math.nan
+        return math.copysign(math.inf, left) * math.copysign(1.0, right)
 
 
 # Terminal Expression
@@ -16,59 +170,233 @@ class Number(AbstractExpression):
     def __init__(self, value):
         self.value = float(value)
 
-    def interpret(self):
+    def interpret(self, context=None):
         return self.value
 
+    def to_source(self):
+        if math.isfinite(self.value):
+            return repr(self.value)
+        if math.isnan(self.value):
+            return "(1e999 - 1e999)"
+        return "1e999" if self.value > 0 else "(-1e999)"
+
+    def interpret_columns(self, columns, length):
+        return [self.value] * length
+
+
+class Variable(AbstractExpression):
+    """ Variable class to define Terminal expressions bound at evaluation time """
+    def __init__(self, name: str):
+        if not name.isidentifier() or keyword.iskeyword(name) or name.startswith("_"):
+            raise ValueError(f"invalid variable name {name!r}")
+        self.name = name
+
+    def interpret(self, context=None):
+        try:
+            return context[self.name]
+        except (KeyError, TypeError):
+            raise KeyError(f"unbound variable {self.name!r}") from None
+
+    def to_source(self):
+        return self.name
+
+    def interpret_columns(self, columns, length):
+        return columns[self.name]
+
+    def variables(self):
+        return {self.name}
+
 
 # Non-Terminal Expression
 class AlgebraExpression(AbstractExpression):
     """ Algebra Expression to define for Non-Terminal Expressions """
+    operator = None
+
     def __init__(self, left, right):
         self.left = left
         self.right = right
 
+    def to_source(self):
+        # parenthesize only where needed so long left-folded chains stay flat;
+        # the right operand keeps its grouping because float ops aren't associative.
+        # Built from an explicit stack of nodes and text, in order, then joined once
+        parts, stack = [], [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                parts.append(item)
+            elif not isinstance(item, AlgebraExpression):
+                parts.append(item.to_source())
+            else:
+                left_group = item.left.precedence < item.precedence
+                right_group = item.right.precedence <= item.precedence
+                stack.extend((
+                    ")" if right_group else "", item.right, "(" if right_group else "",
+                    f" {item.operator} ",
+                    ")" if left_group else "", item.left, "(" if left_group else "",
+                ))
+        return "".join(parts)
+
+    def interpret_columns(self, columns, length):
+        # postorder with a column per pending node; a child's column is
+        # dropped once its last parent has used it
+        order = postorder(self)
+        uses = Counter(id(child) for node in order if isinstance(node, AlgebraExpression)
+                       for child in (node.left, node.right))
+        results = {}
+        for node in order:
+            if not isinstance(node, AlgebraExpression):
+                results[id(node)] = node.interpret_columns(columns, length)
+                continue
+            left, right = results[id(node.left)], results[id(node.right)]
+            for child in (node.left, node.right):
+                uses[id(child)] -= 1
+                if not uses[id(child)]:
+                    results.pop(id(child), None)
+            results[id(node)] = list(map(node.column_operation, left, right))
+        return results[id(self)]
+
 
 class Add(AlgebraExpression):
     """ Add Expression """
-    def interpret(self):
-        return self.left.interpret() + self.right.interpret()
+    operator = "+"
+    column_operation = add
+    precedence = 1
+
+    def interpret(self, context=None):
+        return self.left.interpret(context) + self.right.interpret(context)
 
 
 class Subtract(AlgebraExpression):
     """ Subtract Expression """
-    def interpret(self):
-        return self.left.interpret() - self.right.interpret()
+    operator = "-"
+    column_operation = sub
+    precedence = 1
+
+    def interpret(self, context=None):
+        return self.left.interpret(context) - self.right.interpret(context)
 
 
 class Multiply(AlgebraExpression):
     """ Multiply Expression """
-    def interpret(self):
-        return self.left.interpret() * self.right.interpret()
+    operator = "*"
+    column_operation = mul
+    precedence = 2
+
+    def interpret(self, context=None):
+        return self.left.interpret(context) * self.right.interpret(context)
 
 
 class Divide(AlgebraExpression):
     """ Divide Expression """
-    def interpret(self):
-        return self.left.interpret() / self.right.interpret()
+    operator = "/"
+    column_operation = staticmethod(ieee_divide)
+    precedence = 2
+
+    def interpret(self, context=None):
+        return self.left.interpret(context) / self.right.interpret(context)
+
+
+class ParseError(ValueError):
+    """ Raised for malformed expression text """
+
+
+class Parser:
+    """
+    Precedence-climbing parser building AbstractExpression trees.
+    Grammar: expr := term (('+'|'-') term)*, term := factor (('*'|'/') factor)*,
+    factor := NUMBER | NAME | '(' expr ')' | '-' factor
+    """
+    TOKEN = re.compile(
+        r"\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)|([A-Za-z_]\w*)|(.))"
+    )
+    BINARY = {"+": Add, "-": Subtract, "*": Multiply, "/": Divide}
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = self._tokenize(text)
+        self.position = 0
+
+    def _tokenize(self, text: str) -> list:
+        tokens = []
+        for match in self.TOKEN.finditer(text.rstrip()):
+            number, name, symbol = match.groups()
+            if number is not None:
+                tokens.append(("number", number))
+            elif name is not None:
+                tokens.append(("name", name))
+            elif symbol in self.BINARY or symbol in "()":
+                tokens.append(("op", symbol))
+            else:
+                raise ParseError(f"unexpected character {symbol!r} at {match.start(3)}")
+        return tokens
+
+    def _peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return (None, None)
+
+    def _take(self):
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def parse(self) -> AbstractExpression:
+        """ parse the whole text into an expression tree """
+        expression = self._expression(1)
+        if self.position != len(self.tokens):
+            raise ParseError(f"unexpected token {self._peek()[1]!r} in {self.text!r}")
+        return expression
+
+    def _expression(self, min_precedence: int) -> AbstractExpression:
+        left = self._factor()
+        while True:
+            kind, value = self._peek()
+            if kind != "op" or value not in self.BINARY:
+                return left
+            node = self.BINARY[value]
+            if node.precedence < min_precedence:
+                return left
+            self._take()
+            left = node(left, self._expression(node.precedence + 1))
+
+    def _factor(self) -> AbstractExpression:
+        kind, value = self._take()
+        if kind == "number":
+            return Number(value)
+        if kind == "name":
+            try:
+                return Variable(value)
+            except ValueError as exc:
+                raise ParseError(str(exc)) from None
+        if value == "(":
+            expression = self._expression(1)
+            if self._take() != ("op", ")"):
+                raise ParseError(f"missing ')' in {self.text!r}")
+            return expression
+        if value == "-":
+            return Subtract(Number(0), self._factor())
+        raise ParseError(f"expected a number or '(' in {self.text!r}")
+
+
+def parse(text: str) -> AbstractExpression:
+    """ parse expression text with operator precedence and parentheses """
+    return Parser(text).parse()
 
 
 # Usage
 if __name__ == "__main__":
     TARGET = "3 + 5 - 2 * 7 / 5 + 11"
-    tokens = TARGET.split(" ")
-    expressions = []
-
-    for c, i in enumerate(range(len(tokens))):
-        if i == 0:
-            expressions.append(Number(tokens[i]))
-        elif tokens[i] == "+":
-            expressions.append(Add(expressions.pop(), Number(tokens[i+1])))
-        elif tokens[i] == "-":
-            expressions.append(Subtract(expressions.pop(), Number(tokens[i+1])))
-        elif tokens[i] == "*":
-            expressions.append(Multiply(expressions.pop(), Number(tokens[i+1])))
-        elif tokens[i] == "/":
-            expressions.append(Divide(expressions.pop(), Number(tokens[i+1])))
-
-    result = expressions.pop().interpret()
+    expression = parse(TARGET)
+
+    result = expression.interpret()
     print(result)
+
+    evaluate = expression.compile()
+    print(evaluate())
+
+    price = parse("base * (1 + tax) - discount / quantity")
+    print(price.interpret({"base": 100, "tax": 0.2, "discount": 10, "quantity": 4}))
+    print(list(price.interpret_batch({
+        "base": [100, 250, 80], "tax": 0.2, "discount": [10, 0, 5], "quantity": [4, 1, 0]
+    })))
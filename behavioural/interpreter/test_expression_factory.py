@@ -0,0 +1,65 @@
+""" Interning, folding and caching tests for the Expression Factory """
+
+import gc
+import unittest
+
+from expression_factory import ExpressionFactory, count_nodes, evaluate
+from interpreter import Add, Number, parse
+
+
+class ExpressionFactoryTest(unittest.TestCase):
+    """ equal subexpressions must be one node, built and evaluated once """
+
+    def test_equal_subexpressions_are_shared(self):
+        factory = ExpressionFactory()
+        dag = factory.parse("(a * b) + (a * b) - (a * b) / 2")
+        self.assertIs(dag.left.left, dag.left.right)
+        self.assertIs(dag.left.left, dag.right.left)
+        self.assertIs(factory.parse("a * b"), dag.left.left)
+        self.assertLess(count_nodes(dag), count_nodes(dag, unique=False))
+        context = {"a": 3.0, "b": 4.0}
+        self.assertEqual(evaluate(dag, context), parse("(a * b) + (a * b) - (a * b) / 2")
+                         .interpret(context))
+
+    def test_constants_are_folded(self):
+        factory = ExpressionFactory()
+        self.assertIsInstance(factory.parse("2 * 3 + 4"), Number)
+        self.assertEqual(factory.parse("2 * 3 + x").left.value, 6.0)
+        unfolded = ExpressionFactory(fold_constants=False).parse("2 * 3")
+        self.assertNotIsInstance(unfolded, Number)
+        with self.assertRaises(ZeroDivisionError):
+            evaluate(factory.parse("1 / 0"))
+
+    def test_released_expressions_leave_the_table(self):
+        factory = ExpressionFactory()
+        kept = factory.parse("a + b")
+        dropped = factory.parse("c * d + e")
+        size = len(factory)
+        del dropped
+        gc.collect()
+        self.assertLess(len(factory), size)
+        self.assertIs(factory.parse("a + b"), kept)
+
+    def test_compiled_cache_is_bounded_lru(self):
+        factory = ExpressionFactory(cache_size=2)
+        first = factory.compile("x + 1")
+        factory.compile("x + 2")
+        self.assertIs(factory.compile("x + 1"), first)
+        factory.compile("x + 3")  # evicts "x + 2", the least recently used
+        factory.compile("x + 2")
+        self.assertEqual((factory.hits, factory.misses), (1, 4))
+        self.assertEqual(first(x=1.0), 2.0)
+
+    def test_deep_shared_dag(self):
+        factory = ExpressionFactory()
+        expression = factory.variable("x")
+        for _ in range(1000):
+            expression = factory.binary(Add, expression, expression)
+        self.assertEqual(count_nodes(expression), 1001)
+        self.assertEqual(evaluate(expression, {"x": 0.5 ** 1000}), 1.0)
+        self.assertEqual(expression.compile()(x=0.5 ** 1000), 1.0)
+        self.assertIs(factory.intern(expression), expression)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+""" DAG lowering tests for the Expression VM """
+
+import unittest
+
+from expression_factory import ExpressionFactory, count_nodes, evaluate
+from expression_vm import STORE_SLOT, Program
+from interpreter import Add, Multiply, Number, Subtract, Variable, parse
+
+
+def doubling(factory: ExpressionFactory, levels: int):
+    """ x, then e = e + e levels times: a DAG of levels + 1 nodes, a tree of 2 ** (levels + 1) - 1 """
+    expression = factory.variable("x")
+    for _ in range(levels):
+        expression = factory.binary(Add, expression, expression)
+    return expression
+
+
+class LowerTest(unittest.TestCase):
+    """ Program.lower must follow the DAG, not the tree it stands for """
+
+    def test_shared_nodes_are_lowered_once(self):
+        factory = ExpressionFactory()
+        expression = doubling(factory, 64)
+        program = Program.lower(expression)
+        self.assertLess(len(program), 4 * count_nodes(expression))
+        self.assertEqual(program.run({"x": 1.0}), 2.0 ** 64)
+        self.assertEqual(program.run({"x": 1.0}), evaluate(expression, {"x": 1.0}))
+
+    def test_dag_matches_tree(self):
+        factory = ExpressionFactory()
+        text = "(a * b) + (a * b) - (a - b) * (a - b) / ((a * b) + 1)"
+        context = {"a": 3.0, "b": 4.0}
+        dag = Program.lower(factory.parse(text))
+        tree = Program.lower(parse(text))
+        self.assertIn(STORE_SLOT, dag.opcodes)
+        self.assertNotIn(STORE_SLOT, tree.opcodes)
+        self.assertLess(len(dag), len(tree))
+        self.assertEqual(dag.run(context), tree.run(context))
+        self.assertEqual(dag.run(context), parse(text).interpret(context))
+
+    def test_deep_tree(self):
+        expression = Number(0)
+        for i in range(1, 50_000):
+            expression = Subtract(expression, Multiply(Variable("x"), Number(i % 7)))
+        self.assertEqual(Program.lower(expression).run({"x": 2.0}),
+                         expression.compile()(x=2.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+""" Batch evaluation tests for the Interpreter """
+
+import math
+import unittest
+from unittest import mock
+
+import interpreter
+from interpreter import AbstractExpression, Add, Multiply, Number, Variable, parse
+
+DEEP = 20_000
+
+
+def left_fold(terms: int):
+    """ 0 + x*1 + x*2 + ... as a left-folded tree """
+    expression = Number(0)
+    for i in range(1, terms):
+        expression = Add(expression, Multiply(Variable("x"), Number(i % 7)))
+    return expression
+
+
+class Constant(AbstractExpression):
+    """ third-party node implementing only interpret """
+    def __init__(self, value):
+        self.value = value
+
+    def interpret(self, context=None):
+        return self.value
+
+
+class ExtensionTest(unittest.TestCase):
+    """ interpret() is the only method a new expression has to implement """
+
+    def test_interpret_only_subclass(self):
+        expression = Add(Constant(2.0), Variable("x"))
+        self.assertEqual(expression.interpret({"x": 1.0}), 3.0)
+        with self.assertRaises(NotImplementedError):
+            expression.compile()
+        with mock.patch.object(interpreter, "np", None):
+            self.assertEqual(expression.interpret_batch({"x": [1.0, 2.0]}), [3.0, 4.0])
+
+
+class DeepExpressionTest(unittest.TestCase):
+    """ tree-wide helpers must not recurse per node """
+
+    def test_to_source_and_variables(self):
+        expression = left_fold(DEEP)
+        self.assertEqual(expression.variables(), {"x"})
+        source = expression.to_source()
+        self.assertTrue(source.startswith("0.0 + x * 1.0 + x * 2.0"))
+        self.assertNotIn("(", source)
+
+    def test_compile_matches_interpret(self):
+        expected = sum(2.0 * (i % 7) for i in range(1, DEEP))
+        self.assertEqual(left_fold(DEEP).compile()(x=2.0), expected)
+        right_nested = Variable("x")
+        for i in range(1, DEEP):
+            right_nested = interpreter.Subtract(Number(i), right_nested)
+        self.assertEqual(right_nested.compile()(x=1.0),
+                         right_nested.compile(float)(x=1.0))
+
+    def test_interpret_batch(self):
+        expression = left_fold(DEEP)
+        expected = [sum(x * (i % 7) for i in range(1, DEEP)) for x in (1.0, 2.0)]
+        with mock.patch.object(interpreter, "np", None):
+            self.assertEqual(expression.interpret_batch({"x": [1.0, 2.0]}), expected)
+        if interpreter.np is not None:
+            self.assertEqual(list(expression.interpret_batch({"x": [1.0, 2.0]})), expected)
+
+    def test_shallow_formulas_keep_their_source(self):
+        for text in ("a - (b - c)", "(a + b) * c / (d - e)", "a / (b / c)"):
+            expression = parse(text)
+            context = {"a": 1.0, "b": 2.0, "c": 3.0, "d": 4.0, "e": 5.0}
+            self.assertEqual(parse(expression.to_source()).to_source(), expression.to_source())
+            self.assertEqual(expression.compile()(**context), expression.interpret(context))
+
+
+class InterpretBatchTest(unittest.TestCase):
+    """ interpret_batch must follow IEEE 754 division, constants included """
+
+    def check_constant_division(self):
+        self.assertEqual(list(parse("1 / 0 + x").interpret_batch({"x": [1, -1]})),
+                         [math.inf, math.inf])
+        self.assertEqual(list(parse("x - 1 / 0").interpret_batch({"x": [1, -1]})),
+                         [-math.inf, -math.inf])
+        result = parse("(2 - 2) / 0 + x").interpret_batch({"x": [1, 2]})
+        self.assertTrue(all(math.isnan(value) for value in result))
+        self.assertEqual(list(parse("-1 / 0").interpret_batch({})), [-math.inf])
+
+    def test_pure_python_constant_division(self):
+        with mock.patch.object(interpreter, "np", None):
+            self.check_constant_division()
+
+    @unittest.skipIf(interpreter.np is None, "numpy is not installed")
+    def test_numpy_constant_division(self):
+        self.check_constant_division()
+
+
+if __name__ == "__main__":
+    unittest.main()
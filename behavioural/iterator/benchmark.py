@@ -0,0 +1,185 @@
+""" Benchmarks for Iterator """
+
+import os
+import random
+import string
+import tempfile
+import time
+import tracemalloc
+from itertools import islice
+
+from external_iterator import StreamingWordsCollection
+from iterator import AlphabeticalOrderIterator, WordsCollection
+from word_store import build_word_store, open_words_collection
+
+
+def random_words(count: int, seed: int = 1) -> list:
+    """ random lowercase/capitalized words of 3 to 10 letters """
+    rng = random.Random(seed)
+    letters = string.ascii_lowercase
+    return ["".join(rng.choices(letters, k=rng.randint(3, 10))).capitalize()
+            if rng.random() < 0.3 else "".join(rng.choices(letters, k=rng.randint(3, 10)))
+            for _ in range(count)]
+
+
+def bench_sorted_index(count: int = 500_000, traversals: int = 5, edits: int = 1000):
+    """ repeated traversals: sort per iterator vs cached, incrementally kept index """
+    words = random_words(count)
+    print(f"sorted index: {count} words, {traversals} forward+reverse traversals")
+
+    start = time.perf_counter()
+    for _ in range(traversals):
+        for _ in AlphabeticalOrderIterator(words):
+            pass
+        for _ in AlphabeticalOrderIterator(words, reverse=True):
+            pass
+    print(f"  sort per iterator   {time.perf_counter() - start:7.2f} s")
+
+    for label, key in (("cached index", None), ("cached, casefold", str.casefold)):
+        collection = WordsCollection(words, key=key)
+        start = time.perf_counter()
+        for _ in range(traversals):
+            for _ in collection.get_iterator():
+                pass
+            for _ in collection.get_reverse_iterator():
+                pass
+        print(f"  {label:<19} {time.perf_counter() - start:7.2f} s")
+
+    extra = random_words(edits, seed=2)
+    start = time.perf_counter()
+    for word in extra:
+        collection.add_word(word)
+    for word in extra:
+        collection.remove_word(word)
+    print(f"  {edits} add+remove on the index: {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+
+def bench_prefix_scan(count: int = 10_000_000, lookups: int = 20, page: int = 20):
+    """ iter_prefix/seek over the sorted index vs a linear filter """
+    words = random_words(count, seed=3)
+    collection = WordsCollection(words)
+    del words
+    collection.get_iterator()
+    prefixes = [word[:3] for word in random_words(lookups, seed=4)]
+    print(f"prefix scan: {count} words, {lookups} prefixes, page of {page}")
+
+    start = time.perf_counter()
+    for prefix in prefixes:
+        list(islice(collection.iter_prefix(prefix), page))
+    indexed_page = (time.perf_counter() - start) / lookups
+
+    start = time.perf_counter()
+    for prefix in prefixes:
+        list(collection.iter_prefix(prefix))
+    indexed_all = (time.perf_counter() - start) / lookups
+
+    start = time.perf_counter()
+    for prefix in prefixes[:3]:
+        list(islice((w for w in collection.get_iterator() if w.startswith(prefix)), page))
+    linear_page = (time.perf_counter() - start) / 3
+
+    start = time.perf_counter()
+    for prefix in prefixes[:3]:
+        list(w for w in collection.get_iterator() if w.startswith(prefix))
+    linear_all = (time.perf_counter() - start) / 3
+
+    print(f"  first page: iter_prefix {indexed_page * 1e6:9.1f} us"
+          f"  linear filter {linear_page * 1e6:12.1f} us")
+    print(f"  all matches: iter_prefix {indexed_all * 1e6:8.1f} us"
+          f"  linear filter {linear_all * 1e6:12.1f} us")
+
+
+def bench_external_sort(count: int = 2_000_000, memory_budget: int = 16 * 1024 * 1024):
+    """ in-memory sort vs external merge sort of a word file, time and peak memory """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "words.txt")
+        with open(path, "w", encoding="utf-8") as file:
+            file.writelines(f"{word}\n" for word in random_words(count, seed=5))
+        size = os.path.getsize(path) / 2 ** 20
+        print(f"external sort: {count} words ({size:.0f} MiB file),"
+              f" budget {memory_budget / 2 ** 20:.0f} MiB")
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        with open(path, encoding="utf-8") as file:
+            collection = WordsCollection(line.rstrip("\n") for line in file)
+        iterator = collection.get_iterator()
+        next(iterator)
+        first = time.perf_counter() - start
+        for _ in iterator:
+            pass
+        total = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del collection, iterator
+        print(f"  in memory  first word {first:6.2f} s  all {total:6.2f} s"
+              f"  peak {peak / 2 ** 20:7.1f} MiB")
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        with StreamingWordsCollection(path, memory_budget=memory_budget,
+                                      directory=directory) as streaming:
+            iterator = streaming.get_iterator()
+            next(iterator)
+            first = time.perf_counter() - start
+            for _ in iterator:
+                pass
+            total = time.perf_counter() - start
+            runs = streaming.run_count
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"  external   first word {first:6.2f} s  all {total:6.2f} s"
+              f"  peak {peak / 2 ** 20:7.1f} MiB  ({runs} runs)")
+
+
+def _rss() -> int:
+    """ resident set size of this process in bytes (Linux) """
+    with open("/proc/self/statm", encoding="ascii") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def bench_word_store(counts=(100_000, 3_000_000)):
+    """ open time and RSS of a mmap WordStore vs a list-backed WordsCollection """
+    print("word store vs list (open = time until the first word is available)")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in counts:
+            words = sorted(random_words(count, seed=6))
+            path = os.path.join(directory, f"words-{count}.words")
+            build_word_store(words, path, presorted=True)
+            text_path = os.path.join(directory, f"words-{count}.txt")
+            with open(text_path, "w", encoding="utf-8") as file:
+                file.writelines(f"{word}\n" for word in words)
+            del words
+
+            before = _rss()
+            start = time.perf_counter()
+            with open(text_path, encoding="utf-8") as file:
+                listed = WordsCollection(line.rstrip("\n") for line in file)
+            next(listed.get_iterator())
+            list_open = time.perf_counter() - start
+            list_rss = _rss() - before
+            del listed
+
+            before = _rss()
+            start = time.perf_counter()
+            stored = open_words_collection(path)
+            next(stored.get_iterator())
+            store_open = time.perf_counter() - start
+            store_rss = _rss() - before
+            for _ in stored.get_iterator():
+                pass
+            touched_rss = _rss() - before
+            size = os.path.getsize(path)
+            print(f"  {count:>9} words  list: open {list_open * 1e3:8.1f} ms"
+                  f" rss +{list_rss / 2 ** 20:6.1f} MiB"
+                  f" | store: open {store_open * 1e3:6.2f} ms"
+                  f" rss +{store_rss / 2 ** 20:5.1f} MiB"
+                  f" (+{touched_rss / 2 ** 20:5.1f} MiB of page cache after a full scan,"
+                  f" file {size / count:4.1f} B/word)")
+
+
+if __name__ == "__main__":
+    bench_sorted_index()
+    bench_prefix_scan()
+    bench_external_sort()
+    bench_word_store()
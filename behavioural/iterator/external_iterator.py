@@ -0,0 +1,193 @@
+""" External merge sort Iterator for word streams larger than RAM """
+
+import heapq
+import io
+import os
+import re
+import sys
+import tempfile
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+
+BLOCK_SIZE = 1 << 16
+ESCAPED = re.compile(r"\\(.)")
+
+
+def _escape(word: str) -> str:
+    return word.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _unescape(line: str) -> str:
+    if "\\" not in line:
+        return line
+    return ESCAPED.sub(lambda match: "\n" if match.group(1) == "n" else match.group(1), line)
+
+
+def _read_forward(path: str) -> Iterator[str]:
+    with open(path, "r", encoding="utf-8", newline="\n") as file:
+        for line in file:
+            yield _unescape(line[:-1])
+
+
+def _read_backward(path: str) -> Iterator[str]:
+    """ lines of a run file from last to first, reading fixed-size blocks from the end """
+    with open(path, "rb") as file:
+        # every line ends with a newline, dropping the last one leaves N-1 separators
+        position = file.seek(0, os.SEEK_END) - 1
+        tail = b""
+        while position > 0:
+            size = min(BLOCK_SIZE, position)
+            position -= size
+            file.seek(position)
+            lines = (file.read(size) + tail).split(b"\n")
+            tail = lines.pop(0)
+            for line in reversed(lines):
+                yield _unescape(line.decode("utf-8"))
+        if position == 0:
+            yield _unescape(tail.decode("utf-8"))
+
+
+class MergeIterator(Iterator[str]):
+    """ Iterator merging sorted runs lazily with heapq.merge """
+
+    def __init__(self, runs: List[Iterator[str]], reverse: bool = False,
+                 key: Optional[Callable[[str], object]] = None):
+        self._runs = runs
+        self._merged = heapq.merge(*runs, key=key, reverse=reverse)
+
+    def __iter__(self) -> "MergeIterator":
+        return self
+
+    def __next__(self) -> str:
+        try:
+            return next(self._merged)
+        except StopIteration:
+            self.close()
+            raise
+
+    def close(self):
+        """ release the open run files """
+        for run in self._runs:
+            if hasattr(run, "close"):
+                run.close()
+
+
+class StreamingWordsCollection:
+    """
+    A collection of words read from any iterable or text file and sorted
+    externally: chunks that fit in `memory_budget` bytes are sorted and
+    spilled to temporary run files, and iterators merge the runs lazily.
+    The source is consumed once, on the first iterator request. When more
+    than `max_open_runs` runs are spilled they are merged into bigger runs
+    first, so iteration never holds more than that many files open.
+    """
+
+    def __init__(self, source: Union[Iterable[str], str, io.TextIOBase],
+                 memory_budget: int = 64 * 1024 * 1024,
+                 key: Optional[Callable[[str], object]] = None,
+                 directory: Optional[str] = None, max_open_runs: int = 128):
+        self._source = source
+        self.memory_budget = memory_budget
+        self.max_open_runs = max(2, max_open_runs)
+        self._key = key
+        self._directory = directory
+        self._tmp = None
+        self._runs = None
+        self._in_memory = None
+
+    def _words(self) -> Iterator[str]:
+        if isinstance(self._source, (str, os.PathLike)):
+            with open(self._source, "r", encoding="utf-8") as file:
+                for line in file:
+                    yield line.rstrip("\n")
+        elif isinstance(self._source, io.TextIOBase):
+            for line in self._source:
+                yield line.rstrip("\n")
+        else:
+            yield from self._source
+
+    def _write_run(self, words: Iterable[str]):
+        if self._tmp is None:
+            self._tmp = tempfile.TemporaryDirectory(  # pylint: disable=consider-using-with
+                prefix="words-", dir=self._directory
+            )
+        self._run_number += 1
+        path = os.path.join(self._tmp.name, f"run-{self._run_number}.txt")
+        with open(path, "w", encoding="utf-8", newline="\n") as file:
+            file.writelines(f"{_escape(word)}\n" for word in words)
+        self._runs.append(path)
+
+    def _spill(self, chunk: List[str]):
+        chunk.sort(key=self._key)
+        self._write_run(chunk)
+        if len(self._runs) >= self.max_open_runs:
+            runs, self._runs = self._runs, []
+            self._write_run(MergeIterator([_read_forward(path) for path in runs], key=self._key))
+            for path in runs:
+                os.remove(path)
+
+    def _build_runs(self):
+        if self._runs is not None:
+            return
+        self._runs, self._run_number, chunk, used = [], 0, [], 0
+        for word in self._words():
+            chunk.append(word)
+            used += sys.getsizeof(word) + 8
+            if self._key is not None:
+                used += sys.getsizeof(self._key(word))
+            if used >= self.memory_budget:
+                self._spill(chunk)
+                chunk, used = [], 0
+        if self._runs:
+            if chunk:
+                self._spill(chunk)
+        else:
+            # everything fit in the budget, no need to touch the disk
+            self._in_memory = sorted(chunk, key=self._key)
+        self._source = None
+
+    def _iterator(self, reverse: bool) -> MergeIterator:
+        self._build_runs()
+        if self._in_memory is not None:
+            words = reversed(self._in_memory) if reverse else iter(self._in_memory)
+            return MergeIterator([words], reverse, self._key)
+        reader = _read_backward if reverse else _read_forward
+        return MergeIterator([reader(path) for path in self._runs], reverse, self._key)
+
+    def get_iterator(self) -> MergeIterator:
+        """ Return an iterator in normal alphabetical order """
+        return self._iterator(reverse=False)
+
+    def get_reverse_iterator(self) -> MergeIterator:
+        """ Return an iterator in reverse alphabetical order """
+        return self._iterator(reverse=True)
+
+    @property
+    def run_count(self) -> int:
+        """ number of sorted runs spilled to disk """
+        self._build_runs()
+        return len(self._runs)
+
+    def close(self):
+        """ delete the spilled runs """
+        if self._tmp is not None:
+            self._tmp.cleanup()
+            self._tmp = None
+
+    def __enter__(self) -> "StreamingWordsCollection":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Usage
+if __name__ == "__main__":
+    words = ["John", "Alex", "Michael", "Carol", "Bob", "Dave", "Eve"]
+    with StreamingWordsCollection(iter(words), memory_budget=150) as collection:
+        print(f"runs spilled: {collection.run_count}")
+
+        for word in collection.get_iterator():
+            print(word)
+
+        for word in collection.get_reverse_iterator():
+            print(word)
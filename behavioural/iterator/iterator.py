@@ -1,43 +1,193 @@
 """ Iterator Design Pattern Implementation """
 
-from typing import List, Iterator
+from bisect import bisect_left, bisect_right
+from typing import Callable, List, Iterator, Optional, Sequence
 
 
 class AlphabeticalOrderIterator(Iterator[str]):
-    """ Iterator to traverse a collection of words in alphabetical order """
-
-    def __init__(self, collection: List[str], reverse: bool = False):
-        self._collection = sorted(collection)
+    """
+    Iterator to traverse a collection of words in alphabetical order.
+    It can be limited to the [start, stop) slice of the sorted words and
+    repositioned with seek() in O(log n); words are read only as consumed.
+    An iterator over a WordsCollection raises RuntimeError once the
+    collection is modified, as dict iteration does.
+    """
+
+    def __init__(self, collection: List[str], reverse: bool = False, presorted: bool = False,
+                 start: int = 0, stop: Optional[int] = None, keys: Optional[list] = None,
+                 key: Optional[Callable[[str], object]] = None,
+                 owner: Optional["WordsCollection"] = None):
+        # a presorted collection is used as a view, without sorting or copying
+        self._collection = collection if presorted else sorted(collection, key=key)
+        self._keys = keys if keys is not None else (
+            self._collection if key is None else [key(word) for word in self._collection]
+        )
+        self._key = key
         self._reverse = reverse
-        self._position = len(self._collection) - 1 if reverse else 0
+        self._start = start
+        self._stop = len(self._collection) if stop is None else stop
+        self._position = self._stop - 1 if reverse else start
+        self._owner = owner
+        self._modifications = owner.modifications if owner is not None else 0
+
+    def _check_owner(self):
+        if self._owner is not None and self._owner.modifications != self._modifications:
+            raise RuntimeError("WordsCollection changed during iteration")
 
     def __iter__(self) -> "AlphabeticalOrderIterator":
         return self
 
     def __next__(self) -> str:
-        if not self._reverse and self._position >= len(self._collection):
+        if not self._reverse and self._position >= self._stop:
             raise StopIteration
-        if self._reverse and self._position < 0:
+        if self._reverse and self._position < self._start:
             raise StopIteration
+        self._check_owner()
 
         value = self._collection[self._position]
         self._position += -1 if self._reverse else 1
         return value
 
+    def seek(self, word: str) -> "AlphabeticalOrderIterator":
+        """
+        Move to the first word >= `word` (or, in reverse, the last word <= `word`)
+        Returns: self, so it can be used in a for loop directly
+        """
+        self._check_owner()
+        collation_key = word if self._key is None else self._key(word)
+        if self._reverse:
+            self._position = bisect_right(self._keys, collation_key, self._start, self._stop) - 1
+        else:
+            self._position = bisect_left(self._keys, collation_key, self._start, self._stop)
+        return self
 
-class WordsCollection:
-    """ A collection of words that provides iterators """
 
-    def __init__(self, collection: List[str]):
+class WordsCollection:
+    """
+    A collection of words that provides iterators.
+    The sorted index is built once, on the first iterator, and from then on
+    replaces the unsorted list and is kept up to date with bisect on
+    add_word/remove_word. `key` is a collation
+    function (e.g. str.casefold or locale.strxfrm) computed once per word.
+    Iterators are live views of the index; `modifications` counts the
+    add_word/remove_word calls so they can detect a change under them.
+    """
+
+    def __init__(self, collection: List[str], key: Optional[Callable[[str], object]] = None):
         self._collection = list(collection)
+        self._key = key
+        self._sorted = None
+        self._keys = None
+        self.modifications = 0
+
+    @classmethod
+    def from_sorted(cls, words: Sequence[str]) -> "WordsCollection":
+        """
+        Collection over an already sorted sequence (e.g. a WordStore) used
+        as the index as-is; a read-only sequence makes the collection read-only
+        """
+        collection = cls([])
+        collection._sorted = collection._keys = words
+        collection._collection = None
+        return collection
+
+    def _index(self) -> List[str]:
+        """ sorted words, building the index if needed """
+        if self._sorted is None:
+            if self._key is None:
+                self._sorted = sorted(self._collection)
+                self._keys = self._sorted
+            else:
+                pairs = sorted(((self._key(word), word) for word in self._collection),
+                               key=lambda pair: pair[0])
+                self._keys = [collation_key for collation_key, _ in pairs]
+                self._sorted = [word for _, word in pairs]
+            self._collection = None
+        return self._sorted
+
+    def _collation_key(self, word: str):
+        return word if self._key is None else self._key(word)
+
+    def add_word(self, word: str):
+        """ add a word, bisect-inserting it into the sorted index """
+        if self._sorted is None:
+            self._collection.append(word)
+            self.modifications += 1
+        elif not isinstance(self._sorted, list):
+            raise TypeError("collection is backed by a read-only sorted sequence")
+        else:
+            collation_key = self._collation_key(word)
+            position = bisect_right(self._keys, collation_key)
+            self._sorted.insert(position, word)
+            if self._keys is not self._sorted:
+                self._keys.insert(position, collation_key)
+            self.modifications += 1
+
+    def remove_word(self, word: str):
+        """ remove one occurrence of a word, raises ValueError if missing """
+        if self._sorted is None:
+            self._collection.remove(word)
+            self.modifications += 1
+        elif not isinstance(self._sorted, list):
+            raise TypeError("collection is backed by a read-only sorted sequence")
+        else:
+            collation_key = self._collation_key(word)
+            position = bisect_left(self._keys, collation_key)
+            end = bisect_right(self._keys, collation_key, position)
+            while position < end and self._sorted[position] != word:
+                position += 1
+            if position == end:
+                raise ValueError(f"{word!r} is not in the collection")
+            del self._sorted[position]
+            if self._keys is not self._sorted:
+                del self._keys[position]
+            self.modifications += 1
+
+    def __len__(self) -> int:
+        return len(self._collection if self._sorted is None else self._sorted)
+
+    def _view(self, reverse: bool = False, start: int = 0,
+              stop: Optional[int] = None) -> AlphabeticalOrderIterator:
+        return AlphabeticalOrderIterator(self._index(), reverse=reverse, presorted=True,
+                                         start=start, stop=stop, keys=self._keys, key=self._key,
+                                         owner=self)
 
     def get_iterator(self) -> AlphabeticalOrderIterator:
         """ Return an iterator in normal alphabetical order """
-        return AlphabeticalOrderIterator(self._collection)
+        return self._view()
 
     def get_reverse_iterator(self) -> AlphabeticalOrderIterator:
         """ Return an iterator in reverse alphabetical order """
-        return AlphabeticalOrderIterator(self._collection, reverse=True)
+        return self._view(reverse=True)
+
+    def iter_range(self, lo: Optional[str] = None, hi: Optional[str] = None,
+                   reverse: bool = False) -> AlphabeticalOrderIterator:
+        """ Return an iterator over words with lo <= word < hi (None is unbounded) """
+        self._index()
+        start = 0 if lo is None else bisect_left(self._keys, self._collation_key(lo))
+        stop = len(self._keys) if hi is None else \
+            bisect_left(self._keys, self._collation_key(hi), start)
+        return self._view(reverse, start, max(start, stop))
+
+    def iter_prefix(self, prefix: str, reverse: bool = False) -> AlphabeticalOrderIterator:
+        """
+        Return an iterator over the words starting with prefix. With a key
+        function, key(prefix) must be a prefix of key(word) (casefold, lower)
+        """
+        self._index()
+        low = self._collation_key(prefix)
+        start = bisect_left(self._keys, low)
+        high = _prefix_successor(low)
+        stop = len(self._keys) if high is None else bisect_left(self._keys, high, start)
+        return self._view(reverse, start, stop)
+
+
+def _prefix_successor(prefix: str) -> Optional[str]:
+    """ smallest string greater than every string starting with prefix """
+    prefix = prefix.rstrip(chr(0x10FFFF))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
 
 
 # Usage
@@ -50,3 +200,6 @@ if __name__ == "__main__":
 
     for word in collection.get_reverse_iterator():
         print(word)
+
+    for word in collection.iter_prefix("Ca"):
+        print(word)
@@ -0,0 +1,58 @@
+""" Spill and merge tests for the external merge sort Iterator """
+
+import random
+import unittest
+from unittest import mock
+
+import external_iterator
+from external_iterator import StreamingWordsCollection
+
+
+def sample_words(count: int) -> list:
+    rng = random.Random(7)
+    alphabet = "ab\\\nçé"
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randrange(0, 6)))
+            for _ in range(count)]
+
+
+class StreamingWordsCollectionTest(unittest.TestCase):
+    """ spilled runs must merge back into exactly sorted(words), both ways """
+
+    def check(self, words: list, **kwargs):
+        with StreamingWordsCollection(iter(words), **kwargs) as collection:
+            self.assertEqual(list(collection.get_iterator()), sorted(words, key=kwargs.get("key")))
+            self.assertEqual(list(collection.get_reverse_iterator()),
+                             sorted(words, key=kwargs.get("key"), reverse=True))
+            return collection.run_count
+
+    def test_in_memory(self):
+        self.assertEqual(self.check(sample_words(500)), 0)
+        self.assertEqual(self.check([]), 0)
+
+    def test_spilled_runs_with_escaped_words(self):
+        words = sample_words(1000)
+        with mock.patch.object(external_iterator, "BLOCK_SIZE", 7):
+            self.assertGreater(self.check(words, memory_budget=4000), 1)
+
+    def test_runs_are_merged_past_max_open_runs(self):
+        runs = self.check(sample_words(3000), memory_budget=2000, max_open_runs=4)
+        self.assertLess(runs, 4)
+
+    def test_key(self):
+        words = ["b", "A", "c", "B", "a"] * 50
+        with StreamingWordsCollection(words, memory_budget=500, key=str.lower) as collection:
+            forward = list(collection.get_iterator())
+            backward = list(collection.get_reverse_iterator())
+        self.assertGreater(collection.run_count, 1)
+        # ties may come out in any order, only the keys are sorted
+        self.assertEqual(sorted(forward), sorted(words))
+        self.assertEqual([word.lower() for word in forward], sorted(map(str.lower, words)))
+        self.assertEqual([word.lower() for word in backward],
+                         sorted(map(str.lower, words), reverse=True))
+
+    def test_empty_words_survive_a_spill(self):
+        self.check(["", "b", "", "a", ""] * 100, memory_budget=1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+""" Sort index and scan tests for the Iterator """
+
+import random
+import unittest
+
+from iterator import WordsCollection
+
+
+def reference(words: list, key=None) -> list:
+    return sorted(words, key=key)
+
+
+class SortIndexTest(unittest.TestCase):
+    """ the incrementally maintained index must always equal a fresh sort """
+
+    def test_add_and_remove_keep_the_index_sorted(self):
+        rng = random.Random(11)
+        for key in (None, str.casefold):
+            words = [rng.choice(["a", "B", "b", "c", "A"]) + str(rng.randrange(5))
+                     for _ in range(50)]
+            collection = WordsCollection(words, key=key)
+            self.assertEqual(list(collection.get_iterator()), reference(words, key))
+            for _ in range(500):
+                if words and rng.random() < 0.4:
+                    word = rng.choice(words)
+                    words.remove(word)
+                    collection.remove_word(word)
+                else:
+                    word = rng.choice(["a", "B", "b", "c", "A"]) + str(rng.randrange(5))
+                    words.append(word)
+                    collection.add_word(word)
+                forward = list(collection.get_iterator())
+                self.assertEqual([word if key is None else key(word) for word in forward],
+                                 [word if key is None else key(word)
+                                  for word in reference(words, key)])
+                self.assertEqual(sorted(forward), sorted(words))
+                self.assertEqual(list(collection.get_reverse_iterator()), forward[::-1])
+                self.assertEqual(len(collection), len(words))
+
+    def test_changes_before_the_first_iterator(self):
+        collection = WordsCollection(["b", "a"])
+        collection.add_word("c")
+        collection.remove_word("b")
+        self.assertEqual(list(collection.get_iterator()), ["a", "c"])
+        with self.assertRaises(ValueError):
+            collection.remove_word("b")
+
+    def test_iterators_see_modifications(self):
+        collection = WordsCollection(["a", "b", "c"])
+        iterator = collection.get_iterator()
+        self.assertEqual(next(iterator), "a")
+        collection.add_word("d")
+        with self.assertRaises(RuntimeError):
+            next(iterator)
+
+
+class ScanTest(unittest.TestCase):
+    """ prefix, range and seek must select exactly what a filter would """
+
+    WORDS = ["", "a", "ab", "abc", "abd", "b", "ba", "\U0010ffff", "a\U0010ffff", "a\U0010ffffz"]
+
+    def test_prefix(self):
+        collection = WordsCollection(self.WORDS)
+        for prefix in ("", "a", "ab", "abc", "c", "a\U0010ffff", "\U0010ffff"):
+            expected = sorted(word for word in self.WORDS if word.startswith(prefix))
+            self.assertEqual(list(collection.iter_prefix(prefix)), expected, prefix)
+            self.assertEqual(list(collection.iter_prefix(prefix, reverse=True)), expected[::-1])
+
+    def test_prefix_with_key(self):
+        collection = WordsCollection(["Apple", "apricot", "Banana", "APEX"], key=str.casefold)
+        self.assertEqual(sorted(collection.iter_prefix("AP")), ["APEX", "Apple", "apricot"])
+
+    def test_range(self):
+        collection = WordsCollection(self.WORDS)
+        for lo, hi in (("a", "b"), (None, "ab"), ("abd", None), ("b", "a"), (None, None)):
+            expected = sorted(word for word in self.WORDS
+                              if (lo is None or word >= lo) and (hi is None or word < hi))
+            self.assertEqual(list(collection.iter_range(lo, hi)), expected, (lo, hi))
+            self.assertEqual(list(collection.iter_range(lo, hi, reverse=True)), expected[::-1])
+
+    def test_seek(self):
+        collection = WordsCollection(self.WORDS)
+        self.assertEqual(list(collection.get_iterator().seek("abb")),
+                         sorted(word for word in self.WORDS if word >= "abb"))
+        self.assertEqual(list(collection.get_reverse_iterator().seek("abb")),
+                         sorted((word for word in self.WORDS if word <= "abb"), reverse=True))
+        scan = collection.iter_range("ab", "b").seek("a")
+        self.assertEqual(next(scan), "ab")
+
+
+if __name__ == "__main__":
+    unittest.main()
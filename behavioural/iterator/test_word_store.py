@@ -0,0 +1,63 @@
+""" On-disk format tests for the memory-mapped word store """
+
+import os
+import tempfile
+import unittest
+
+from word_store import WordStore, build_word_store, open_words_collection
+
+WORDS = ["pear", "", "apple", "ĉapelo", "apple", "a\nb", "😀", "banana"]
+
+
+class WordStoreTest(unittest.TestCase):
+    """ a store must read back exactly the sorted words it was built from """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.directory.name, "words.store")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_roundtrip(self):
+        self.assertEqual(build_word_store(WORDS, self.path), len(WORDS))
+        with WordStore(self.path) as store:
+            self.assertEqual(list(store), sorted(WORDS))
+            self.assertEqual(store[-1], sorted(WORDS)[-1])
+            self.assertEqual(store[1:3], sorted(WORDS)[1:3])
+            self.assertEqual(store.nbytes() % 8, 0)
+            with self.assertRaises(IndexError):
+                store[len(WORDS)]  # pylint: disable=pointless-statement
+
+    def test_presorted_and_empty(self):
+        build_word_store(sorted(WORDS), self.path, presorted=True)
+        with WordStore(self.path) as store:
+            self.assertEqual(list(store), sorted(WORDS))
+        build_word_store([], self.path)
+        with WordStore(self.path) as store:
+            self.assertEqual(len(store), 0)
+
+    def test_words_outlive_close(self):
+        build_word_store(WORDS, self.path)
+        store = WordStore(self.path)
+        words = list(store)
+        store.close()
+        self.assertEqual(words, sorted(WORDS))
+
+    def test_not_a_store(self):
+        with open(self.path, "wb") as file:
+            file.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            WordStore(self.path)
+
+    def test_collection_scans(self):
+        build_word_store(WORDS, self.path)
+        collection = open_words_collection(self.path)
+        self.assertEqual(list(collection.iter_prefix("ap")), ["apple", "apple"])
+        self.assertEqual(list(collection.iter_range("b", "q", reverse=True)), ["pear", "banana"])
+        with self.assertRaises(TypeError):
+            collection.add_word("cherry")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+""" Memory-mapped, offset-indexed on-disk word store for the Iterator """
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Iterable, Sequence
+
+from external_iterator import StreamingWordsCollection
+from iterator import WordsCollection
+
+MAGIC = b"WORDS\x00\x01\x00"
+# magic, word count, byte offset of the offset table
+TRAILER = struct.Struct("<8sQQ")
+
+
+class WordStore(Sequence[str]):
+    """
+    Read-only sorted words in one file: a contiguous UTF-8 blob followed by
+    an array('Q') table of count + 1 offsets and a fixed-size trailer.
+    Opening maps the file and reads the trailer only, so it takes the same
+    time for any size; words are decoded lazily from memoryview slices.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, table = TRAILER.unpack_from(
+            self._mmap, len(self._mmap) - TRAILER.size
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a word store")
+        self._view = memoryview(self._mmap)
+        self._offsets = self._view[table:table + (self._count + 1) * 8].cast("Q")
+        if sys.byteorder != "little":
+            # the table is stored little-endian; big-endian hosts pay for a copy
+            self._offsets = array("Q", self._offsets.tobytes())
+            self._offsets.byteswap()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("word store index out of range")
+        return str(self._view[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+    def nbytes(self) -> int:
+        """ size of the mapped file """
+        return len(self._mmap)
+
+    def close(self):
+        """ unmap the file, words already returned stay valid """
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "WordStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def build_word_store(words: Iterable[str], path: str, presorted: bool = False) -> int:
+    """
+    Write words to a store file in sorted order. Unsorted input is sorted
+    with StreamingWordsCollection, so it does not need to fit in memory.
+    Returns: number of words written
+    """
+    if presorted:
+        ordered = iter(words)
+    else:
+        streaming = StreamingWordsCollection(words, directory=os.path.dirname(path) or None)
+        ordered = streaming.get_iterator()
+    offsets = array("Q", [0])
+    try:
+        with open(path, "wb") as file:
+            position = 0
+            for word in ordered:
+                position += file.write(word.encode("utf-8"))
+                offsets.append(position)
+            padding = -position % 8
+            file.write(b"\0" * padding)
+            if sys.byteorder != "little":
+                offsets.byteswap()
+            file.write(offsets.tobytes())
+            file.write(TRAILER.pack(MAGIC, len(offsets) - 1, position + padding))
+    finally:
+        if not presorted:
+            streaming.close()
+    return len(offsets) - 1
+
+
+def open_words_collection(path: str) -> WordsCollection:
+    """ WordsCollection whose sorted index is a memory-mapped WordStore """
+    return WordsCollection.from_sorted(WordStore(path))
+
+
+# Usage: python word_store.py [WORDS.txt STORE.words]
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        with open(sys.argv[1], encoding="utf-8") as source:
+            written = build_word_store((line.rstrip("\n") for line in source), sys.argv[2])
+        print(f"wrote {written} words to {sys.argv[2]}")
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            STORE_PATH = os.path.join(directory, "names.words")
+            build_word_store(["John", "Alex", "Michael", "Carol"], STORE_PATH)
+            collection = open_words_collection(STORE_PATH)
+
+            for word in collection.get_iterator():
+                print(word)
+
+            for word in collection.get_reverse_iterator():
+                print(word)
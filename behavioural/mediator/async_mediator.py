@@ -0,0 +1,262 @@
+""" Asyncio Implementation of Mediator with bounded per-user inboxes """
+
+from __future__ import annotations
+import asyncio
+import time
+from collections import Counter, deque
+from enum import Enum
+
+from mediator import ChatUser, Mediator
+
+
+class OverflowPolicy(Enum):
+    """ What a full inbox does with a new message """
+    DROP_OLDEST = "drop-oldest"
+    BLOCK = "block"
+    DISCONNECT = "disconnect"
+
+
+class AsyncChatUser(ChatUser):
+    """
+    ChatUser with a bounded asyncio.Queue inbox drained by its own consumer
+    task. recieve() only enqueues, so the sender never waits for handle();
+    a slow recipient only fills its own inbox, then its overflow policy
+    applies. A full BLOCK inbox parks messages in a FIFO that a single
+    pump task feeds into the inbox, so parked messages keep their order.
+    BLOCK only slows the sender down through AsyncMediator.publish(),
+    which awaits the parked message. The synchronous path (send,
+    send_message, recieve) cannot wait: it parks at most `park_limit`
+    messages and drops any further ones, counted in `dropped`.
+    Users must be started inside a running event loop.
+    """
+    LAG_SAMPLES = 10_000
+
+    def __init__(self, name: str, inbox_size: int = 64,
+                 overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 park_limit: int = None):
+        super().__init__(name)
+        self.inbox = asyncio.Queue(inbox_size)
+        self.overflow = OverflowPolicy(overflow)
+        self.park_limit = inbox_size if park_limit is None else park_limit
+        self.connected = True
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.lags = deque(maxlen=self.LAG_SAMPLES)
+        self._consumer = None
+        self._blocked = deque()
+        self._pump_task = None
+        self._totals = Counter()
+
+    def offer(self, envelope: tuple) -> bool:
+        """
+        Enqueue (enqueued_at, msg) without waiting
+        Returns: False only when a BLOCK inbox is full and the caller must wait
+        """
+        if not self.connected:
+            return True
+        if self.overflow is OverflowPolicy.BLOCK and self._blocked:
+            return False  # keep order behind the messages already waiting
+        try:
+            self.inbox.put_nowait(envelope)
+        except asyncio.QueueFull:
+            if self.overflow is OverflowPolicy.BLOCK:
+                return False
+            if self.overflow is OverflowPolicy.DISCONNECT:
+                self.disconnect()
+                return True
+            self.inbox.get_nowait()
+            self.inbox.task_done()
+            self.dropped += 1
+            self._totals["dropped"] += 1
+            self.inbox.put_nowait(envelope)
+        self.max_depth = max(self.max_depth, self.inbox.qsize())
+        return True
+
+    def recieve(self, msg: str):
+        """
+        enqueue without waiting; a full BLOCK inbox parks the message, or
+        drops it once `park_limit` messages are parked already
+        """
+        envelope = (time.monotonic(), msg)
+        if self.offer(envelope):
+            return
+        if len(self._blocked) >= self.park_limit:
+            self.dropped += 1
+            self._totals["dropped"] += 1
+            return
+        self.park(envelope)
+
+    def park(self, envelope: tuple) -> asyncio.Future:
+        """
+        Queue an envelope behind the ones already waiting for a BLOCK inbox
+        Returns: Future resolved once the envelope is in the inbox
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self._blocked.append((envelope, waiter))
+        if self._pump_task is None:
+            self._pump_task = asyncio.get_running_loop().create_task(self._pump())
+        return waiter
+
+    async def _pump(self):
+        try:
+            while self._blocked:
+                envelope, waiter = self._blocked[0]
+                await self.inbox.put(envelope)
+                self._blocked.popleft()
+                self.max_depth = max(self.max_depth, self.inbox.qsize())
+                if not waiter.done():
+                    waiter.set_result(None)
+        finally:
+            self._pump_task = None
+
+    async def put(self, envelope: tuple):
+        """ enqueue, waiting for room when the inbox is full and blocking """
+        if not self.offer(envelope):
+            await self.park(envelope)
+
+    async def handle(self, msg: str):
+        """ process one message (Just show), override for real work """
+        print(f"{self.name} Recieving message {msg}")
+
+    async def _consume(self):
+        while True:
+            enqueued, msg = await self.inbox.get()
+            self.lags.append(time.monotonic() - enqueued)
+            try:
+                await self.handle(msg)
+                self.delivered += 1
+                self._totals["delivered"] += 1
+            except Exception:  # pylint: disable=broad-except
+                self.failed += 1
+                self._totals["failed"] += 1
+            finally:
+                self.inbox.task_done()
+
+    @property
+    def running(self) -> bool:
+        """ True while the consumer task is draining the inbox """
+        return self._consumer is not None and not self._consumer.done()
+
+    def start(self):
+        """ start the consumer task on the running loop """
+        if self._consumer is None and self.connected:
+            self._consumer = asyncio.get_running_loop().create_task(self._consume())
+
+    def stop(self):
+        """ cancel the consumer, queued messages stay in the inbox """
+        if self._consumer is not None:
+            self._consumer.cancel()
+            self._consumer = None
+
+    def disconnect(self):
+        """ drop the inbox and leave the mediator """
+        self.connected = False
+        self.stop()
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+        dropped = self.inbox.qsize() + len(self._blocked)
+        while not self.inbox.empty():
+            self.inbox.get_nowait()
+            self.inbox.task_done()
+        while self._blocked:
+            self._blocked.popleft()[1].cancel()
+        self.dropped += dropped
+        self._totals["dropped"] += dropped
+        if self.mediator is not None:
+            # the mediator may be iterating over its users right now
+            asyncio.get_running_loop().call_soon(self.mediator.remove_user, self)
+
+
+class AsyncMediator(Mediator):
+    """
+    Mediator for AsyncChatUser: broadcast, room and direct delivery only
+    enqueue. publish() is the awaiting variant that applies backpressure
+    from full BLOCK inboxes to the sender. Users count their deliveries,
+    drops and failures into the mediator's `totals` too, so metrics keep
+    them after a user disconnects or is removed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.totals = Counter()
+
+    def add_user(self, user: AsyncChatUser):
+        """ add a user and start its consumer """
+        super().add_user(user)
+        user._totals = self.totals  # pylint: disable=protected-access
+        user.start()
+
+    async def publish(self, msg: str, user: ChatUser):
+        """
+        broadcast like send_message, waiting for room in full BLOCK inboxes;
+        the message queues behind the ones already parked for each user
+        """
+        envelope = (time.monotonic(), msg)
+        waiting = [u.park(envelope) for u in tuple(self.users)
+                   if u is not user and not u.offer(envelope)]
+        if waiting:
+            # a recipient that disconnects meanwhile cancels its waiter
+            await asyncio.gather(*waiting, return_exceptions=True)
+
+    async def drain(self):
+        """
+        wait until every message sent so far has been handled, by the
+        users whose consumer runs; stopped users keep their inbox as it is
+        """
+        users = [user for user in self.users if user.running]
+        for user in users:
+            while user._blocked:  # pylint: disable=protected-access
+                waiters = [waiter for _, waiter in user._blocked]  # pylint: disable=protected-access
+                await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.gather(*(user.inbox.join() for user in users if user.running))
+
+    def close(self):
+        """ stop every consumer """
+        for user in self.users:
+            user.stop()
+
+    def metrics(self) -> dict:
+        """
+        Inbox depth and delivery lag (seconds, enqueue to handle) over the
+        current users; delivered, dropped and failed are cumulative
+        Returns: {"users", "depth", "max_depth", "delivered", "dropped",
+                  "failed", "p50", "p99", "max"}
+        """
+        users = list(self.users)
+        lags = sorted(lag for user in users for lag in user.lags)
+        report = {
+            "users": len(users),
+            "depth": sum(user.inbox.qsize() for user in users),
+            "max_depth": max((user.max_depth for user in users), default=0),
+            "delivered": self.totals["delivered"],
+            "dropped": self.totals["dropped"],
+            "failed": self.totals["failed"],
+        }
+        if lags:
+            report["p50"] = lags[len(lags) // 2]
+            report["p99"] = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+            report["max"] = lags[-1]
+        return report
+
+
+# Usage
+if __name__ == "__main__":
+    async def main():
+        """ the mediator demo, delivered through inboxes """
+        mediator = AsyncMediator()
+        alice = AsyncChatUser("Alice")
+        bob = AsyncChatUser("Bob", overflow=OverflowPolicy.BLOCK)
+        carol = AsyncChatUser("Carol")
+
+        mediator.add_user(alice)
+        mediator.add_user(bob)
+        mediator.add_user(carol)
+
+        carol.send("Hi Everyone!")
+        await mediator.drain()
+        mediator.close()
+        print({key: mediator.metrics()[key] for key in ("delivered", "dropped", "depth")})
+
+    asyncio.run(main())
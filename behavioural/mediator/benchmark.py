@@ -0,0 +1,200 @@
+""" Benchmarks for Mediator """
+
+import asyncio
+import os
+import random
+import time
+
+from async_mediator import AsyncChatUser, AsyncMediator, OverflowPolicy
+from mediator import ChatUser, Mediator
+from sharded_mediator import ShardedMediator
+
+
+class CountingUser(ChatUser):
+    """ ChatUser counting deliveries instead of printing them """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.received = 0
+
+    def recieve(self, msg: str):
+        self.received += 1
+
+
+def bench_room_fanout(users: int = 100_000, rooms: int = 1000, rooms_per_user: int = 3,
+                      messages: int = 2000):
+    """ room delivery via the room index vs scanning every user for members """
+    rng = random.Random(1)
+    mediator = Mediator()
+    members = [CountingUser(f"user-{i}") for i in range(users)]
+    memberships = {}
+
+    start = time.perf_counter()
+    for user in members:
+        mediator.add_user(user)
+        memberships[user] = set()
+        for room in rng.sample(range(rooms), rooms_per_user):
+            mediator.join(user, f"room-{room}")
+            memberships[user].add(f"room-{room}")
+    setup = time.perf_counter() - start
+    print(f"mediator: {users} users, {rooms} rooms, {rooms_per_user} rooms per user"
+          f" (registered in {setup:.2f} s)")
+
+    senders = [(rng.choice(members), f"room-{rng.randrange(rooms)}") for _ in range(messages)]
+
+    start = time.perf_counter()
+    for sender, room in senders[:messages // 20]:
+        for u in mediator.users:
+            if u is not sender and room in memberships[u]:
+                u.recieve("hello")
+    elapsed = (time.perf_counter() - start) / (messages // 20)
+    print(f"  scan all users    {elapsed * 1e6:10.1f} us/message")
+
+    delivered = sum(user.received for user in members)
+    start = time.perf_counter()
+    for sender, room in senders:
+        mediator.send_to_room("hello", sender, room)
+    elapsed = (time.perf_counter() - start) / messages
+    fanout = (sum(user.received for user in members) - delivered) / messages
+    print(f"  room index        {elapsed * 1e6:10.1f} us/message"
+          f" ({fanout:.0f} recipients on average)")
+
+    start = time.perf_counter()
+    for sender, _ in senders:
+        mediator.send_direct("hello", sender, members[rng.randrange(users)].name)
+    print(f"  direct message    {(time.perf_counter() - start) / messages * 1e6:10.2f} us/message")
+
+    churn = [(rng.choice(members), f"room-{rng.randrange(rooms)}") for _ in range(100_000)]
+    start = time.perf_counter()
+    for user, room in churn:
+        mediator.join(user, room)
+        mediator.leave(user, room)
+    elapsed = (time.perf_counter() - start) / len(churn)
+    print(f"  join+leave        {elapsed * 1e6:10.2f} us/pair")
+
+
+class BatchUser(CountingUser):
+    """ CountingUser opting into receive_many """
+
+    def receive_many(self, messages: tuple):
+        self.received += len(messages)
+
+
+def bench_send_many(members: int = 500, bursts: int = 200, burst: int = 100):
+    """ bursty room: one send_to_room per message vs send_many batches """
+    print(f"send_many: room of {members}, {bursts} bursts of {burst} messages")
+    texts = [f"message {i}" for i in range(burst)]
+    for label, user_type, batched in (("send_to_room", CountingUser, False),
+                                      ("send_many", CountingUser, True),
+                                      ("send_many+receive_many", BatchUser, True)):
+        mediator = Mediator()
+        users = [user_type(f"user-{i}") for i in range(members)]
+        for user in users:
+            mediator.add_user(user)
+            mediator.join(user, "room")
+        sender = users[0]
+        start = time.perf_counter()
+        for _ in range(bursts):
+            if batched:
+                mediator.send_many(texts, sender, "room")
+            else:
+                for text in texts:
+                    mediator.send_to_room(text, sender, "room")
+        elapsed = time.perf_counter() - start
+        assert sum(user.received for user in users) == bursts * burst * (members - 1)
+        print(f"  {label:<23} {bursts * burst / elapsed:10.0f} msg/s")
+
+
+class LoadUser(AsyncChatUser):
+    """ AsyncChatUser whose handler takes `delay` seconds """
+
+    def __init__(self, name: str, delay: float = 0.0, **kwargs):
+        super().__init__(name, **kwargs)
+        self.delay = delay
+
+    async def handle(self, msg: str):
+        await asyncio.sleep(self.delay)
+
+
+def bench_async_inboxes(users: int = 5000, slow: int = 50, rooms: int = 50,
+                        messages: int = 2000, burst: int = 100, inbox_size: int = 32):
+    """ bursty room traffic on one loop with a few slow recipients, per overflow policy """
+    print(f"async mediator: {users} users ({slow} slow), {rooms} rooms,"
+          f" {messages} messages in bursts of {burst}, inbox {inbox_size}")
+
+    async def run(policy: OverflowPolicy):
+        rng = random.Random(2)
+        mediator = AsyncMediator()
+        members = [LoadUser(f"user-{i}", delay=0.005 if i < slow else 0.0,
+                            inbox_size=inbox_size, overflow=policy) for i in range(users)]
+        for i, user in enumerate(members):
+            mediator.add_user(user)
+            mediator.join(user, f"room-{i % rooms}")
+
+        send_times = []
+        start = time.perf_counter()
+        for number in range(messages):
+            sender = rng.choice(members)
+            began = time.perf_counter()
+            mediator.send_to_room("hello", sender, f"room-{rng.randrange(rooms)}")
+            send_times.append(time.perf_counter() - began)
+            if number % burst == burst - 1:
+                await asyncio.sleep(0)
+        sent = time.perf_counter() - start
+        await mediator.drain()
+        total = time.perf_counter() - start
+        report = mediator.metrics()
+        mediator.close()
+        send_times.sort()
+        print(f"  {policy.value:<11} send p99 {send_times[int(len(send_times) * 0.99)] * 1e6:7.1f} us"
+              f"  sent in {sent:5.2f} s, drained in {total:5.2f} s"
+              f"  delivered {report['delivered']:>7} dropped {report['dropped']:>6}"
+              f"  users left {report['users']:>5}"
+              f"  max depth {report['max_depth']:>3}"
+              f"  lag p50 {report['p50'] * 1e3:6.1f} ms p99 {report['p99'] * 1e3:7.1f} ms")
+
+    for policy in OverflowPolicy:
+        asyncio.run(run(policy))
+
+
+def bench_sharded(users: int = 20_000, rooms: int = 100, messages: int = 5000,
+                  workers=(1, 2, 4, 8)):
+    """ room fan-out throughput with users sharded over worker processes """
+    print(f"sharded mediator: {users} users, {rooms} rooms, {messages} room messages"
+          f" ({os.cpu_count()} cpus available)")
+    rng = random.Random(3)
+    names = [f"user-{i}" for i in range(users)]
+    traffic = [(rng.choice(names), f"room-{rng.randrange(rooms)}") for _ in range(messages)]
+
+    mediator = Mediator()
+    members = [CountingUser(name) for name in names]
+    for i, user in enumerate(members):
+        mediator.add_user(user)
+        mediator.join(user, f"room-{i % rooms}")
+    start = time.perf_counter()
+    for sender, room in traffic:
+        mediator.send_to_room("hello", mediator._by_name[sender], room)  # pylint: disable=protected-access
+    elapsed = time.perf_counter() - start
+    print(f"  in process        {messages / elapsed:10.0f} msg/s"
+          f" {sum(user.received for user in members) / elapsed:12.0f} deliveries/s")
+
+    for transport in ("shm", "pipe"):
+        for count in workers:
+            sharded = ShardedMediator(workers=count, transport=transport).start()
+            for i, name in enumerate(names):
+                sharded.add_user(name)
+                sharded.join(name, f"room-{i % rooms}")
+            start = time.perf_counter()
+            for sender, room in traffic:
+                sharded.send_to_room("hello", sender, room)
+            delivered = sum(report["delivered"] for report in sharded.close())
+            elapsed = time.perf_counter() - start
+            print(f"  {transport:<4} {count} workers    {messages / elapsed:10.0f} msg/s"
+                  f" {delivered / elapsed:12.0f} deliveries/s")
+
+
+if __name__ == "__main__":
+    bench_room_fanout()
+    bench_send_many()
+    bench_async_inboxes()
+    bench_sharded()
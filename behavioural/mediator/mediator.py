@@ -2,6 +2,16 @@
 
 
 from __future__ import annotations
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+
+@dataclass(frozen=True, slots=True)
+class Message:
+    """ Immutable payload built once per message and shared by every recipient """
+    sender: str
+    text: str
+    room: Optional[str] = None
 
 
 class ChatUser:
@@ -20,26 +30,127 @@ class ChatUser:
         print(f"{self.name} Sending message {msg}")
         self.mediator.send_message(msg, self)
 
+    def send_to_room(self, room: str, msg: str):
+        """ send message to the members of a room """
+        print(f"{self.name} Sending message {msg} to {room}")
+        self.mediator.send_to_room(msg, self, room)
+
+    def send_many(self, msgs: Iterable[str], room: str = None):
+        """ send a burst of messages to everyone, or to a room, in one pass """
+        msgs = list(msgs)
+        for msg in msgs:
+            print(f"{self.name} Sending message {msg}" + (f" to {room}" if room else ""))
+        self.mediator.send_many(msgs, self, room)
+
+    def send_direct(self, name: str, msg: str):
+        """ send message to one user by name """
+        print(f"{self.name} Sending message {msg} to {name}")
+        self.mediator.send_direct(msg, self, name)
+
+    def join(self, room: str):
+        """ join a room of the mediator """
+        self.mediator.join(self, room)
+
+    def leave(self, room: str):
+        """ leave a room of the mediator """
+        self.mediator.leave(self, room)
+
     def recieve(self, msg: str):
         """ Recieve message (Just show) """
         print(f"{self.name} Recieving message {msg}")
 
+    def receive_many(self, messages: tuple):
+        """ Receive a batch of Message payloads, override to handle it in one call """
+        for message in messages:
+            self.recieve(message.text)
+
 
 class Mediator:
-    """ Implement Mediator class """
-    users = []
+    """
+    Implement Mediator class
+    Users, rooms and names are indexed per instance with dicts used as
+    ordered sets, so join/leave are O(1) and room or direct delivery costs
+    O(recipients) instead of a scan over every user. Deliveries iterate a
+    snapshot of the recipients, so a receiver may join, leave or remove
+    users while it is being called.
+    """
+
+    def __init__(self):
+        self.users = {}
+        self.rooms = {}
+        self._by_name = {}
+        self._memberships = {}
 
     def add_user(self, user: ChatUser):
         """ add a user to mediator """
-        self.users.append(user)
+        if user.name in self._by_name and self._by_name[user.name] is not user:
+            raise ValueError(f"a user named {user.name!r} is already registered")
+        self.users[user] = None
+        self._by_name[user.name] = user
+        self._memberships.setdefault(user, set())
         user.set_mediator(self)
 
+    def remove_user(self, user: ChatUser):
+        """ remove a user from the mediator and every room it joined """
+        for room in self._memberships.pop(user, ()):
+            self._discard(user, room)
+        self.users.pop(user, None)
+        if self._by_name.get(user.name) is user:
+            del self._by_name[user.name]
+
+    def join(self, user: ChatUser, room: str):
+        """ add a registered user to a room, creating the room on first join """
+        if user not in self.users:
+            raise KeyError(f"{user.name!r} is not registered with this mediator")
+        self.rooms.setdefault(room, {})[user] = None
+        self._memberships[user].add(room)
+
+    def leave(self, user: ChatUser, room: str):
+        """ remove a user from a room, empty rooms are dropped """
+        self._memberships.get(user, set()).discard(room)
+        self._discard(user, room)
+
+    def _discard(self, user: ChatUser, room: str):
+        members = self.rooms.get(room)
+        if members is not None:
+            members.pop(user, None)
+            if not members:
+                del self.rooms[room]
+
     def send_message(self, msg: str, user: ChatUser):
         """ send message in mediator instead of sender """
-        for u in self.users:
-            if u != user:
+        for u in tuple(self.users):
+            if u is not user:
+                u.recieve(msg)
+
+    def send_to_room(self, msg: str, user: ChatUser, room: str):
+        """ deliver to the other members of a room only """
+        for u in tuple(self.rooms.get(room, ())):
+            if u is not user:
                 u.recieve(msg)
 
+    def send_many(self, msgs: Iterable[str], user: ChatUser, room: str = None):
+        """
+        deliver a batch in one pass: each message becomes one Message shared
+        by all recipients, and each recipient gets one receive_many call
+        """
+        payload = tuple(Message(user.name, msg, room) for msg in msgs)
+        if not payload:
+            return
+        recipients = self.users if room is None else self.rooms.get(room, ())
+        for u in tuple(recipients):
+            if u is not user:
+                u.receive_many(payload)
+
+    def send_direct(self, msg: str, user: ChatUser, name: str):
+        """ deliver to a single user by name """
+        try:
+            recipient = self._by_name[name]
+        except KeyError:
+            raise KeyError(f"no user named {name!r}") from None
+        if recipient is not user:
+            recipient.recieve(msg)
+
 
 # Usage
 if __name__ == "__main__":
@@ -53,3 +164,9 @@ if __name__ == "__main__":
     mediator.add_user(carol)
 
     carol.send("Hi Everyone!")
+
+    alice.join("books")
+    carol.join("books")
+    carol.send_to_room("books", "Reading anything?")
+    bob.send_direct("Alice", "Hi Alice!")
+    alice.send_many(["Dune", "Emma"], "books")
@@ -0,0 +1,451 @@
+""" Multi-process sharded Mediator over shared-memory ring buffers """
+
+from __future__ import annotations
+import multiprocessing
+import os
+import struct
+import time
+import zlib
+from typing import List, Union
+
+from mediator import ChatUser, Mediator
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # platforms without _posixshmem
+    shared_memory = None
+
+ADD, REMOVE, JOIN, LEAVE, BROADCAST, ROOM, DIRECT, STOP = range(8)
+EVERY_SHARD = 0xFF
+# kind, shard (or EVERY_SHARD), sender, target and text lengths
+FRAME = struct.Struct("<BBHHI")
+POSITION = struct.Struct("<Q")
+RECORD = struct.Struct("<I")
+WRAP = 0xFFFFFFFF
+# delivery errors a worker keeps for its report, the rest are only counted
+MAX_ERRORS = 20
+
+
+class ShardWorkerError(RuntimeError):
+    """ Raised when a shard worker process exited while the mediator needs it """
+
+
+def encode_frame(kind: int, shard: int = EVERY_SHARD, sender: str = "",
+                 target: str = "", text: str = "") -> bytes:
+    """ one frame for every shard, the message text is encoded a single time """
+    sender_bytes, target_bytes, text_bytes = (
+        sender.encode("utf-8"), target.encode("utf-8"), text.encode("utf-8")
+    )
+    return b"".join((
+        FRAME.pack(kind, shard, len(sender_bytes), len(target_bytes), len(text_bytes)),
+        sender_bytes, target_bytes, text_bytes,
+    ))
+
+
+def decode_frame(frame: bytes) -> tuple:
+    """ (kind, shard, sender, target, text) """
+    kind, shard, sender_size, target_size, text_size = FRAME.unpack_from(frame)
+    start = FRAME.size
+    sender = str(frame[start:start + sender_size], "utf-8")
+    start += sender_size
+    target = str(frame[start:start + target_size], "utf-8")
+    start += target_size
+    return kind, shard, sender, target, str(frame[start:start + text_size], "utf-8")
+
+
+def shard_of(name: str, shards: int) -> int:
+    """ stable shard of a user name, the same in every process """
+    return zlib.crc32(name.encode("utf-8")) % shards
+
+
+class RingBuffer:
+    """
+    Single-producer, multi-consumer broadcast ring in shared memory. The
+    writer appends each length-prefixed frame once and every reader walks
+    the same bytes with its own cursor; the writer waits only when the
+    slowest reader is a full ring behind. Positions are monotonic byte
+    counts stored as aligned 8-byte words (atomic on the platforms that
+    provide shared_memory), published after the frame bytes are written.
+    While it waits, the writer calls `watch` (if given), which raises to
+    abort the wait when a reader can no longer make progress.
+    """
+    def __init__(self, readers: int, capacity: int = 1 << 22, name: str = None,
+                 watch=None):
+        self.readers = readers
+        self.watch = watch
+        self._data = (2 + readers) * POSITION.size
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=self._data + capacity)
+            self._shm.buf[:self._data] = bytes(self._data)
+            self._owner = True
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        self.capacity = self._shm.size - self._data
+        self._buffer = self._shm.buf
+
+    @property
+    def name(self) -> str:
+        """ shared memory name readers attach to """
+        return self._shm.name
+
+    def _position(self, slot: int) -> int:
+        return POSITION.unpack_from(self._buffer, slot * POSITION.size)[0]
+
+    def _set_position(self, slot: int, value: int):
+        POSITION.pack_into(self._buffer, slot * POSITION.size, value)
+
+    def publish(self, frame: bytes, shard: int = EVERY_SHARD):  # pylint: disable=unused-argument
+        """ append one frame for all readers, waiting while the ring is full """
+        size = RECORD.size + len(frame)
+        if size > self.capacity // 2:
+            raise ValueError(f"frame of {len(frame)} bytes does not fit the ring")
+        position = self._position(0)
+        offset = position % self.capacity
+        if self.capacity - offset < size:
+            end = position + self.capacity - offset  # skip to the start of the ring
+        else:
+            end = position
+        delay = 0.0
+        while end + size - min(self._position(2 + i) for i in range(self.readers)) \
+                > self.capacity:
+            if self.watch is not None:
+                self.watch()
+            time.sleep(delay)
+            delay = min(0.001, delay + 0.0001)
+        if end != position and self.capacity - offset >= RECORD.size:
+            RECORD.pack_into(self._buffer, self._data + offset, WRAP)
+        offset = end % self.capacity
+        start = self._data + offset
+        RECORD.pack_into(self._buffer, start, len(frame))
+        self._buffer[start + RECORD.size:start + size] = frame
+        self._set_position(0, end + size)
+
+    def read(self, reader: int) -> List[bytes]:
+        """ every frame published since the last read, copied out of the ring """
+        position, end = self._position(2 + reader), self._position(0)
+        frames = []
+        while position < end:
+            offset = position % self.capacity
+            if self.capacity - offset < RECORD.size:
+                position += self.capacity - offset
+                continue
+            length = RECORD.unpack_from(self._buffer, self._data + offset)[0]
+            if length == WRAP:
+                position += self.capacity - offset
+                continue
+            start = self._data + offset + RECORD.size
+            frames.append(bytes(self._buffer[start:start + length]))
+            position += RECORD.size + length
+        self._set_position(2 + reader, position)
+        return frames
+
+    def close(self):
+        """ detach, and remove the segment when this side created it """
+        self._buffer = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class PipeTransport:
+    """
+    Fallback when shared memory is unavailable: one pipe per shard. A frame
+    is still encoded once, but is copied into each pipe it is routed to.
+    Each receiving end ends up open in its own worker only (see attach and
+    release_readers), so a send to a worker that exited fails at once
+    with ShardWorkerError instead of blocking on a full pipe forever.
+    """
+    def __init__(self, readers: int, context, watch=None):
+        self.readers = readers
+        self.watch = watch
+        self._pipes = [context.Pipe(duplex=False) for _ in range(readers)]
+
+    def __getstate__(self):
+        # a spawned worker gets the pipes, not the parent's watch callback
+        return {**self.__dict__, "watch": None}
+
+    def publish(self, frame: bytes, shard: int = EVERY_SHARD):
+        """ send the frame to its shard, or to every shard """
+        shards = range(self.readers) if shard == EVERY_SHARD else (shard,)
+        for index in shards:
+            try:
+                self._pipes[index][1].send_bytes(frame)
+            except (BrokenPipeError, ConnectionResetError) as exc:
+                if self.watch is not None:
+                    self.watch()
+                raise ShardWorkerError(f"shard {index} worker closed its pipe") from exc
+
+    def attach(self, shard: int):
+        """
+        In a worker: close every inherited end but the shard's receiving one
+        Returns: the receiving end for the shard
+        """
+        for index, (receiver, sender) in enumerate(self._pipes):
+            sender.close()
+            if index != shard:
+                receiver.close()
+        return self._pipes[shard][0]
+
+    def release_readers(self):
+        """ in the parent, once every worker started: close the receiving ends """
+        for receiver, _ in self._pipes:
+            receiver.close()
+
+    def close(self):
+        """ close the sending ends """
+        for receiver, sender in self._pipes:
+            receiver.close()
+            sender.close()
+
+
+class ShardUser(ChatUser):
+    """ ChatUser living in a worker process, counts what it receives """
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.received = 0
+
+    def recieve(self, msg: str):
+        self.received += 1
+
+
+def _deliver(frames, shard: int, mediator: Mediator, user_factory, report: dict) -> bool:
+    """
+    apply frames to the shard's local mediator, False once stopped.
+    A frame that fails is counted in report["failed"], its error kept in
+    report["errors"] (up to MAX_ERRORS), and the next frame is applied.
+    """
+    for frame in frames:
+        if frame[1] != EVERY_SHARD and frame[1] != shard:
+            continue  # routed to another shard, skip without decoding
+        try:
+            if not _apply(decode_frame(frame), mediator, user_factory):
+                return False
+        except Exception as exc:  # pylint: disable=broad-except
+            report["failed"] += 1
+            if len(report["errors"]) < MAX_ERRORS:
+                report["errors"].append(repr(exc))
+    return True
+
+
+def _apply(frame: tuple, mediator: Mediator, user_factory) -> bool:
+    kind, _, sender, target, text = frame
+    if kind == BROADCAST:
+        mediator.send_message(text, mediator._by_name.get(sender))  # pylint: disable=protected-access
+    elif kind == ROOM:
+        mediator.send_to_room(text, mediator._by_name.get(sender), target)  # pylint: disable=protected-access
+    elif kind == DIRECT:
+        mediator.send_direct(text, None, target)
+    elif kind == JOIN:
+        mediator.join(mediator._by_name[sender], target)  # pylint: disable=protected-access
+    elif kind == LEAVE:
+        mediator.leave(mediator._by_name[sender], target)  # pylint: disable=protected-access
+    elif kind == ADD:
+        mediator.add_user(user_factory(sender))
+    elif kind == REMOVE:
+        mediator.remove_user(mediator._by_name[sender])  # pylint: disable=protected-access
+    elif kind == STOP:
+        return False
+    return True
+
+
+def _worker(shard: int, transport, ring_name: str, readers: int, user_factory, results):
+    """ worker process: owns the users of one shard and fans messages out locally """
+    mediator = Mediator()
+    report = {"shard": shard, "failed": 0, "errors": []}
+    running = True
+    if ring_name is None:
+        transport = transport.attach(shard)
+        while running:
+            frames = [transport.recv_bytes()]
+            while transport.poll():
+                frames.append(transport.recv_bytes())
+            running = _deliver(frames, shard, mediator, user_factory, report)
+    else:
+        ring = RingBuffer(readers, name=ring_name)
+        idle = 0
+        while running:
+            frames = ring.read(shard)
+            if frames:
+                idle = 0
+                running = _deliver(frames, shard, mediator, user_factory, report)
+            else:
+                idle += 1
+                time.sleep(0 if idle < 100 else 0.0005)
+        ring.close()
+    report["users"] = len(mediator.users)
+    report["delivered"] = sum(getattr(user, "received", 0) for user in mediator.users)
+    results.send(report)
+    results.close()
+
+
+class ShardedMediator:
+    """
+    Mediator partitioning users across worker processes by a stable hash of
+    their name. Broadcast and room messages are encoded once and published
+    once; each worker fans out to its local users, handing every recipient
+    the same decoded string. Membership changes travel on the same ordered
+    stream, routed to the owning shard. A frame that fails in a worker is
+    reported by close() and does not stop the shard. A worker that exits
+    makes the next publish that needs it raise ShardWorkerError instead of
+    waiting forever: on the shm transport once the ring is full, on the
+    pipe transport as soon as a frame is sent to its pipe.
+    """
+    def __init__(self, workers: int = None, capacity: int = 1 << 22,
+                 transport: str = "shm", user_factory=ShardUser):
+        self.workers = workers or os.cpu_count() or 1
+        if self.workers >= EVERY_SHARD:
+            raise ValueError(f"at most {EVERY_SHARD - 1} workers")
+        self.capacity = capacity
+        self.transport = transport if shared_memory is not None else "pipe"
+        self.user_factory = user_factory
+        self.users = {}
+        self._processes = []
+        self._results = []
+        self._transport = None
+
+    def start(self) -> "ShardedMediator":
+        """ create the transport and start the workers """
+        context = multiprocessing.get_context()
+        if self.transport == "shm":
+            self._transport = RingBuffer(self.workers, self.capacity,
+                                         watch=self._check_workers)
+        else:
+            self._transport = PipeTransport(self.workers, context, watch=self._check_workers)
+        for shard in range(self.workers):
+            receiver, sender = context.Pipe(duplex=False)
+            if self.transport == "shm":
+                args = (shard, None, self._transport.name, self.workers,
+                        self.user_factory, sender)
+            else:
+                args = (shard, self._transport, None, self.workers,
+                        self.user_factory, sender)
+            process = context.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            sender.close()
+            self._processes.append(process)
+            self._results.append(receiver)
+        if self.transport != "shm":
+            self._transport.release_readers()
+        return self
+
+    def _check_workers(self):
+        """ raise ShardWorkerError if a worker process has exited """
+        for shard, process in enumerate(self._processes):
+            if not process.is_alive():
+                raise ShardWorkerError(
+                    f"shard {shard} worker exited with code {process.exitcode}"
+                )
+
+    @staticmethod
+    def _name(user: Union[ChatUser, str]) -> str:
+        return user if isinstance(user, str) else user.name
+
+    def _publish(self, kind: int, user, target: str = "", text: str = "",
+                 routed: bool = True):
+        name = self._name(user)
+        shard = self.users[name] if routed else EVERY_SHARD
+        self._transport.publish(encode_frame(kind, shard, name, target, text), shard)
+
+    def add_user(self, user: Union[ChatUser, str]):
+        """ add a user (a ChatUser or a name) to the shard owning its name """
+        name = self._name(user)
+        if name in self.users:
+            raise ValueError(f"a user named {name!r} is already registered")
+        self.users[name] = shard_of(name, self.workers)
+        if isinstance(user, ChatUser):
+            user.set_mediator(self)
+        self._publish(ADD, name)
+
+    def remove_user(self, user: Union[ChatUser, str]):
+        """ remove a user from its shard """
+        self._publish(REMOVE, user)
+        del self.users[self._name(user)]
+
+    def join(self, user: Union[ChatUser, str], room: str):
+        """ add a user to a room """
+        self._publish(JOIN, user, room)
+
+    def leave(self, user: Union[ChatUser, str], room: str):
+        """ remove a user from a room """
+        self._publish(LEAVE, user, room)
+
+    def send_message(self, msg: str, user: Union[ChatUser, str]):
+        """ broadcast to every user but the sender """
+        self._publish(BROADCAST, user, text=msg, routed=False)
+
+    def send_to_room(self, msg: str, user: Union[ChatUser, str], room: str):
+        """ deliver to the other members of a room, on every shard """
+        self._publish(ROOM, user, room, msg, routed=False)
+
+    def send_many(self, msgs, user: Union[ChatUser, str], room: str = None):
+        """ publish a batch of broadcast or room messages """
+        for msg in msgs:
+            if room is None:
+                self.send_message(msg, user)
+            else:
+                self.send_to_room(msg, user, room)
+
+    def send_direct(self, msg: str, user: Union[ChatUser, str], name: str):
+        """ deliver to a single user, only its shard sees the frame """
+        self._transport.publish(
+            encode_frame(DIRECT, self.users[name], self._name(user), name, msg),
+            self.users[name],
+        )
+
+    def close(self) -> list:
+        """
+        Stop the workers after they handled everything published so far.
+        A worker that exited early is reported with its exit code; if the
+        stop frame cannot be published the remaining workers are terminated.
+        Returns: per-shard {"shard", "users", "delivered", "failed", "errors"}
+        """
+        if self._transport is None:
+            return []
+        try:
+            self._transport.publish(encode_frame(STOP))
+        except ShardWorkerError:
+            for process in self._processes:
+                process.terminate()
+        reports = []
+        for shard, (process, results) in enumerate(zip(self._processes, self._results)):
+            try:
+                reports.append(results.recv())
+            except EOFError:
+                process.join()
+                reports.append({
+                    "shard": shard, "users": 0, "delivered": 0, "failed": 0,
+                    "errors": [f"worker exited with code {process.exitcode}"],
+                })
+        for process in self._processes:
+            process.join()
+        for results in self._results:
+            results.close()
+        self._transport.close()
+        self._transport, self._processes, self._results = None, [], []
+        return reports
+
+    def __enter__(self) -> "ShardedMediator":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Usage
+if __name__ == "__main__":
+    for TRANSPORT in ("shm", "pipe"):
+        with ShardedMediator(workers=2, transport=TRANSPORT) as mediator:
+            alice = ChatUser("Alice")
+            bob = ChatUser("Bob")
+            carol = ChatUser("Carol")
+
+            mediator.add_user(alice)
+            mediator.add_user(bob)
+            mediator.add_user(carol)
+            mediator.join(alice, "books")
+            mediator.join(carol, "books")
+
+            carol.send("Hi Everyone!")
+            mediator.send_to_room("Reading anything?", carol, "books")
+            print(TRANSPORT, sorted(mediator.close(), key=lambda report: report["shard"]))
@@ -0,0 +1,79 @@
+""" Backpressure and shutdown tests for the asyncio Mediator """
+
+import asyncio
+import unittest
+from unittest import mock
+
+from async_mediator import AsyncChatUser, AsyncMediator, OverflowPolicy
+
+
+class RecordingUser(AsyncChatUser):
+    """ keeps what it handled instead of printing it """
+    def __init__(self, name: str, **kwargs):
+        super().__init__(name, **kwargs)
+        self.handled = []
+
+    async def handle(self, msg: str):
+        self.handled.append(msg)
+
+
+class AsyncMediatorTest(unittest.IsolatedAsyncioTestCase):
+    """ BLOCK inboxes must bound memory and never hang drain() or publish() """
+
+    def setUp(self):
+        self.mediator = AsyncMediator()
+        self.sender = RecordingUser("sender")
+        self.slow = RecordingUser("slow", inbox_size=2, overflow=OverflowPolicy.BLOCK)
+
+    async def asyncSetUp(self):
+        self.mediator.add_user(self.sender)
+        self.mediator.add_user(self.slow)
+
+    async def asyncTearDown(self):
+        self.mediator.close()
+
+    async def test_publish_waits_and_keeps_order(self):
+        self.slow.stop()
+        published = asyncio.ensure_future(asyncio.gather(
+            *(self.mediator.publish(str(i), self.sender) for i in range(6))))
+        await asyncio.sleep(0)
+        self.assertFalse(published.done())
+        self.slow.start()
+        await asyncio.wait_for(published, 1)
+        await asyncio.wait_for(self.mediator.drain(), 1)
+        self.assertEqual(self.slow.handled, [str(i) for i in range(6)])
+
+    async def test_publish_survives_a_disconnect(self):
+        self.slow.stop()
+        published = asyncio.ensure_future(asyncio.gather(
+            *(self.mediator.publish(str(i), self.sender) for i in range(5))))
+        await asyncio.sleep(0)
+        self.slow.disconnect()
+        await asyncio.wait_for(published, 1)
+        self.assertEqual(self.slow.dropped, 5)
+
+    async def test_sync_sends_are_capped(self):
+        self.slow.stop()
+        with mock.patch("builtins.print"):
+            for i in range(10):
+                self.sender.send(str(i))
+        # two in the inbox, park_limit (= inbox_size) parked, the rest dropped
+        self.assertEqual(self.slow.inbox.qsize(), 2)
+        self.assertEqual(len(self.slow._blocked), 2)  # pylint: disable=protected-access
+        self.assertEqual(self.slow.dropped, 6)
+        self.assertEqual(self.mediator.totals["dropped"], 6)
+
+    async def test_drain_skips_stopped_users(self):
+        self.slow.stop()
+        with mock.patch("builtins.print"):
+            for i in range(4):
+                self.sender.send(str(i))
+        await asyncio.wait_for(self.mediator.drain(), 1)
+        self.assertEqual(self.slow.inbox.qsize(), 2)
+        self.slow.start()
+        await asyncio.wait_for(self.mediator.drain(), 1)
+        self.assertEqual(self.slow.handled, ["0", "1", "2", "3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
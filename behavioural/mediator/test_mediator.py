@@ -0,0 +1,123 @@
+""" Routing and batch delivery tests for the Mediator """
+
+import unittest
+
+from mediator import ChatUser, Mediator
+
+
+class Inbox(ChatUser):
+    """ keeps what it receives instead of printing it """
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.received = []
+
+    def recieve(self, msg: str):
+        self.received.append(msg)
+
+
+class Kicker(Inbox):
+    """ removes another user while a message is being delivered """
+    victim = None
+
+    def recieve(self, msg: str):
+        super().recieve(msg)
+        self.mediator.remove_user(self.victim)
+
+
+class MediatorRoutingTest(unittest.TestCase):
+    """ rooms and names must route to exactly the current recipients """
+
+    def setUp(self):
+        self.mediator = Mediator()
+        self.alice, self.bob, self.carol = Inbox("alice"), Inbox("bob"), Inbox("carol")
+        for user in (self.alice, self.bob, self.carol):
+            self.mediator.add_user(user)
+
+    def test_rooms(self):
+        self.mediator.join(self.alice, "books")
+        self.mediator.join(self.bob, "books")
+        self.mediator.send_to_room("hi", self.alice, "books")
+        self.mediator.send_to_room("nobody", self.alice, "films")
+        self.assertEqual((self.alice.received, self.bob.received, self.carol.received),
+                         ([], ["hi"], []))
+        self.mediator.leave(self.bob, "books")
+        self.mediator.leave(self.alice, "books")
+        self.assertNotIn("books", self.mediator.rooms)
+
+    def test_remove_user_leaves_every_room(self):
+        for room in ("a", "b"):
+            self.mediator.join(self.bob, room)
+            self.mediator.join(self.carol, room)
+        self.mediator.remove_user(self.bob)
+        self.assertEqual({room: list(members) for room, members in self.mediator.rooms.items()},
+                         {"a": [self.carol], "b": [self.carol]})
+        with self.assertRaises(KeyError):
+            self.mediator.send_direct("hi", self.alice, "bob")
+        with self.assertRaises(KeyError):
+            self.mediator.join(self.bob, "a")
+
+    def test_direct_and_duplicate_names(self):
+        self.mediator.send_direct("psst", self.alice, "carol")
+        self.mediator.send_direct("self", self.alice, "alice")
+        self.assertEqual((self.alice.received, self.carol.received), ([], ["psst"]))
+        with self.assertRaises(ValueError):
+            self.mediator.add_user(Inbox("alice"))
+        self.mediator.add_user(self.alice)  # re-adding the same user is fine
+
+    def test_recipient_may_change_membership_during_delivery(self):
+        kicker = Kicker("kicker")
+        kicker.victim = self.carol
+        self.mediator.add_user(kicker)
+        for user in (self.alice, kicker, self.carol):
+            self.mediator.join(user, "room")
+        self.mediator.send_to_room("one", self.alice, "room")
+        self.mediator.send_to_room("two", self.alice, "room")
+        self.assertEqual(kicker.received, ["one", "two"])
+        self.assertEqual(self.carol.received, ["one"])
+
+
+class Batches(Inbox):
+    """ records each receive_many call as one batch """
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.batches = []
+
+    def receive_many(self, messages: tuple):
+        self.batches.append(messages)
+
+
+class SendManyTest(unittest.TestCase):
+    """ a burst is one call per recipient, sharing one payload """
+
+    def setUp(self):
+        self.mediator = Mediator()
+        self.sender, self.first, self.second = Inbox("sender"), Batches("a"), Batches("b")
+        for user in (self.sender, self.first, self.second):
+            self.mediator.add_user(user)
+
+    def test_one_shared_payload(self):
+        self.mediator.send_many(["x", "y"], self.sender)
+        self.assertEqual(len(self.first.batches), 1)
+        self.assertIs(self.first.batches[0], self.second.batches[0])
+        self.assertEqual([(m.sender, m.text, m.room) for m in self.first.batches[0]],
+                         [("sender", "x", None), ("sender", "y", None)])
+        self.assertEqual(self.sender.received, [])
+
+    def test_room_and_empty_bursts(self):
+        self.mediator.join(self.sender, "room")
+        self.mediator.join(self.first, "room")
+        self.mediator.send_many(iter(["x"]), self.sender, "room")
+        self.mediator.send_many([], self.sender, "room")
+        self.assertEqual(len(self.first.batches), 1)
+        self.assertEqual(self.first.batches[0][0].room, "room")
+        self.assertEqual(self.second.batches, [])
+
+    def test_default_receive_many_falls_back_to_recieve(self):
+        listener = Inbox("plain")
+        self.mediator.add_user(listener)
+        self.mediator.send_many(["x", "y"], self.sender)
+        self.assertEqual(listener.received, ["x", "y"])
+
+
+if __name__ == "__main__":
+    unittest.main()
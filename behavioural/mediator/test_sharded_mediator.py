@@ -0,0 +1,57 @@
+""" Dead-worker tests for the sharded Mediator """
+
+import multiprocessing
+import os
+import signal
+import threading
+import unittest
+from unittest import mock
+
+from sharded_mediator import ShardedMediator, ShardWorkerError, shared_memory
+
+TIMEOUT = 30
+
+
+class DeadWorkerTest(unittest.TestCase):
+    """ publishing to a SIGKILLed worker must raise, never block forever """
+
+    def publish_until_error(self, transport: str, context=None):
+        mediator = ShardedMediator(workers=2, capacity=1 << 16, transport=transport)
+        with mock.patch("multiprocessing.get_context",
+                        return_value=context or multiprocessing.get_context()):
+            mediator.start()
+        for name in ("alice", "bob", "carol"):
+            mediator.add_user(name)
+        victim = mediator._processes[0]  # pylint: disable=protected-access
+        os.kill(victim.pid, signal.SIGKILL)
+        victim.join()
+        outcome = []
+
+        def publish():
+            try:
+                for _ in range(100_000):
+                    mediator.send_message("x" * 200, "alice")
+            except ShardWorkerError as exc:
+                outcome.append(exc)
+        publisher = threading.Thread(target=publish, daemon=True)
+        publisher.start()
+        publisher.join(TIMEOUT)
+        self.assertFalse(publisher.is_alive(), "publish blocked on a dead worker")
+        self.assertEqual(len(outcome), 1)
+        reports = sorted(mediator.close(), key=lambda report: report["shard"])
+        self.assertIn("exited with code", reports[0]["errors"][0])
+        return outcome[0]
+
+    def test_pipe(self):
+        self.publish_until_error("pipe")
+
+    def test_pipe_spawn(self):
+        self.publish_until_error("pipe", multiprocessing.get_context("spawn"))
+
+    @unittest.skipIf(shared_memory is None, "shared memory is not available")
+    def test_shm(self):
+        self.publish_until_error("shm")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+""" Background snapshotting for the Memento """
+
+import pickle
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from memento import CareTaker, Originator
+from persistent_memento import PersistentMap, PersistentVector, freeze, thaw
+
+IMMUTABLE = (str, bytes, int, float, complex, bool, type(None), PersistentMap, PersistentVector)
+
+
+@dataclass(frozen=True, slots=True)
+class SerializedMemento:
+    """ Memento holding a pickled state; every read of `state` is a fresh deep copy """
+    payload: bytes
+
+    @property
+    def state(self):
+        """ the state, unpickled """
+        return pickle.loads(self.payload)
+
+
+def is_frozen(state) -> bool:
+    """
+    True when the state cannot change under a background snapshot: scalars,
+    persistent structures (their values are trusted to be frozen as well,
+    as freeze() makes them) and tuples or frozensets of frozen values
+    """
+    if isinstance(state, IMMUTABLE):
+        return True
+    if isinstance(state, (tuple, frozenset)):
+        return all(is_frozen(item) for item in state)
+    return False
+
+
+class BackgroundSnapshotter:
+    """
+    Takes snapshots of an Originator off the caller's thread. A frozen
+    state (see is_frozen, e.g. one built with freeze()) is handed to a
+    single worker thread as-is, which pickles it and saves a
+    SerializedMemento into the caretaker, in call order. Any other state
+    (a plain dict or list, say) may still be mutated in place once
+    snapshot() returns, so it is pickled on the caller's thread and only
+    stored by the worker: the caller still pays the full serialization
+    cost. Build the state with freeze() to move that cost off the caller.
+    snapshot() returns a concurrent.futures.Future, which asyncio code can
+    await through asyncio.wrap_future().
+    """
+    def __init__(self, caretaker: CareTaker = None):
+        self.caretaker = caretaker if caretaker is not None else CareTaker()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot")
+        self._lock = threading.Lock()
+        self._last = None
+
+    def snapshot(self, originator: Originator) -> Future:
+        """
+        Queue a snapshot of the originator's current state; pickles it
+        right here unless the state is frozen (see is_frozen)
+        Returns: Future resolving to the stored SerializedMemento
+        """
+        state = originator.state
+        if is_frozen(state):
+            self._last = self._executor.submit(self._store, state)
+        else:
+            payload = pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+            self._last = self._executor.submit(self._save, SerializedMemento(payload))
+        return self._last
+
+    def _store(self, state) -> SerializedMemento:
+        return self._save(SerializedMemento(pickle.dumps(state, pickle.HIGHEST_PROTOCOL)))
+
+    def _save(self, memento: SerializedMemento) -> SerializedMemento:
+        with self._lock:
+            self.caretaker.save_state(memento)
+        return memento
+
+    def flush(self):
+        """ wait until every queued snapshot is stored """
+        if self._last is not None:
+            self._last.result()
+
+    def restore(self, index: int):
+        """
+        Restore a stored snapshot, safe while snapshots are being written
+        Args: index: int
+        Returns: Memento
+        """
+        with self._lock:
+            return self.caretaker.restore(index)
+
+    def close(self):
+        """ store the queued snapshots and stop the worker """
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "BackgroundSnapshotter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Usage
+if __name__ == "__main__":
+    # a frozen state is pickled by the worker; new versions replace it
+    originator = Originator(freeze({"title": "draft", "lines": ["initial-state"]}))
+    with BackgroundSnapshotter() as snapshotter:
+        first = snapshotter.snapshot(originator)
+
+        originator.state = originator.state.set(
+            "lines", originator.state["lines"].append("state-1")
+        )
+        snapshotter.snapshot(originator)
+
+        originator.state = originator.state.set("title", "final")
+        snapshotter.snapshot(originator)
+        print(f"first snapshot stored: {thaw(first.result().state)}")
+
+        snapshotter.flush()
+        for index in range(3):
+            originator.restore_memento(snapshotter.restore(index))
+            print(f"Current state is : {thaw(originator.state)}")
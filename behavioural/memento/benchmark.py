@@ -0,0 +1,268 @@
+""" Benchmarks for Memento """
+
+import copy
+import os
+import pickle
+import random
+import string
+import tempfile
+import time
+import tracemalloc
+
+from dataclasses import dataclass
+
+from background_memento import BackgroundSnapshotter, SerializedMemento
+from delta_memento import DeltaCareTaker
+from memento import CareTaker, Memento, Originator
+from persistent_memento import freeze
+from spilling_caretaker import SpillingCareTaker
+from undo_caretaker import UndoCareTaker
+
+
+def edit_session(size: int, saves: int, seed: int = 1):
+    """ document states of `size` characters, each a small edit of the previous one """
+    rng = random.Random(seed)
+    vocabulary = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+                  for _ in range(2000)]
+    state = ""
+    while len(state) < size:
+        state += " ".join(rng.choices(vocabulary, k=12)) + ".\n"
+    state = state[:size]
+    for _ in range(saves):
+        position = rng.randrange(len(state))
+        inserted = "".join(rng.choices(string.ascii_letters, k=rng.randint(0, 40)))
+        state = state[:position] + inserted + state[position + rng.randint(0, 20):]
+        yield state
+
+
+def _percentile(samples: list, fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def bench_delta_caretaker(size: int = 100_000, saves: int = 1000, restores: int = 500):
+    """ full snapshots vs delta-encoded history: memory and restore latency """
+    print(f"delta caretaker: {size // 1000} KB document, {saves} saves")
+    rng = random.Random(2)
+    indexes = [rng.randrange(saves) for _ in range(restores)]
+    for label, make_caretaker in (("full snapshots", CareTaker),
+                                  ("delta, keyframe 16", lambda: DeltaCareTaker(16)),
+                                  ("delta, keyframe 64", lambda: DeltaCareTaker(64))):
+        originator = Originator("")
+        tracemalloc.start()
+        caretaker = make_caretaker()
+        start = time.perf_counter()
+        for state in edit_session(size, saves):
+            originator.state = state
+            caretaker.save_state(originator.create_memento())
+        save = (time.perf_counter() - start) / saves
+        del state
+        originator.state = ""
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        latencies = []
+        for index in indexes:
+            start = time.perf_counter()
+            originator.restore_memento(caretaker.restore(index))
+            latencies.append(time.perf_counter() - start)
+        print(f"  {label:<19} {memory / 2 ** 20:8.1f} MiB  save {save * 1e6:7.1f} us"
+              f"  restore p50 {_percentile(latencies, 0.5) * 1e6:7.1f} us"
+              f" max {max(latencies) * 1e6:7.1f} us")
+
+
+def bench_spilling_caretaker(size: int = 100_000, saves: int = 2000, restores: int = 200):
+    """ in-memory history vs bounded hot set spilling compressed records to disk """
+    print(f"spilling caretaker: {size // 1000} KB document, {saves} saves, 16 hot")
+    rng = random.Random(4)
+    indexes = [rng.randrange(saves - 16) for _ in range(restores)]
+    with tempfile.TemporaryDirectory() as directory:
+        for label, make_caretaker in (
+                ("in memory", CareTaker),
+                ("spill, raw", lambda: SpillingCareTaker(
+                    os.path.join(directory, "raw.log"), compression=None)),
+                ("spill, zlib", lambda: SpillingCareTaker(
+                    os.path.join(directory, "zlib.log"), compression="zlib")),
+                ("spill, lzma", lambda: SpillingCareTaker(
+                    os.path.join(directory, "lzma.log"), compression="lzma", level=1)),
+                ("zlib, last 200 + 1/10", lambda: SpillingCareTaker(
+                    os.path.join(directory, "thin.log"), keep_last=200, thin_every=10))):
+            originator = Originator("")
+            tracemalloc.start()
+            caretaker = make_caretaker()
+            start = time.perf_counter()
+            for state in edit_session(size, saves):
+                originator.state = state
+                caretaker.save_state(originator.create_memento())
+            save = (time.perf_counter() - start) / saves
+            del state
+            originator.state = ""
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            if isinstance(caretaker, SpillingCareTaker) and caretaker.keep_last is not None:
+                caretaker.compact()
+
+            latencies = []
+            for index in indexes:
+                if isinstance(caretaker, SpillingCareTaker) and \
+                        index not in caretaker._spilled:  # pylint: disable=protected-access
+                    index -= index % 10
+                start = time.perf_counter()
+                originator.restore_memento(caretaker.restore(index))
+                latencies.append(time.perf_counter() - start)
+            disk = caretaker.disk_bytes() if isinstance(caretaker, SpillingCareTaker) else 0
+            print(f"  {label:<22} {memory / 2 ** 20:7.1f} MiB RAM {disk / 2 ** 20:7.1f} MiB disk"
+                  f"  save {save * 1e6:7.1f} us"
+                  f"  restore p50 {_percentile(latencies, 0.5) * 1e6:7.1f} us"
+                  f" p99 {_percentile(latencies, 0.99) * 1e6:7.1f} us")
+            if isinstance(caretaker, SpillingCareTaker):
+                caretaker.close()
+
+
+@dataclass
+class DictMemento:
+    """ Memento as it was before __slots__, for comparison """
+    state: str
+
+
+def _list_history(cycles: int, capacity: int, states: list):
+    history, cursor = [], -1
+    for i in range(cycles):
+        history = history[:cursor + 1]
+        history.append(DictMemento(states[i % capacity]))
+        if len(history) > capacity:
+            del history[0]
+        cursor = len(history) - 1
+        if i % 3 == 2:
+            cursor -= 1
+    return history
+
+
+def _ring_history(cycles: int, capacity: int, states: list):
+    caretaker = UndoCareTaker(capacity)
+    for i in range(cycles):
+        caretaker.save_state(Memento(states[i % capacity]))
+        if i % 3 == 2:
+            caretaker.undo()
+    return caretaker
+
+
+def bench_undo_ring(cycles: int = 1_000_000, capacity: int = 1000):
+    """ save/undo cycles: list slicing history vs UndoCareTaker ring buffer """
+    print(f"undo ring: {cycles} save+undo cycles, capacity {capacity}")
+    states = [f"state-{i}" for i in range(capacity)]
+    for label, run in (("list slicing, dict Memento", _list_history),
+                       ("ring buffer, slotted Memento", _ring_history)):
+        start = time.perf_counter()
+        run(cycles, capacity, states)
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        history = run(10 * capacity, capacity, states)
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del history
+        print(f"  {label:<28} {elapsed / cycles * 1e9:7.0f} ns/cycle"
+              f"  {retained / 2 ** 10:6.1f} KiB retained")
+
+    for label, memento_type in (("dict", DictMemento), ("slotted", Memento)):
+        tracemalloc.start()
+        mementos = [memento_type(states[i % capacity]) for i in range(100_000)]
+        size = tracemalloc.get_traced_memory()[0] / len(mementos)
+        tracemalloc.stop()
+        del mementos
+        print(f"  {label:<7} Memento {size:26.1f} B/snapshot (with its list slot)")
+
+def bench_background_snapshots(keys: int = 2000, snapshots: int = 200, idle: float = 0.02):
+    """
+    pause per snapshot: pickling on the caller vs the background thread,
+    which only takes the pickling off the caller for a frozen state
+    """
+    rng = random.Random(5)
+    state = {f"paragraph-{i}": [f"line {j} of paragraph {i}" for j in range(rng.randint(5, 40))]
+             for i in range(keys)}
+    size = len(pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+    print(f"background snapshots: {keys}-key dict state ({size / 2 ** 20:.1f} MiB pickled),"
+          f" {snapshots} snapshots, {idle * 1e3:.0f} ms of idle time between them")
+
+    for label, background, frozen in (("synchronous pickle", False, False),
+                                      ("background, dict", True, False),
+                                      ("background, frozen", True, True)):
+        originator = Originator(freeze(state) if frozen else copy.deepcopy(state))
+        caretaker = CareTaker()
+        snapshotter = BackgroundSnapshotter(caretaker) if background else None
+        pauses = []
+        start = time.perf_counter()
+        for i in range(snapshots):
+            key = f"paragraph-{rng.randrange(keys)}"
+            if frozen:
+                originator.state = originator.state.set(key, freeze([f"edit {i}"]))
+            else:
+                originator.state[key].append(f"edit {i}")
+            began = time.perf_counter()
+            if background:
+                snapshotter.snapshot(originator)
+            else:
+                caretaker.save_state(SerializedMemento(
+                    pickle.dumps(originator.state, pickle.HIGHEST_PROTOCOL)))
+            pauses.append(time.perf_counter() - began)
+            time.sleep(idle)
+        if background:
+            snapshotter.close()
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<19} pause p50 {_percentile(pauses, 0.5) * 1e3:7.2f} ms"
+              f" p99 {_percentile(pauses, 0.99) * 1e3:7.2f} ms"
+              f"  total {elapsed:5.2f} s, {len(caretaker.memento_list)} stored")
+
+
+def bench_persistent_state(keys: int = 10_000, saves: int = 10_000, deep_copies: int = 100):
+    """ memory per save of a dict-of-lists state: deep copies vs persistent structures """
+    rng = random.Random(6)
+    state = {f"key-{i}": [f"value {i}.{j}" for j in range(5)] for i in range(keys)}
+    tracemalloc.start()
+    frozen = freeze(state)
+    frozen_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"persistent state: {keys}-key dict of 5-item lists"
+          f" ({frozen_size / 2 ** 20:.1f} MiB as persistent structures), one edit per save,"
+          " timed under tracemalloc")
+    edits = [(f"key-{rng.randrange(keys)}", rng.randrange(5)) for _ in range(saves)]
+
+    originator, caretaker = Originator(state), CareTaker()
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i, (key, position) in enumerate(edits[:deep_copies]):
+        originator.state[key][position] = f"edit {i}"
+        caretaker.save_state(Memento(copy.deepcopy(originator.state)))
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"  deep copy      {memory / deep_copies / 2 ** 10:9.1f} KiB/save"
+          f" {elapsed / deep_copies * 1e6:9.1f} us/save ({deep_copies} saves)")
+    del caretaker
+
+    originator, caretaker = Originator(frozen), CareTaker()
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i, (key, position) in enumerate(edits):
+        values = originator.state[key]
+        originator.state = originator.state.set(key, values.set(position, f"edit {i}"))
+        caretaker.save_state(originator.create_memento())
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"  persistent     {memory / saves / 2 ** 10:9.1f} KiB/save"
+          f" {elapsed / saves * 1e6:9.1f} us/save ({saves} saves)")
+
+    start = time.perf_counter()
+    for index in range(0, saves, 7):
+        originator.restore_memento(caretaker.restore(index))
+    print(f"  restore        {(time.perf_counter() - start) / len(range(0, saves, 7)) * 1e9:9.0f}"
+          " ns (pointer swap)")
+
+
+if __name__ == "__main__":
+    bench_delta_caretaker()
+    bench_spilling_caretaker()
+    bench_undo_ring()
+    bench_background_snapshots()
+    bench_persistent_state()
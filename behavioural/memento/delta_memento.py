@@ -0,0 +1,133 @@
+""" Delta-encoded CareTaker with periodic keyframes for the Memento """
+
+from dataclasses import dataclass
+
+from memento import CareTaker, Memento, Originator
+
+SLICEABLE = (str, bytes, list, tuple)
+
+
+@dataclass(frozen=True)
+class Delta:
+    """ Replace state[start:stop] of the previous state with `inserted` """
+    start: int
+    stop: int
+    inserted: object
+
+    def apply(self, state):
+        """ the next state, built from the previous one """
+        return state[:self.start] + self.inserted + state[self.stop:]
+
+
+def _common_prefix(old, new) -> int:
+    """ length of the common prefix, bisecting with slice comparisons done in C """
+    low, high = 0, min(len(old), len(new))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[low:middle] == new[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix(old, new, limit: int) -> int:
+    """ length of the common suffix, not overlapping the first `limit` items """
+    low, high = 0, min(len(old), len(new)) - limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[len(old) - middle:len(old) - low] == new[len(new) - middle:len(new) - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def diff(old, new):
+    """
+    Single-edit delta from old to new (common prefix and suffix kept)
+    Returns: Delta, or None when the states cannot be diffed
+    """
+    if type(old) is not type(new) or not isinstance(new, SLICEABLE):
+        return None
+    prefix = _common_prefix(old, new)
+    suffix = _common_suffix(old, new, prefix)
+    return Delta(prefix, len(old) - suffix, new[prefix:len(new) - suffix])
+
+
+class DeltaCareTaker(CareTaker):
+    """
+    CareTaker storing a full keyframe every `keyframe_interval` saves and,
+    in between, only the Delta from the previous state. restore(index)
+    applies at most keyframe_interval - 1 deltas to the nearest keyframe.
+    A delta that is not smaller than `max_delta_ratio` of the state is
+    stored as a keyframe instead.
+    """
+    def __init__(self, keyframe_interval: int = 32, max_delta_ratio: float = 0.5):
+        super().__init__()
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be at least 1")
+        self.keyframe_interval = keyframe_interval
+        self.max_delta_ratio = max_delta_ratio
+        self._since_keyframe = 0
+        self._last = None
+
+    def save_state(self, state: Memento):
+        """
+        Save current state to caretaker, as a delta when possible
+        Args: Memento
+        Returns: None
+        """
+        delta = None
+        if self.memento_list and self._since_keyframe < self.keyframe_interval - 1:
+            delta = diff(self._last, state.state)
+            if delta is not None and \
+                    len(delta.inserted) > self.max_delta_ratio * len(state.state):
+                delta = None
+        if delta is None:
+            self.memento_list.append(Memento(state.state))
+            self._since_keyframe = 0
+        else:
+            self.memento_list.append(delta)
+            self._since_keyframe += 1
+        self._last = state.state
+
+    def restore(self, index: int):
+        """
+        Rebuild a state from its keyframe and the deltas after it
+        Args: index: int
+        Returns: Memento
+        """
+        if index < 0:
+            index += len(self.memento_list)
+        if not 0 <= index < len(self.memento_list):
+            raise IndexError("memento index out of range")
+        keyframe = index
+        while isinstance(self.memento_list[keyframe], Delta):
+            keyframe -= 1
+        state = self.memento_list[keyframe].state
+        for delta in self.memento_list[keyframe + 1:index + 1]:
+            state = delta.apply(state)
+        return Memento(state)
+
+    def __len__(self):
+        return len(self.memento_list)
+
+
+# Usage
+if __name__ == "__main__":
+    originator = Originator("The quick brown fox")
+    caretaker = DeltaCareTaker(keyframe_interval=3)
+
+    for edit in ("The quick red fox", "The quick red fox jumps", "A quick red fox jumps",
+                 "A quick red fox jumps high"):
+        caretaker.save_state(originator.create_memento())
+        originator.state = edit
+    caretaker.save_state(originator.create_memento())
+
+    for entry in caretaker.memento_list:
+        print(entry)
+
+    for i in range(len(caretaker)):
+        originator.restore_memento(caretaker.restore(i))
+        print(f"Current state is : {originator.state}")
@@ -3,9 +3,9 @@
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class Memento:
-    """ Implementation Memento DataClass """
+    """ Implementation Memento DataClass, slotted so a snapshot carries no __dict__ """
     state: str
 
 
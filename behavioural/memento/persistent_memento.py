@@ -0,0 +1,384 @@
+""" Persistent (structurally shared) state for the Memento """
+
+from collections.abc import Mapping, Sequence
+
+from memento import CareTaker, Originator
+
+BITS = 5
+WIDTH = 1 << BITS
+MASK = WIDTH - 1
+HASH_BITS = 64
+_MISSING = object()
+
+
+class _Entry:
+    __slots__ = ("hash", "key", "value")
+
+    def __init__(self, key_hash: int, key, value):
+        self.hash = key_hash
+        self.key = key
+        self.value = value
+
+
+class _Bitmap:
+    """ HAMT node: a 32-bit occupancy bitmap and only the occupied slots """
+    __slots__ = ("bitmap", "slots")
+
+    def __init__(self, bitmap: int, slots: tuple):
+        self.bitmap = bitmap
+        self.slots = slots
+
+
+class _Collision:
+    """ keys whose 64-bit hashes are all equal """
+    __slots__ = ("hash", "entries")
+
+    def __init__(self, key_hash: int, entries: tuple):
+        self.hash = key_hash
+        self.entries = entries
+
+
+_EMPTY_NODE = _Bitmap(0, ())
+
+
+def _hash(key) -> int:
+    return hash(key) & ((1 << HASH_BITS) - 1)
+
+
+def _merge(first, second: _Entry, shift: int):
+    """
+    smallest subtree holding two entries whose hashes differ below `shift`;
+    first may also be a _Collision, whose entries all share its hash
+    """
+    if first.hash == second.hash:
+        return _Collision(first.hash, (first, second))
+    first_bit, second_bit = (first.hash >> shift) & MASK, (second.hash >> shift) & MASK
+    if first_bit == second_bit:
+        return _Bitmap(1 << first_bit, (_merge(first, second, shift + BITS),))
+    slots = (first, second) if first_bit < second_bit else (second, first)
+    return _Bitmap((1 << first_bit) | (1 << second_bit), slots)
+
+
+def _assoc(node, entry: _Entry, shift: int):
+    """ (new node, whether a key was added); returns `node` itself when nothing changed """
+    if isinstance(node, _Collision):
+        if entry.hash != node.hash:
+            # same path so far, different hash: branch off below this level
+            return _merge(node, entry, shift), True
+        for position, existing in enumerate(node.entries):
+            if existing.key is entry.key or existing.key == entry.key:
+                if existing.value is entry.value:
+                    return node, False
+                entries = node.entries[:position] + (entry,) + node.entries[position + 1:]
+                return _Collision(node.hash, entries), False
+        return _Collision(node.hash, node.entries + (entry,)), True
+
+    bit = 1 << ((entry.hash >> shift) & MASK)
+    position = (node.bitmap & (bit - 1)).bit_count()
+    if not node.bitmap & bit:
+        slots = node.slots[:position] + (entry,) + node.slots[position:]
+        return _Bitmap(node.bitmap | bit, slots), True
+    child = node.slots[position]
+    if isinstance(child, _Entry):
+        if child.key is entry.key or child.key == entry.key:
+            if child.value is entry.value:
+                return node, False
+            replacement, added = entry, False
+        else:
+            replacement, added = _merge(child, entry, shift + BITS), True
+    else:
+        replacement, added = _assoc(child, entry, shift + BITS)
+        if replacement is child:
+            return node, False
+    slots = node.slots[:position] + (replacement,) + node.slots[position + 1:]
+    return _Bitmap(node.bitmap, slots), added
+
+
+def _dissoc(node, key_hash: int, key, shift: int):
+    """ new node without key (None when empty), or `node` itself when key is missing """
+    if isinstance(node, _Collision):
+        entries = tuple(entry for entry in node.entries
+                        if not (entry.key is key or entry.key == key))
+        if len(entries) == len(node.entries):
+            return node
+        return entries[0] if len(entries) == 1 else _Collision(node.hash, entries)
+
+    bit = 1 << ((key_hash >> shift) & MASK)
+    if not node.bitmap & bit:
+        return node
+    position = (node.bitmap & (bit - 1)).bit_count()
+    child = node.slots[position]
+    if isinstance(child, _Entry):
+        if not (child.key is key or child.key == key):
+            return node
+        replacement = None
+    else:
+        replacement = _dissoc(child, key_hash, key, shift + BITS)
+        if replacement is child:
+            return node
+        if isinstance(replacement, _Bitmap) and len(replacement.slots) == 1 and \
+                isinstance(replacement.slots[0], _Entry):
+            replacement = replacement.slots[0]  # keep the trie canonical
+    if replacement is None:
+        if node.bitmap == bit:
+            return None
+        return _Bitmap(node.bitmap ^ bit, node.slots[:position] + node.slots[position + 1:])
+    slots = node.slots[:position] + (replacement,) + node.slots[position + 1:]
+    return _Bitmap(node.bitmap, slots)
+
+
+class PersistentMap(Mapping):
+    """
+    Immutable hash array mapped trie. set() and delete() return a new map
+    that shares every untouched node with this one, copying only the
+    O(log32 n) nodes on the path to the key.
+    """
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, items=()):
+        self._root, self._size = _EMPTY_NODE, 0
+        if items:
+            self._root, self._size = self.update(items)._parts()
+
+    @classmethod
+    def _make(cls, root, size: int) -> "PersistentMap":
+        new = cls.__new__(cls)
+        new._root, new._size = root, size
+        return new
+
+    def _parts(self):
+        return self._root, self._size
+
+    def __getitem__(self, key):
+        key_hash, node, shift = _hash(key), self._root, 0
+        while True:
+            if isinstance(node, _Collision):
+                for entry in node.entries:
+                    if entry.key is key or entry.key == key:
+                        return entry.value
+                raise KeyError(key)
+            bit = 1 << ((key_hash >> shift) & MASK)
+            if not node.bitmap & bit:
+                raise KeyError(key)
+            node = node.slots[(node.bitmap & (bit - 1)).bit_count()]
+            if isinstance(node, _Entry):
+                if node.key is key or node.key == key:
+                    return node.value
+                raise KeyError(key)
+            shift += BITS
+
+    def set(self, key, value) -> "PersistentMap":
+        """ new map with key set to value """
+        root, added = _assoc(self._root, _Entry(_hash(key), key, value), 0)
+        if root is self._root:
+            return self
+        return self._make(root, self._size + added)
+
+    def delete(self, key) -> "PersistentMap":
+        """ new map without key, raises KeyError if it is missing """
+        root = _dissoc(self._root, _hash(key), key, 0)
+        if root is self._root:
+            raise KeyError(key)
+        if root is None:
+            root = _EMPTY_NODE
+        elif isinstance(root, _Entry):
+            root = _Bitmap(1 << (root.hash & MASK), (root,))
+        return self._make(root, self._size - 1)
+
+    def update(self, items) -> "PersistentMap":
+        """ new map with every (key, value) of a mapping or iterable set """
+        pairs = items.items() if isinstance(items, Mapping) else items
+        root, size = self._root, self._size
+        for key, value in pairs:
+            root, added = _assoc(root, _Entry(_hash(key), key, value), 0)
+            size += added
+        return self._make(root, size)
+
+    def __iter__(self):
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            slots = node.entries if isinstance(node, _Collision) else node.slots
+            for slot in reversed(slots):
+                if isinstance(slot, _Entry):
+                    yield slot.key
+                else:
+                    stack.append(slot)
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return f"PersistentMap({dict(self.items())!r})"
+
+
+def _new_path(level: int, node: tuple) -> tuple:
+    while level > 0:
+        node = (node,)
+        level -= BITS
+    return node
+
+
+class PersistentVector(Sequence):
+    """
+    Immutable bit-partitioned vector trie with a tail buffer, 32 items per
+    node. append(), set() and pop() copy only the O(log32 n) path they
+    touch and share the rest of the trie with the previous version.
+    """
+    __slots__ = ("_count", "_shift", "_root", "_tail")
+
+    def __init__(self, items=()):
+        self._count, self._shift, self._root, self._tail = 0, BITS, (), ()
+        if items:
+            self._count, self._shift, self._root, self._tail = self.extend(items)._parts()
+
+    @classmethod
+    def _make(cls, count: int, shift: int, root: tuple, tail: tuple) -> "PersistentVector":
+        new = cls.__new__(cls)
+        new._count, new._shift, new._root, new._tail = count, shift, root, tail
+        return new
+
+    def _parts(self):
+        return self._count, self._shift, self._root, self._tail
+
+    def _tail_offset(self) -> int:
+        return 0 if self._count < WIDTH else ((self._count - 1) >> BITS) << BITS
+
+    def _leaf(self, index: int) -> tuple:
+        """ the 32-item array holding index """
+        if index >= self._tail_offset():
+            return self._tail
+        node = self._root
+        for level in range(self._shift, 0, -BITS):
+            node = node[(index >> level) & MASK]
+        return node
+
+    def _index(self, index: int) -> int:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("vector index out of range")
+        return index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        index = self._index(index)
+        return self._leaf(index)[index & MASK]
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for start in range(0, self._count, WIDTH):
+            yield from self._leaf(start)
+
+    def _push_tail(self, level: int, parent: tuple, tail: tuple) -> tuple:
+        position = ((self._count - 1) >> level) & MASK
+        if level == BITS:
+            inserted = tail
+        elif position < len(parent):
+            inserted = self._push_tail(level - BITS, parent[position], tail)
+        else:
+            inserted = _new_path(level - BITS, tail)
+        return parent[:position] + (inserted,) + parent[position + 1:]
+
+    def append(self, value) -> "PersistentVector":
+        """ new vector with value added at the end """
+        if self._count - self._tail_offset() < WIDTH:
+            return self._make(self._count + 1, self._shift, self._root, self._tail + (value,))
+        if (self._count >> BITS) > (1 << self._shift):
+            root = (self._root, _new_path(self._shift, self._tail))
+            return self._make(self._count + 1, self._shift + BITS, root, (value,))
+        root = self._push_tail(self._shift, self._root, self._tail)
+        return self._make(self._count + 1, self._shift, root, (value,))
+
+    def extend(self, items) -> "PersistentVector":
+        """ new vector with every item appended """
+        vector = self
+        for item in items:
+            vector = vector.append(item)
+        return vector
+
+    def set(self, index: int, value) -> "PersistentVector":
+        """ new vector with the item at index replaced """
+        index = self._index(index)
+        if index >= self._tail_offset():
+            position = index & MASK
+            tail = self._tail[:position] + (value,) + self._tail[position + 1:]
+            return self._make(self._count, self._shift, self._root, tail)
+
+        def assoc(level: int, node: tuple) -> tuple:
+            position = (index >> level) & MASK
+            child = value if level == 0 else assoc(level - BITS, node[position])
+            return node[:position] + (child,) + node[position + 1:]
+
+        return self._make(self._count, self._shift, assoc(self._shift, self._root), self._tail)
+
+    def _pop_tail(self, level: int, node: tuple):
+        position = ((self._count - 2) >> level) & MASK
+        if level > BITS:
+            child = self._pop_tail(level - BITS, node[position])
+            if child is None and position == 0:
+                return None
+            return node[:position] + (() if child is None else (child,))
+        if position == 0:
+            return None
+        return node[:position]
+
+    def pop(self) -> "PersistentVector":
+        """ new vector without the last item """
+        if self._count == 0:
+            raise IndexError("pop from empty vector")
+        if self._count == 1:
+            return self._make(0, BITS, (), ())
+        if self._count - self._tail_offset() > 1:
+            return self._make(self._count - 1, self._shift, self._root, self._tail[:-1])
+        tail = self._leaf(self._count - 2)
+        root, shift = self._pop_tail(self._shift, self._root), self._shift
+        if root is None:
+            root = ()
+        if shift > BITS and len(root) == 1:
+            root, shift = root[0], shift - BITS
+        return self._make(self._count - 1, shift, root, tail)
+
+    def __repr__(self):
+        return f"PersistentVector({list(self)!r})"
+
+
+def freeze(value):
+    """ nested dicts and lists as PersistentMap and PersistentVector """
+    if isinstance(value, dict):
+        return PersistentMap((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return PersistentVector(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """ plain dicts and lists back from persistent structures """
+    if isinstance(value, PersistentMap):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, PersistentVector):
+        return [thaw(item) for item in value]
+    return value
+
+
+# Usage
+if __name__ == "__main__":
+    # with persistent state, create_memento keeps a reference (O(1)) and
+    # restore_memento swaps it back, no copy is ever needed
+    originator = Originator(freeze({"title": "draft", "lines": ["initial-state"]}))
+    caretaker = CareTaker()
+
+    caretaker.save_state(originator.create_memento())
+    originator.state = originator.state.set(
+        "lines", originator.state["lines"].append("state-1")
+    )
+    caretaker.save_state(originator.create_memento())
+    originator.state = originator.state.set("title", "final")
+    caretaker.save_state(originator.create_memento())
+
+    for index in range(3):
+        originator.restore_memento(caretaker.restore(index))
+        print(f"Current state is : {thaw(originator.state)}")
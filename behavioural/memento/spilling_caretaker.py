@@ -0,0 +1,214 @@
+""" Bounded CareTaker spilling compressed mementos to an append-only file """
+
+import lzma
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import zlib
+from collections import OrderedDict
+from typing import List, Optional
+
+from memento import Memento, Originator
+
+# payload length, crc32 of the payload
+RECORD_HEADER = struct.Struct("<II")
+CODECS = {
+    None: (lambda data, level: data, lambda data: data),
+    "zlib": (zlib.compress, zlib.decompress),
+    "lzma": (lambda data, level: lzma.compress(data, preset=level), lzma.decompress),
+}
+# history files smaller than this are never compacted automatically
+COMPACT_MIN_BYTES = 1 << 20
+
+
+class SpillingCareTaker:
+    """
+    CareTaker with a memory budget. The most recent `hot_limit` mementos
+    (and at most `memory_budget` bytes of state, measured as the size of
+    its pickle, which is taken on save and reused when spilling) stay in
+    memory; older ones are compressed and appended to a file, indexed by
+    offset, and read back through mmap.
+    Retention: the last `keep_last` saves are all kept, older ones only when
+    their sequence number is a multiple of `thin_every` (0 drops them all).
+    Indexes are save sequence numbers, so thinning does not shift them.
+    Thinned records stay in the file as dead bytes until compact(), which
+    runs by itself once they exceed `compact_ratio` of a file of at least
+    COMPACT_MIN_BYTES (None turns that off).
+    The offset index lives in memory, so the file only holds the history
+    of this caretaker: an existing non-empty file is refused unless
+    `overwrite` is set, in which case it is truncated.
+    """
+    def __init__(self, path: Optional[str] = None, hot_limit: int = 16,
+                 memory_budget: int = 64 * 1024 * 1024, compression: Optional[str] = "zlib",
+                 level: int = 6, keep_last: Optional[int] = None, thin_every: int = 1,
+                 compact_ratio: Optional[float] = 0.5, overwrite: bool = False):
+        if compression not in CODECS:
+            raise ValueError(f"unknown compression {compression!r}")
+        self.hot_limit = max(1, hot_limit)
+        self.memory_budget = memory_budget
+        self.compression = compression
+        self.level = level
+        self.keep_last = keep_last
+        self.thin_every = thin_every
+        self.compact_ratio = compact_ratio
+        self._temporary = path is None
+        if path is None:
+            descriptor, path = tempfile.mkstemp(prefix="history-", suffix=".log")
+            os.close(descriptor)
+        self.path = path
+        self._file = open(path, "a+b")  # pylint: disable=consider-using-with
+        if self._file.seek(0, os.SEEK_END):
+            if not overwrite:
+                self._file.close()
+                raise FileExistsError(
+                    f"history file {path!r} is not empty, pass overwrite=True to replace it"
+                )
+            self._file.truncate(0)
+        self._map = None
+        self._hot = OrderedDict()  # sequence -> (memento, pickled state)
+        self._hot_bytes = 0
+        self._spilled = {}
+        self._live_bytes = 0
+        self._count = 0
+
+    def save_state(self, state: Memento) -> int:
+        """
+        Save current state to caretaker
+        Args: Memento
+        Returns: sequence number to restore it with
+        """
+        sequence = self._count
+        self._count += 1
+        payload = pickle.dumps(state.state, pickle.HIGHEST_PROTOCOL)
+        self._hot[sequence] = (state, payload)
+        self._hot_bytes += len(payload)
+        self._apply_retention()
+        while len(self._hot) > self.hot_limit or \
+                (len(self._hot) > 1 and self._hot_bytes > self.memory_budget):
+            self._spill(*self._hot.popitem(last=False))
+        return sequence
+
+    def _apply_retention(self):
+        """ thin the one entry that just left the keep_last window, O(1) per save """
+        if self.keep_last is None:
+            return
+        sequence = self._count - 1 - self.keep_last
+        if sequence < 0 or (self.thin_every and sequence % self.thin_every == 0):
+            return
+        hot = self._hot.pop(sequence, None)
+        if hot is not None:
+            self._hot_bytes -= len(hot[1])
+        record = self._spilled.pop(sequence, None)
+        if record is not None:
+            self._live_bytes -= record[1]
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self.compact_ratio is None:
+            return
+        size = self._file.seek(0, os.SEEK_END)
+        if size >= COMPACT_MIN_BYTES and size - self._live_bytes > self.compact_ratio * size:
+            self.compact()
+
+    def _spill(self, sequence: int, hot: tuple):
+        _, pickled = hot
+        self._hot_bytes -= len(pickled)
+        payload = CODECS[self.compression][0](pickled, self.level)
+        offset = self._file.seek(0, os.SEEK_END)
+        self._file.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+        self._file.write(payload)
+        self._spilled[sequence] = (offset, RECORD_HEADER.size + len(payload))
+        self._live_bytes += RECORD_HEADER.size + len(payload)
+
+    def _read(self, offset: int, size: int) -> Memento:
+        if self._map is None or offset + size > len(self._map):
+            self._file.flush()
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        length, checksum = RECORD_HEADER.unpack_from(self._map, offset)
+        payload = self._map[offset + RECORD_HEADER.size:offset + RECORD_HEADER.size + length]
+        if zlib.crc32(payload) != checksum:
+            raise ValueError(f"corrupt history record at offset {offset}")
+        return Memento(pickle.loads(CODECS[self.compression][1](payload)))
+
+    def restore(self, index: int) -> Memento:
+        """
+        Restore a state into caretaker, from memory or from the history file
+        Args: index: sequence number, negative counts back from the last save
+        Returns: Memento
+        """
+        if index < 0:
+            index += self._count
+        if index in self._hot:
+            return self._hot[index][0]
+        if index in self._spilled:
+            return self._read(*self._spilled[index])
+        if 0 <= index < self._count:
+            raise IndexError(f"memento {index} was dropped by the retention policy")
+        raise IndexError("memento index out of range")
+
+    def retained(self) -> List[int]:
+        """ sequence numbers that can still be restored, oldest first """
+        return sorted(self._spilled) + list(self._hot)
+
+    def disk_bytes(self) -> int:
+        """ size of the history file, thinned records included until compact() """
+        return self._file.seek(0, os.SEEK_END)
+
+    def compact(self):
+        """ rewrite the history file with the retained records only """
+        self._file.flush()
+        compacted, moved, position = f"{self.path}.compact", {}, 0
+        with open(self.path, "rb") as source, open(compacted, "wb") as target:
+            for sequence in sorted(self._spilled):
+                offset, size = self._spilled[sequence]
+                source.seek(offset)
+                target.write(source.read(size))
+                moved[sequence] = (position, size)
+                position += size
+            target.flush()
+            os.fsync(target.fileno())
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+        os.replace(compacted, self.path)
+        self._file = open(self.path, "a+b")  # pylint: disable=consider-using-with
+        self._spilled = moved
+        self._live_bytes = position
+
+    def close(self):
+        """ close the history file, removing it when it was a temporary one """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+        if self._temporary and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __len__(self):
+        return len(self._hot) + len(self._spilled)
+
+    def __enter__(self) -> "SpillingCareTaker":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Usage
+if __name__ == "__main__":
+    originator = Originator("initial-state")
+    with SpillingCareTaker(hot_limit=2, keep_last=4, thin_every=2) as caretaker:
+        for i in range(1, 9):
+            caretaker.save_state(originator.create_memento())
+            originator.state = f"state-{i}"
+        caretaker.save_state(originator.create_memento())
+
+        print(f"retained: {caretaker.retained()}")
+        for index in caretaker.retained():
+            originator.restore_memento(caretaker.restore(index))
+            print(f"Current state is : {originator.state}")
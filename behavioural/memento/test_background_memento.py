@@ -0,0 +1,54 @@
+""" Snapshot isolation tests for the background Memento """
+
+import pickle
+import threading
+import unittest
+from unittest import mock
+
+from background_memento import BackgroundSnapshotter, is_frozen
+from memento import Originator
+from persistent_memento import freeze, thaw
+
+
+class BackgroundSnapshotterTest(unittest.TestCase):
+    """ a snapshot must hold the state as it was when snapshot() was called """
+
+    def test_mutable_state_is_pickled_before_returning(self):
+        originator = Originator({"lines": ["a"]})
+        self.assertFalse(is_frozen(originator.state))
+        with BackgroundSnapshotter() as snapshotter:
+            with mock.patch("background_memento.pickle.dumps", wraps=pickle.dumps) as dumps:
+                future = snapshotter.snapshot(originator)
+                self.assertEqual(dumps.call_count, 1)
+            originator.state["lines"].append("b")
+            self.assertEqual(future.result().state, {"lines": ["a"]})
+
+    def test_frozen_state_is_pickled_by_the_worker(self):
+        originator = Originator(freeze({"lines": ["a"]}))
+        self.assertTrue(is_frozen(originator.state))
+        callers = []
+        original = BackgroundSnapshotter._store
+
+        def store(snapshotter, state):
+            callers.append(threading.current_thread())
+            return original(snapshotter, state)
+        with mock.patch.object(BackgroundSnapshotter, "_store", store), \
+                BackgroundSnapshotter() as snapshotter:
+            future = snapshotter.snapshot(originator)
+            originator.state = originator.state.set("lines", freeze(["b"]))
+            self.assertEqual(thaw(future.result().state), {"lines": ["a"]})
+        self.assertNotIn(threading.main_thread(), callers)
+
+    def test_snapshots_are_stored_in_call_order(self):
+        originator = Originator(freeze({"version": 0}))
+        with BackgroundSnapshotter() as snapshotter:
+            for version in range(1, 50):
+                snapshotter.snapshot(originator)
+                originator.state = originator.state.set("version", version)
+            snapshotter.flush()
+            stored = [snapshotter.restore(index).state["version"] for index in range(49)]
+        self.assertEqual(stored, list(range(49)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+""" Keyframe and delta tests for the delta-encoded Memento """
+
+import random
+import unittest
+
+from delta_memento import Delta, DeltaCareTaker, diff
+from memento import Memento
+
+
+def edits(count: int) -> list:
+    """ a document edited in place, one random splice per version """
+    rng, text, versions = random.Random(3), "start", []
+    for _ in range(count):
+        start = rng.randrange(len(text) + 1)
+        stop = min(len(text), start + rng.randrange(4))
+        text = text[:start] + "".join(rng.choice("abc") for _ in range(rng.randrange(4))) + \
+            text[stop:]
+        versions.append(text)
+    return versions
+
+
+class DeltaCareTakerTest(unittest.TestCase):
+    """ every restore must rebuild exactly the state that was saved """
+
+    def test_diff_applies(self):
+        for old, new in (("abcdef", "abXYef"), ("aaa", "aaaa"), ("", "x"), ("x", ""),
+                         ([1, 2, 3], [1, 3]), (b"abc", b"abc")):
+            self.assertEqual(diff(old, new).apply(old), new)
+        self.assertIsNone(diff("a", b"a"))
+        self.assertIsNone(diff({"a": 1}, {"a": 2}))
+
+    def test_restores_every_version(self):
+        versions = edits(300)
+        caretaker = DeltaCareTaker(keyframe_interval=8)
+        for version in versions:
+            caretaker.save_state(Memento(version))
+        self.assertEqual([caretaker.restore(i).state for i in range(len(versions))], versions)
+        self.assertEqual(caretaker.restore(-1).state, versions[-1])
+        with self.assertRaises(IndexError):
+            caretaker.restore(len(versions))
+
+    def test_keyframe_interval_and_large_deltas(self):
+        caretaker = DeltaCareTaker(keyframe_interval=3)
+        for version in ("aaaa", "aaab", "aabb", "abbb", "zzzzzzzz", "zzzzzzzy"):
+            caretaker.save_state(Memento(version))
+        kinds = [isinstance(entry, Delta) for entry in caretaker.memento_list]
+        # a keyframe every third save, and the rewrite to "zzzzzzzz" is one too
+        self.assertEqual(kinds, [False, True, True, False, False, True])
+
+    def test_undiffable_states_are_keyframes(self):
+        caretaker = DeltaCareTaker()
+        for version in ({"a": 1}, {"a": 2}, "text", b"text"):
+            caretaker.save_state(Memento(version))
+        self.assertFalse(any(isinstance(entry, Delta) for entry in caretaker.memento_list))
+        self.assertEqual(caretaker.restore(1).state, {"a": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+""" Hash collision tests for the persistent Memento state """
+
+import unittest
+
+from persistent_memento import PersistentMap, _Collision, _hash
+
+
+def collisions(node) -> list:
+    """ every _Collision node below node, as lists of keys """
+    found, stack = [], [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, _Collision):
+            found.append([entry.key for entry in node.entries])
+        elif hasattr(node, "slots"):
+            stack.extend(node.slots)
+    return found
+
+
+class CollisionTest(unittest.TestCase):
+    """ hash(-1) == hash(-2), and keys sharing their low bits must branch off """
+
+    def test_equal_hashes_share_a_collision_node(self):
+        self.assertEqual(_hash(-1), _hash(-2))
+        persistent = PersistentMap({-1: "a", -2: "b"})
+        self.assertEqual(dict(persistent), {-1: "a", -2: "b"})
+        self.assertEqual(collisions(persistent._root), [[-1, -2]])
+
+    def test_different_hash_on_the_same_path_splits(self):
+        # 30, 62 and 2**64 - 2 agree on their lowest five bits, -1/-2 hash to 2**64 - 2
+        persistent = PersistentMap({-1: "a", -2: "b"}).set(30, "c").set(62, "d")
+        self.assertEqual(collisions(persistent._root), [[-1, -2]])
+        self.assertEqual(dict(persistent), {-1: "a", -2: "b", 30: "c", 62: "d"})
+        self.assertEqual(len(persistent), 4)
+
+        shrunk = persistent.delete(-1).delete(-2)
+        self.assertEqual(collisions(shrunk._root), [])
+        self.assertEqual(dict(shrunk), {30: "c", 62: "d"})
+        self.assertEqual(dict(persistent.delete(30)), {-1: "a", -2: "b", 62: "d"})
+        with self.assertRaises(KeyError):
+            persistent[94]  # pylint: disable=pointless-statement
+
+    def test_collision_updates(self):
+        persistent = PersistentMap({-1: "a", -2: "b", 30: "c"})
+        self.assertIs(persistent.set(-1, "a"), persistent)
+        updated = persistent.set(-2, "z")
+        self.assertEqual(len(updated), 3)
+        self.assertEqual(updated[-2], "z")
+        self.assertEqual(persistent[-2], "b")
+
+
+if __name__ == "__main__":
+    unittest.main()
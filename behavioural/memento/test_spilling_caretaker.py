@@ -0,0 +1,66 @@
+""" Budget, compaction and file-safety tests for the spilling CareTaker """
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import spilling_caretaker
+from memento import Memento
+from spilling_caretaker import SpillingCareTaker
+
+
+class SpillingCareTakerTest(unittest.TestCase):
+    """ the history file must stay bounded and never clobber foreign data """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.directory.name, "history.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_existing_file_is_refused(self):
+        with open(self.path, "wb") as existing:
+            existing.write(b"someone else's data")
+        with self.assertRaises(FileExistsError):
+            SpillingCareTaker(self.path)
+        with open(self.path, "rb") as existing:
+            self.assertEqual(existing.read(), b"someone else's data")
+        with SpillingCareTaker(self.path, overwrite=True) as caretaker:
+            self.assertEqual(caretaker.disk_bytes(), 0)
+
+    def test_budget_counts_the_pickled_state(self):
+        # a list of large strings: sys.getsizeof only sees the list itself
+        state = ["x" * 10_000 for _ in range(10)]
+        self.assertLess(sys.getsizeof(state), 1000)
+        with SpillingCareTaker(self.path, hot_limit=100, memory_budget=250_000) as caretaker:
+            for _ in range(5):
+                caretaker.save_state(Memento(state))
+            self.assertEqual(len(caretaker._hot), 2)  # pylint: disable=protected-access
+            self.assertEqual(caretaker.restore(0).state, state)
+
+    def test_thinned_records_are_compacted(self):
+        states = [os.urandom(1000).hex() for _ in range(200)]
+        with mock.patch.object(spilling_caretaker, "COMPACT_MIN_BYTES", 50_000), \
+                SpillingCareTaker(self.path, hot_limit=1, compression=None,
+                                  keep_last=10, thin_every=0) as caretaker:
+            for state in states:
+                caretaker.save_state(Memento(state))
+                self.assertLess(caretaker.disk_bytes(), 120_000)
+            self.assertEqual(caretaker.retained(), list(range(190, 200)))
+            for index in caretaker.retained():
+                self.assertEqual(caretaker.restore(index).state, states[index])
+
+    def test_compaction_can_be_turned_off(self):
+        with mock.patch.object(spilling_caretaker, "COMPACT_MIN_BYTES", 0), \
+                SpillingCareTaker(self.path, hot_limit=1, compression=None, keep_last=2,
+                                  thin_every=0, compact_ratio=None) as caretaker:
+            for index in range(20):
+                caretaker.save_state(Memento(str(index) * 100))
+            self.assertGreater(caretaker.disk_bytes(), 18 * 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
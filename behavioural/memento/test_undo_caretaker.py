@@ -0,0 +1,70 @@
+""" Ring buffer tests for the undo/redo CareTaker """
+
+import random
+import unittest
+
+from memento import Memento
+from undo_caretaker import UndoCareTaker
+
+
+class ListUndo:
+    """ the same history kept in a plain list, as a reference """
+    def __init__(self, capacity: int):
+        self.capacity, self.history, self.cursor = capacity, [], -1
+
+    def save_state(self, state):
+        self.history = self.history[:self.cursor + 1] + [state]
+        self.history = self.history[-self.capacity:]
+        self.cursor = len(self.history) - 1
+
+    def undo(self):
+        self.cursor -= 1
+        return self.history[self.cursor]
+
+    def redo(self):
+        self.cursor += 1
+        return self.history[self.cursor]
+
+
+class UndoCareTakerTest(unittest.TestCase):
+    """ the ring must behave like an unbounded list trimmed to capacity """
+
+    def test_matches_a_list(self):
+        rng = random.Random(5)
+        for capacity in (1, 2, 5):
+            caretaker, reference = UndoCareTaker(capacity), ListUndo(capacity)
+            for step in range(2000):
+                action = rng.choice(("save", "save", "undo", "redo"))
+                if action == "save":
+                    caretaker.save_state(Memento(step))
+                    reference.save_state(step)
+                elif action == "undo" and caretaker.can_undo:
+                    self.assertEqual(caretaker.undo().state, reference.undo())
+                elif action == "redo" and caretaker.can_redo:
+                    self.assertEqual(caretaker.redo().state, reference.redo())
+                self.assertEqual([caretaker.restore(i).state for i in range(len(caretaker))],
+                                 reference.history)
+                if reference.history:
+                    self.assertEqual(caretaker.current.state,
+                                     reference.history[reference.cursor])
+                self.assertEqual(caretaker.can_undo, reference.cursor > 0)
+                self.assertEqual(caretaker.can_redo,
+                                 reference.cursor + 1 < len(reference.history))
+
+    def test_empty_and_bounds(self):
+        caretaker = UndoCareTaker(3)
+        self.assertIsNone(caretaker.current)
+        with self.assertRaises(IndexError):
+            caretaker.undo()
+        with self.assertRaises(IndexError):
+            caretaker.redo()
+        caretaker.save_state(Memento("a"))
+        self.assertEqual(caretaker.restore(-1).state, "a")
+        with self.assertRaises(IndexError):
+            caretaker.restore(1)
+        with self.assertRaises(ValueError):
+            UndoCareTaker(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+""" Fixed-capacity ring buffer CareTaker with O(1) undo/redo for the Memento """
+
+from typing import Optional
+
+from memento import Memento, Originator
+
+
+class UndoCareTaker:
+    """
+    CareTaker keeping the last `capacity` mementos in a ring buffer with a
+    cursor on the current one. save_state, undo and redo are O(1): saving
+    drops the redo branch by shrinking the size (its slots are overwritten
+    lazily) and, when full, overwrites the oldest memento.
+    """
+    def __init__(self, capacity: int = 100):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._head = 0
+        self._size = 0
+        self._cursor = -1
+
+    def save_state(self, state: Memento):
+        """
+        Save current state to caretaker, discarding the redo branch
+        Args: Memento
+        Returns: None
+        """
+        self._size = self._cursor + 1
+        if self._size == self.capacity:
+            self._head = (self._head + 1) % self.capacity
+        else:
+            self._size += 1
+        self._cursor = self._size - 1
+        self._slots[(self._head + self._cursor) % self.capacity] = state
+
+    @property
+    def can_undo(self) -> bool:
+        """ whether there is an older memento to go back to """
+        return self._cursor > 0
+
+    @property
+    def can_redo(self) -> bool:
+        """ whether an undone memento can be reapplied """
+        return self._cursor + 1 < self._size
+
+    def undo(self) -> Memento:
+        """
+        Step back to the previous memento
+        Returns: Memento, raises IndexError when there is nothing to undo
+        """
+        if not self.can_undo:
+            raise IndexError("nothing to undo")
+        self._cursor -= 1
+        return self._slots[(self._head + self._cursor) % self.capacity]
+
+    def redo(self) -> Memento:
+        """
+        Step forward to the memento that was undone last
+        Returns: Memento, raises IndexError when there is nothing to redo
+        """
+        if not self.can_redo:
+            raise IndexError("nothing to redo")
+        self._cursor += 1
+        return self._slots[(self._head + self._cursor) % self.capacity]
+
+    @property
+    def current(self) -> Optional[Memento]:
+        """ memento under the cursor, None before the first save """
+        if self._cursor < 0:
+            return None
+        return self._slots[(self._head + self._cursor) % self.capacity]
+
+    def restore(self, index: int) -> Memento:
+        """
+        Memento at a position of the retained history, without moving the cursor
+        Args: index: int, 0 is the oldest retained, negative counts from the newest
+        Returns: Memento
+        """
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("memento index out of range")
+        return self._slots[(self._head + index) % self.capacity]
+
+    def __len__(self):
+        return self._size
+
+
+# Usage
+if __name__ == "__main__":
+    originator = Originator("initial-state")
+    caretaker = UndoCareTaker(capacity=3)
+
+    caretaker.save_state(originator.create_memento())
+    for state in ("state-1", "state-2", "state-3"):
+        originator.state = state
+        caretaker.save_state(originator.create_memento())
+    print(f"Current state is : {originator.state}")
+
+    originator.restore_memento(caretaker.undo())
+    print(f"Current state is : {originator.state}")
+    originator.restore_memento(caretaker.undo())
+    print(f"Current state is : {originator.state}")
+    print(f"can undo: {caretaker.can_undo}")
+
+    originator.restore_memento(caretaker.redo())
+    print(f"Current state is : {originator.state}")
+
+    originator.state = "state-4"
+    caretaker.save_state(originator.create_memento())
+    print(f"Current state is : {originator.state}, can redo: {caretaker.can_redo}")
@@ -0,0 +1,98 @@
+""" Benchmarks for Observer """
+
+import random
+import time
+from fnmatch import fnmatchcase
+
+from observer import EventListener, EventManager
+
+
+class CountingListener(EventListener):
+    """ listener counting its notifications """
+
+    def __init__(self):
+        self.calls = 0
+
+    def update(self, event_type: str, file):
+        self.calls += 1
+
+
+class ListEventManager:
+    """ EventManager as it was: one list per event type, list.remove to unsubscribe """
+
+    def __init__(self, operations: list):
+        self.listeners = {op: [] for op in operations}
+
+    def subscribe(self, event_type: str, listener: EventListener):
+        """ append to the event's list """
+        self.listeners[event_type].append(listener)
+
+    def unsubscribe(self, event_type: str, listener: EventListener):
+        """ O(n) removal """
+        self.listeners[event_type].remove(listener)
+
+
+def bench_churn(listeners: int = 100_000, churn: int = 5_000):
+    """ unsubscribe + resubscribe of random listeners on one crowded event """
+    print(f"observer churn: {listeners} listeners on one event, {churn} unsubscribe+subscribe")
+    rng = random.Random(1)
+    population = [CountingListener() for _ in range(listeners)]
+    picks = [rng.choice(population) for _ in range(churn)]
+    for label, manager in (("list registry", ListEventManager(["save"])),
+                           ("dict registry", EventManager(["save"])),
+                           ("dict registry, weak", EventManager(["save"], weak=True))):
+        for listener in population:
+            manager.subscribe("save", listener)
+        start = time.perf_counter()
+        for listener in picks:
+            manager.unsubscribe("save", listener)
+            manager.subscribe("save", listener)
+        elapsed = (time.perf_counter() - start) / churn
+        print(f"  {label:<20} {elapsed * 1e6:9.2f} us per unsubscribe+subscribe")
+
+
+def bench_wildcard_notify(files: int = 10_000, per_topic: int = 9, wildcards: int = 100,
+                          events: int = 20_000):
+    """ notify one topic among 100k listeners, with exact and wildcard subscriptions """
+    rng = random.Random(2)
+    manager = EventManager()
+    patterns = []
+    start = time.perf_counter()
+    for i in range(files):
+        for _ in range(per_topic):
+            manager.subscribe(f"file.{i}.save", CountingListener())
+            patterns.append(f"file.{i}.save")
+    for i in range(wildcards):
+        pattern = ("file.*.save", "file.**", f"file.{i}.*")[i % 3]
+        manager.subscribe(pattern, CountingListener())
+        patterns.append(pattern)
+    setup = time.perf_counter() - start
+    print(f"observer notify: {len(patterns)} listeners, {files} topics,"
+          f" {wildcards} wildcard subscriptions (subscribed in {setup:.2f} s)")
+
+    # a working set of hot files, small enough for the route cache
+    topics = [f"file.{rng.randrange(files // 10)}.save" for _ in range(events)]
+    start = time.perf_counter()
+    for topic in topics[:20]:
+        _ = [pattern for pattern in patterns if fnmatchcase(topic, pattern.replace("**", "*"))]
+    scan = (time.perf_counter() - start) / 20
+    print(f"  match every subscription {scan * 1e6:10.1f} us/event")
+
+    start = time.perf_counter()
+    for topic in topics[:1000]:
+        manager._routes.clear()  # pylint: disable=protected-access
+        manager.notify(topic, "file")
+    cold = (time.perf_counter() - start) / 1000
+    print(f"  trie walk + notify       {cold * 1e6:10.1f} us/event")
+
+    start = time.perf_counter()
+    for topic in topics:
+        manager.notify(topic, "file")
+    warm = (time.perf_counter() - start) / events
+    print(f"  cached route + notify    {warm * 1e6:10.1f} us/event"
+          f" ({per_topic + wildcards * 2 // 3} listeners per event)")
+
+
+if __name__ == "__main__":
+    bench_churn()
+    bench_wildcard_notify()
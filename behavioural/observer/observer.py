@@ -1,6 +1,8 @@
 """ Implementation Observer Design Pattern """
 
 
+import itertools
+import weakref
 from abc import ABC, abstractmethod
 
 
@@ -11,34 +13,128 @@ class EventListener(ABC):
         """ abstract update method """
 
 
+class _TopicNode:
+    """ Trie node for one topic segment, holding the listeners of its pattern """
+    __slots__ = ("children", "listeners", "order")
+
+    def __init__(self):
+        self.children = {}
+        self.listeners = None
+        self.order = 0
+
+
 class EventManager:
     """
     Event Manager class
-
-    Args: list[operations]
+    Listeners are kept per topic pattern in ordered dicts keyed by id, so
+    subscribe/unsubscribe are O(1). Patterns are dot-separated topics where
+    "*" matches one segment and "**" any number of segments ("file.*").
+    The matching pattern buckets of each event type are resolved once from
+    a trie and cached until a new pattern appears, so notify only touches
+    matching listeners. Weakly subscribed listeners are dropped once
+    nothing else references them. A pattern left without listeners is
+    dropped with its trie path, except the declared operations.
+
+    Args: list[operations], weak: subscribe weakly by default
     Returns: None
     """
-    def __init__(self, operations: list):
-        self.operations = operations
+    ROUTE_CACHE_SIZE = 4096
+
+    def __init__(self, operations: list = (), weak: bool = False):
+        self.operations = list(operations)
+        self.weak = weak
         self.listeners = {}
+        self._trie = _TopicNode()
+        self._routes = {}
+        self._order = itertools.count()
         for op in self.operations:
-            self.listeners[op] = []
-
-    def subscribe(self, event_type: str, listener: EventListener):
-        """ Subscribe to event manager """
-        users = self.listeners[event_type]
-        users.append(listener)
+            self._bucket(op)
+
+    def _bucket(self, pattern: str) -> dict:
+        """ listeners of a pattern, creating its trie path on first use """
+        bucket = self.listeners.get(pattern)
+        if bucket is None:
+            node = self._trie
+            for segment in pattern.split("."):
+                node = node.children.setdefault(segment, _TopicNode())
+            node.listeners = bucket = {}
+            node.order = next(self._order)
+            self.listeners[pattern] = bucket
+            self._routes.clear()
+        return bucket
+
+    def _route(self, event_type: str) -> tuple:
+        """ buckets of every pattern matching event_type, in pattern creation order """
+        segments = event_type.split(".")
+        matched = {}
+
+        def walk(node: _TopicNode, index: int):
+            if index == len(segments):
+                if node.listeners is not None:
+                    matched[id(node)] = node
+                if "**" in node.children:
+                    walk(node.children["**"], index)
+                return
+            for segment in (segments[index], "*"):
+                if segment in node.children:
+                    walk(node.children[segment], index + 1)
+            if "**" in node.children:
+                for rest in range(index, len(segments) + 1):
+                    walk(node.children["**"], rest)
+
+        walk(self._trie, 0)
+        nodes = sorted(matched.values(), key=lambda node: node.order)
+        if len(self._routes) >= self.ROUTE_CACHE_SIZE:
+            self._routes.clear()
+        route = self._routes[event_type] = tuple(node.listeners for node in nodes)
+        return route
+
+    def subscribe(self, event_type: str, listener: EventListener, weak: bool = None):
+        """ Subscribe to event manager, event_type may be a wildcard pattern """
+        bucket = self._bucket(event_type)
+        key = id(listener)
+        if weak if weak is not None else self.weak:
+            bucket[key] = weakref.ref(
+                listener, lambda _, key=key: self._discard(event_type, bucket, key)
+            )
+        else:
+            bucket[key] = listener
 
     def unsubscribe(self, event_type: str, listener: EventListener):
-        """ Unsubscribe from event manager """
-        users = self.listeners[event_type]
-        users.remove(listener)
+        """ Unsubscribe from event manager, unknown listeners are ignored """
+        bucket = self.listeners.get(event_type)
+        if bucket is not None:
+            self._discard(event_type, bucket, id(listener))
+
+    def _discard(self, pattern: str, bucket: dict, key: int):
+        """ remove a listener, pruning the pattern once its bucket is empty """
+        bucket.pop(key, None)
+        if bucket or pattern in self.operations or self.listeners.get(pattern) is not bucket:
+            return
+        del self.listeners[pattern]
+        path = [self._trie]
+        for segment in pattern.split("."):
+            path.append(path[-1].children[segment])
+        path[-1].listeners = None
+        for parent, segment in zip(reversed(path[:-1]), reversed(pattern.split("."))):
+            child = parent.children[segment]
+            if child.children or child.listeners is not None:
+                break
+            del parent.children[segment]
+        self._routes.clear()
 
     def notify(self, event_type, file):
         """ send notification to listeners """
-        users = self.listeners[event_type]
-        for u in users:
-            u.update(event_type, file)
+        route = self._routes.get(event_type)
+        if route is None:
+            route = self._route(event_type)
+        for bucket in route:
+            for u in tuple(bucket.values()):
+                if u.__class__ is weakref.ReferenceType:
+                    u = u()
+                    if u is None:
+                        continue
+                u.update(event_type, file)
 
 
 class Editor:
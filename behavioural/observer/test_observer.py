@@ -0,0 +1,69 @@
+""" Routing and weak subscription tests for the Observer """
+
+import gc
+import unittest
+
+from observer import EventListener, EventManager
+
+
+class Recorder(EventListener):
+    """ keeps the events it received in a shared log """
+    def __init__(self, name: str, log: list):
+        self.name = name
+        self.log = log
+
+    def update(self, event_type: str, file):
+        self.log.append((self.name, event_type))
+
+
+class EventManagerTest(unittest.TestCase):
+    """ notify must reach exactly the matching listeners, in pattern order """
+
+    def setUp(self):
+        self.log = []
+        self.events = EventManager(["open", "save"])
+
+    def names(self, event_type: str) -> list:
+        self.log.clear()
+        self.events.notify(event_type, "file")
+        return [name for name, _ in self.log]
+
+    def test_wildcards(self):
+        for name, pattern in (("exact", "file.open"), ("one", "file.*"), ("any", "**"),
+                              ("tail", "file.**"), ("other", "dir.*")):
+            self.events.subscribe(pattern, Recorder(name, self.log))
+        self.assertEqual(self.names("file.open"), ["exact", "one", "any", "tail"])
+        self.assertEqual(self.names("file.open.deep"), ["any", "tail"])
+        self.assertEqual(self.names("file"), ["any", "tail"])
+        self.assertEqual(self.names("dir.open"), ["any", "other"])
+
+    def test_route_cache_sees_new_patterns(self):
+        self.events.subscribe("file.*", Recorder("one", self.log))
+        self.assertEqual(self.names("file.open"), ["one"])
+        self.events.subscribe("file.open", Recorder("exact", self.log))
+        self.assertEqual(self.names("file.open"), ["one", "exact"])
+
+    def test_weak_listeners_are_dropped_and_pruned(self):
+        listener = Recorder("weak", self.log)
+        self.events.subscribe("file.*.saved", listener, weak=True)
+        self.events.subscribe("save", Recorder("declared", self.log), weak=True)
+        gc.collect()
+        self.assertEqual(self.names("file.a.saved"), ["weak"])
+        del listener
+        gc.collect()
+        self.assertEqual(self.names("file.a.saved"), [])
+        self.assertNotIn("file.*.saved", self.events.listeners)
+        self.assertNotIn("file", self.events._trie.children)  # pylint: disable=protected-access
+        self.assertEqual(self.events.listeners["save"], {})
+
+    def test_unsubscribe(self):
+        listener = Recorder("strong", self.log)
+        self.events.subscribe("open", listener)
+        self.events.unsubscribe("open", listener)
+        self.events.unsubscribe("missing", listener)
+        self.assertEqual(self.names("open"), [])
+        self.assertIn("open", self.events.listeners)
+
+
+if __name__ == "__main__":
+    unittest.main()